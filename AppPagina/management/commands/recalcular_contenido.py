@@ -0,0 +1,46 @@
+# AppPagina/management/commands/recalcular_contenido.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from AppPagina.models import Pagina, texto_plano, LARGO_EXTRACTO
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula 'tiene_contenido' y 'extracto' de todas las páginas. "
+        "Útil si se cargaron o modificaron páginas sin pasar por Pagina.save()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Cantidad de páginas leídas por lote (por defecto: 500).'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        revisadas = 0
+        cambiadas = []
+
+        qs = Pagina.objects.only('id', 'contenido', 'tiene_contenido', 'extracto')
+        for pagina in qs.iterator(chunk_size=chunk_size):
+            revisadas += 1
+            texto = texto_plano(pagina.contenido)
+            tiene_contenido, extracto = bool(texto), texto[:LARGO_EXTRACTO]
+            if (pagina.tiene_contenido, pagina.extracto) != (tiene_contenido, extracto):
+                pagina.tiene_contenido = tiene_contenido
+                pagina.extracto = extracto
+                cambiadas.append(pagina)
+
+        # bulk_update no dispara señales: invalidar la navegación a mano
+        with transaction.atomic():
+            Pagina.objects.bulk_update(cambiadas, ['tiene_contenido', 'extracto'], batch_size=chunk_size)
+            if cambiadas:
+                from blog.navegacion import invalidar_navegacion
+                invalidar_navegacion()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Páginas revisadas: {revisadas}. Actualizadas: {len(cambiadas)}."
+        ))
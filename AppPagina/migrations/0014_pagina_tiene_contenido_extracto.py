@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:07
+
+import html
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# copia de AppPagina.models al momento de esta migración (la historia no debe cambiar con el modelo)
+LARGO_EXTRACTO = 200
+LOTE = 500
+
+
+def texto_plano(html_text):
+    texto = html.unescape(strip_tags(html_text or ""))
+    texto = texto.replace('\u200b', '')
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+def calcular_resumen(apps, schema_editor):
+    Pagina = apps.get_model('AppPagina', 'Pagina')
+    lote = []
+    for pagina in Pagina.objects.only('id', 'contenido').iterator(chunk_size=LOTE):
+        texto = texto_plano(pagina.contenido)
+        pagina.tiene_contenido = bool(texto)
+        pagina.extracto = texto[:LARGO_EXTRACTO]
+        lote.append(pagina)
+        if len(lote) >= LOTE:
+            Pagina.objects.bulk_update(lote, ['tiene_contenido', 'extracto'])
+            lote = []
+    Pagina.objects.bulk_update(lote, ['tiene_contenido', 'extracto'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppPagina', '0013_alter_pagina_contenido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pagina',
+            name='extracto',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200, verbose_name='Extracto'),
+        ),
+        migrations.AddField(
+            model_name='pagina',
+            name='tiene_contenido',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='Tiene contenido'),
+        ),
+        migrations.RunPython(calcular_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppPagina', '0014_pagina_tiene_contenido_extracto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pagina',
+            index=models.Index(condition=models.Q(('publico', True)), fields=['orden'], name='pagina_pub_orden_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagina',
+            index=models.Index(condition=models.Q(('es_inicio', True)), fields=['es_inicio'], name='pagina_inicio_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def renombrar_repetidos(apps, schema_editor):
+    from mainApp.nombres_unicos import renombrar_repetidos
+
+    renombrar_repetidos(apps.get_model('AppPagina', 'Pagina'), 'titulo')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppPagina', '0015_indices_publicos'),
+        ('blog', '0034_indices_publicos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(renombrar_repetidos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pagina',
+            constraint=models.UniqueConstraint(fields=('titulo',), name='pagina_titulo_unico'),
+        ),
+    ]
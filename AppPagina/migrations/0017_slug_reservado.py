@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:40
+
+from django.db import migrations
+
+
+def renombrar_reservados(apps, schema_editor):
+    from AppPagina.models import SLUGS_RESERVADOS
+    from mainApp.nombres_unicos import FORMATO_SLUG, valor_unico
+
+    # una página con el slug de una ruta fija ya no se podía abrir: pasa a "articulos-1"
+    Pagina = apps.get_model('AppPagina', 'Pagina')
+    for pagina in Pagina.objects.filter(slug__in=SLUGS_RESERVADOS):
+        pagina.slug = valor_unico(Pagina, 'slug', pagina.slug, pagina.pk, FORMATO_SLUG, recortada=True)
+        pagina.save(update_fields=['slug'])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppPagina', '0016_nombres_unicos'),
+    ]
+
+    operations = [
+        migrations.RunPython(renombrar_reservados, migrations.RunPython.noop),
+    ]
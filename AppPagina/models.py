@@ -3,18 +3,42 @@ from django_ckeditor_5.fields import CKEditor5Field
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
-from django.db import transaction, IntegrityError
+from django.db import transaction
 from django.core.exceptions import ValidationError
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django.utils.html import strip_tags
+import html
+import re
+
+from mainApp.nombres_unicos import FORMATO_NOMBRE, FORMATO_SLUG, guardar_unico, valor_unico
+
+LARGO_EXTRACTO = 200
+
+
+def texto_plano(html_text):
+    """Texto visible de un contenido HTML de CKEditor, con los espacios normalizados."""
+    # quitar etiquetas html y decodificar entidades como &nbsp;
+    texto = html.unescape(strip_tags(html_text or ""))
+    # borrar caracteres zero-width y colapsar cualquier whitespace (incluye NBSP)
+    texto = texto.replace('\u200b', '')
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+# rutas fijas al mismo nivel que '<slug>/' de las páginas (blog.urls va antes y las taparía)
+SLUGS_RESERVADOS = {"articulos"}
+
+
+def _base_slug(base_slug, exclude_pk=None):
+    """Base para el slug de una página; si es una ruta reservada ya sale con sufijo ("articulos-1")."""
+    base_slug = base_slug or "pagina"
+    if base_slug in SLUGS_RESERVADOS:
+        return valor_unico(Pagina, "slug", base_slug, exclude_pk, FORMATO_SLUG, recortada=True)
+    return base_slug
 
 
 def _generate_unique_slug(model, base_slug, exclude_pk=None):
-    base = base_slug or "pagina"
-    candidate = base
-    counter = 1
-    while model.objects.filter(slug=candidate).exclude(pk=exclude_pk).exists():
-        candidate = f"{base}-{counter}"
-        counter += 1
-    return candidate
+    return valor_unico(model, "slug", _base_slug(base_slug, exclude_pk), exclude_pk, FORMATO_SLUG)
 # Create your models here.
 
 class Pagina(models.Model):
@@ -28,7 +52,8 @@ class Pagina(models.Model):
                              related_name="paginas", null=True, blank=True, help_text="Indica qué tipo de artículo se mostrará en las categorías o subcategorías de la página.")
     
     es_inicio = models.BooleanField(default=False, verbose_name="Página de inicio", help_text="Solo puede haber una página con esta opción. Al estar activa, el slug pasa a estar vacío y será la primera página en mostrarse.")
-    
+    tiene_contenido = models.BooleanField(default=False, editable=False, db_index=True, verbose_name="Tiene contenido")
+    extracto = models.CharField(max_length=LARGO_EXTRACTO, blank=True, default="", editable=False, verbose_name="Extracto")
     
     creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
     modificacion = models.DateTimeField(auto_now=True, verbose_name="Ultima modificación")
@@ -40,6 +65,15 @@ class Pagina(models.Model):
         verbose_name = "Página"
         verbose_name_plural = "Páginas"
         ordering = ["orden", "-creacion"]  
+        indexes = [
+            # barra de navegación: páginas públicas por orden
+            models.Index(fields=["orden"], condition=models.Q(publico=True), name="pagina_pub_orden_idx"),
+            # vista de inicio: la única página con es_inicio=True
+            models.Index(fields=["es_inicio"], condition=models.Q(es_inicio=True), name="pagina_inicio_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["titulo"], name="pagina_titulo_unico"),
+        ]
 
     def clean(self):
         """Validaciones sin efectos secundarios de BD.
@@ -47,11 +81,10 @@ class Pagina(models.Model):
         se mueve a `save()` para evitar efectos inesperados.
         """
         # Evitar títulos duplicados: renombrar añadiendo sufijo numérico si hace falta
-        base_titulo = self.titulo
-        counter = 1
-        while Pagina.objects.filter(titulo=self.titulo).exclude(pk=self.pk).exists():
-            self.titulo = f"{base_titulo} ({counter})"
-            counter += 1
+        self.titulo = valor_unico(Pagina, "titulo", self.titulo, self.pk)
+
+        if self.slug in SLUGS_RESERVADOS:
+            raise ValidationError({"slug": f"«{self.slug}» es una dirección del sitio: elegí otro slug."})
 
         # Generar slug candidato único y asignarlo a self (sin tocar otras filas)
         if self.slug:
@@ -60,9 +93,18 @@ class Pagina(models.Model):
             base_slug = slugify(self.titulo) or "pagina"
             self.slug = _generate_unique_slug(Pagina, base_slug, exclude_pk=self.pk)
 
+    def actualizar_resumen(self):
+        """Recalcula `tiene_contenido` y `extracto` a partir de `contenido`."""
+        texto = texto_plano(self.contenido)
+        self.tiene_contenido = bool(texto)
+        self.extracto = texto[:LARGO_EXTRACTO]
+
     def save(self, *args, **kwargs):
-        # llamar clean() aquí para que la lógica aplique también si guardas por código
-        self.clean()
+        # lo mismo que clean() (título y slug únicos), pero con reintento si otro guardado
+        # ocupa el valor al mismo tiempo: así aplica también si guardas por código
+        slug_propio = self.slug
+        unicos = {"titulo": (self.titulo, FORMATO_NOMBRE)}
+        self.actualizar_resumen()
 
         # Usar una transacción para evitar condiciones de carrera al reasignar slugs
         with transaction.atomic():
@@ -79,16 +121,16 @@ class Pagina(models.Model):
                     pagina.orden += 1
                     Pagina.objects.filter(pk=pagina.pk).update(slug=candidate, orden=pagina.orden)
             else:
-                # Asegurar que `self.slug` ya sea único (clean() normalmente lo dejó así)
-                if not self.slug:
-                    self.slug = _generate_unique_slug(Pagina, slugify(self.titulo) or "pagina", exclude_pk=self.pk)
+                unicos["slug"] = (lambda: _base_slug(slug_propio or slugify(self.titulo), self.pk), FORMATO_SLUG)
 
-            try:
-                super().save(*args, **kwargs)
-            except IntegrityError:
-                # Reintentar una vez generando un slug alternativo por seguridad
-                self.slug = _generate_unique_slug(Pagina, slugify(self.titulo) or "pagina", exclude_pk=self.pk)
-                super().save(*args, **kwargs)
+            guardar_unico(self, lambda: super(Pagina, self).save(*args, **kwargs), unicos)
 
     def __str__(self):
-        return self.titulo or f"Página {self.pk}"
\ No newline at end of file
+        return self.titulo or f"Página {self.pk}"
+
+
+@receiver(pre_save, sender=Pagina)
+def actualizar_resumen_en_carga(sender, instance, raw, **kwargs):
+    # loaddata guarda con raw=True sin pasar por save(): recalcular igual el resumen
+    if raw:
+        instance.actualizar_resumen()
@@ -311,6 +311,19 @@ class PaginaAdditionalTests(TestCase):
         self.assertEqual(p1.slug, "slug-duplicado")
         self.assertEqual(p2.slug, "slug-duplicado-1")
 
+    def test_slug_reservado_no_tapa_el_listado_de_articulos(self):
+        """'articulos/' es el listado del blog: una página no puede quedarse con ese slug."""
+        p = Pagina(titulo='Otra', contenido='x', tipo=self.tipo, usuario=self.user, publico=True, slug='articulos')
+        with self.assertRaises(ValidationError):
+            p.full_clean()
+
+        p1 = Pagina.objects.create(titulo='Artículos', contenido='x', tipo=self.tipo, usuario=self.user, publico=True)
+        p2 = Pagina.objects.create(titulo='Otra', contenido='x', tipo=self.tipo, usuario=self.user, publico=True,
+                                   slug='articulos')
+        self.assertEqual(p1.slug, "articulos-1")
+        self.assertEqual(p2.slug, "articulos-2")
+        self.assertEqual(reverse("N_pagina", args=[p1.slug]), "/articulos-1/")
+
 
 class PaginaViewsTest(TestCase):
 
@@ -404,3 +417,53 @@ class PaginaViewsTest(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
 
+
+
+class PaginaResumenContenidoTest(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="tester", password="testpass123")
+        self.tipo = Tipo.objects.create(nombre="general", slug="general")
+
+    def test_save_calcula_tiene_contenido_y_extracto(self):
+        p = Pagina.objects.create(
+            titulo="Con texto",
+            contenido="<p>Hola&nbsp;<strong>mundo</strong></p>",
+            tipo=self.tipo,
+            usuario=self.user,
+            publico=True,
+        )
+        p.refresh_from_db()
+        self.assertTrue(p.tiene_contenido)
+        self.assertEqual(p.extracto, "Hola mundo")
+
+    def test_contenido_solo_espacios_no_cuenta(self):
+        p = Pagina.objects.create(
+            titulo="Vacia",
+            contenido="<p>&nbsp;</p><p>\u200b</p>",
+            tipo=self.tipo,
+            usuario=self.user,
+            publico=True,
+        )
+        self.assertFalse(p.tiene_contenido)
+        self.assertEqual(p.extracto, "")
+
+    def test_comando_recalcula_filas_desactualizadas(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        p = Pagina.objects.create(
+            titulo="Desactualizada",
+            contenido="<p>Texto</p>",
+            tipo=self.tipo,
+            usuario=self.user,
+            publico=True,
+        )
+        Pagina.objects.filter(pk=p.pk).update(tiene_contenido=False, extracto="")
+
+        salida = StringIO()
+        call_command("recalcular_contenido", stdout=salida)
+        p.refresh_from_db()
+        self.assertTrue(p.tiene_contenido)
+        self.assertEqual(p.extracto, "Texto")
+        self.assertIn("Actualizadas: 1", salida.getvalue())
@@ -1,31 +1,32 @@
-from django.utils.html import strip_tags
 from django.shortcuts import get_object_or_404, redirect, render
 from AppPagina.models import Pagina
 from django.contrib import messages
-import html
+from mainApp.decorators import cache_publico
+from mainApp.cache_publico import render_condicional
 
+@cache_publico
 def cargar_url(request, slug):
     pagina = get_object_or_404(Pagina, slug=slug)
-    texto = strip_tags(pagina.contenido or "")
-    texto = html.unescape(texto).replace('\xa0', ' ').strip()
-    if not texto:
+    if not pagina.tiene_contenido:
         messages.error(request, f'La pagina "{pagina.titulo}" no tiene contenido cargado')
         return redirect("N_inicio")  # o raise Http404()
-    return render(request, "paginas/pagina.html", {
+    return render_condicional(request, "paginas/pagina.html", {
         "v_titulo": pagina.titulo,
         "v_pag": pagina,
-    })
+    }, fechas=[pagina.modificacion])
 
 
 
         
 
 
+@cache_publico
 def inicio(request):
     
     cargar_url_paginas = get_object_or_404(Pagina, es_inicio=True)
-    return render(request,'paginas/pag_inicio.html',{
+    return render_condicional(request,'paginas/pag_inicio.html',{
         'v_titulo':cargar_url_paginas.titulo,
         'v_pag': cargar_url_paginas,
-        'v_pag_inicio': True}
+        'v_pag_inicio': True},
+        fechas=[cargar_url_paginas.modificacion]
         )
\ No newline at end of file
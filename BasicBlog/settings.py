@@ -49,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # primero, para que el tiempo total incluya al resto (inactivo si INSTRUMENTACION = False)
+    'mainApp.middleware.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -65,7 +67,8 @@ ROOT_URLCONF = 'BasicBlog.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates + mediciones de settings.INSTRUMENTACION (mainApp/instrumentacion.py)
+        'BACKEND': 'mainApp.instrumentacion.DjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,6 +89,45 @@ TEMPLATES = [
 WSGI_APPLICATION = 'BasicBlog.wsgi.application'
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Las purgas de páginas y la versión de la navegación viven en la caché: con varios
+# workers tiene que ser compartida. CACHE_REDIS_URL (p. ej. redis://127.0.0.1:6379/1,
+# requiere el paquete redis) o CACHE_TABLA (DatabaseCache; crear la tabla con
+# `manage.py createcachetable`). Sin ninguna se usa LocMem, que es por proceso: un
+# cambio solo invalida el proceso que lo atendió, así que los timeouts se acortan.
+
+if os.getenv('CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_REDIS_URL'),
+        }
+    }
+elif os.getenv('CACHE_TABLA'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.getenv('CACHE_TABLA'),
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'wiki-facundo-cabral',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+CACHE_COMPARTIDA = not CACHES['default']['BACKEND'].endswith('LocMemCache')
+
+# Caché de páginas públicas completas para visitantes anónimos (0 = desactivada)
+CACHE_PUBLICO_TIMEOUT = 60 * 10 if CACHE_COMPARTIDA else 30
+# Contadores de hits/misses/purgas en mantenimiento: suman dos escrituras en la caché por request
+CACHE_PUBLICO_ESTADISTICAS = False
+
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -135,6 +177,14 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Cómo se entregan los bytes de /media/ (ver mainApp/media.py):
+#   "python"           -> Django lee el archivo en bloques (Range incluido)
+#   "sendfile"         -> FileResponse: el servidor WSGI usa os.sendfile vía wsgi.file_wrapper
+#   "x-sendfile"       -> header X-Sendfile (Apache mod_xsendfile, lighttpd)
+#   "x-accel-redirect" -> header X-Accel-Redirect (nginx, con una location "internal")
+MEDIA_DELIVERY = "python"
+MEDIA_ACCEL_REDIRECT_PREFIX = "/media-interno/"
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -165,7 +215,8 @@ CKEDITOR_5_CONFIGS = {
 }
 
 CKEDITOR_5_UPLOAD_PATH = "uploads/"  
-CKEDITOR_5_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"  
+# igual que FileSystemStorage, pero encola las variantes responsive de cada imagen (blog/variantes.py)
+CKEDITOR_5_FILE_STORAGE = "blog.variantes.AlmacenamientoConVariantes"
 CKEDITOR_5_ALLOW_ALL_FILE_TYPES = False
 CKEDITOR_5_UPLOAD_FILE_TYPES = ['jpg', 'jpeg', 'png', 'gif', 'webp', 'pdf']
 from django.conf import settings
@@ -176,3 +227,36 @@ CKEDITOR_5_CUSTOM_CSS = "css/estilosck.css"
 
 # CKEDITOR_5_USER_LANGUAGE = True
 
+
+# Navegación: segundos que se conserva el snapshot de la barra de navegación
+# (se invalida antes por señales al modificar páginas, categorías, subcategorías o el layout;
+# con LocMem solo en el proceso que hizo el cambio, ver CACHES)
+NAVEGACION_CACHE_TIMEOUT = 60 * 60 if CACHE_COMPARTIDA else 30
+
+# Cola de tareas en la base de datos (mantenimiento/tareas.py, worker: manage.py procesar_tareas)
+TAREAS_MAX_INTENTOS = 3
+TAREAS_REINTENTO_SEGUNDOS = 30  # espera antes del 1er reintento; se duplica en cada fallo
+TAREAS_TIMEOUT = 60 * 10  # una tarea "en proceso" más tiempo que esto se considera abandonada
+
+# Archivos que dejan de usarse: se borran en el worker después del commit (blog/limpieza.py)
+ARCHIVOS_BORRADO_LOTE = 200
+# manage.py barrer_archivos ignora los archivos más nuevos que esto (segundos)
+ARCHIVOS_HUERFANOS_ANTIGUEDAD = 60 * 60 * 24
+
+# Métricas por request (consultas, tiempo de base, plantillas) en el header Server-Timing
+# y en el log mainApp.instrumentacion. Apagado no tiene costo (ver mainApp/middleware.py).
+INSTRUMENTACION = False
+
+# Artículos por página en los listados públicos (paginación por cursor, blog/paginacion.py)
+ARTICULOS_POR_PAGINA = 20
+
+# Anchos (px) de las variantes WebP/JPEG de las imágenes subidas (blog/variantes.py)
+IMAGEN_VARIANTES_ANCHOS = (320, 640, 1024)
+# Segundos que las plantillas recuerdan que una imagen no tiene variantes antes de volver a mirar el storage
+IMAGEN_VARIANTES_REVISAR = 60
+
+# Videos subidos: versión "fast start" para web (blog/video.py).
+# Sin ffmpeg instalado se reordena el MP4 en Python, sin recodificar.
+VIDEO_FFMPEG = "ffmpeg"
+VIDEO_BITRATE_MAXIMO = None  # p. ej. "2500k" para recodificar con ese bitrate máximo (requiere ffmpeg)
+VIDEO_FFMPEG_TIMEOUT = 60 * 60
@@ -27,17 +27,20 @@ urlpatterns = [
     path('select2/', include('django_select2.urls')),
     path("",include("mantenimiento.urls")),
     path('',include('mainApp.urls')),
-    path('',include('AppPagina.urls')),
+    # blog antes que AppPagina: si no, '<slug>/' de las páginas tapa a 'articulos/'
+    # (por eso ese slug está reservado: AppPagina.models.SLUGS_RESERVADOS)
     path("", include('blog.urls')),
+    path('',include('AppPagina.urls')),
     path("ckeditor5/", include("django_ckeditor_5.urls")),
 ]
 
 #IMAGENES
 from django.urls import re_path
-from django.views.static import serve
+from mainApp.media import servir_media
 
+# servir_media reemplaza a django.views.static.serve: soporta Range (206) para los videos
 urlpatterns += [
-    re_path(r'^media/(?P<path>.*)$', serve, {
+    re_path(r'^media/(?P<path>.*)$', servir_media, {
         'document_root': settings.MEDIA_ROOT
     }),
 ]
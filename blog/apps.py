@@ -5,3 +5,6 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name="Gestión del blog"
+
+    def ready(self):
+        from . import limpieza, signals, tareas  # noqa: F401
@@ -0,0 +1,300 @@
+# blog/bulk.py
+"""
+Importación masiva de tipos, páginas, categorías, subcategorías y artículos
+(manage.py importar_blog).
+
+save() hace consultas por fila (nombres únicos, archivo anterior) y las señales post_save
+encolan tareas e invalidan la navegación fila por fila. Acá las filas se insertan con
+bulk_create por lotes y lo que harían ellos se hace una vez por lote:
+  - nombres y slugs únicos con mainApp.nombres_unicos.Asignador (en memoria),
+  - resumen de las páginas (tiene_contenido, extracto),
+  - relaciones categoría-página en un solo bulk_create,
+  - variantes, miniaturas de video y videos fast start encolados (blog.tareas.encolar_medios),
+  - la navegación se invalida una sola vez, en `terminar()`.
+
+Las referencias a otras filas van por clave natural: tipo, página y subcategoría por slug,
+categoría por nombre. Primero se busca entre lo importado en esta corrida, con el valor
+que traía el archivo (aunque la fila se haya renombrado), y después en la base.
+"""
+import csv
+import json
+import os
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from AppPagina.models import Pagina
+from mainApp.nombres_unicos import FORMATO_NOMBRE, FORMATO_SLUG, INTENTOS, Asignador
+from .models import Articulo, Categoria, SubCategoria, Tipo
+from .navegacion import invalidar_navegacion
+from .tareas import encolar_medios
+
+# en orden de dependencias: cada modelo solo referencia a los anteriores
+MODELOS = {
+    "tipos": Tipo,
+    "paginas": Pagina,
+    "categorias": Categoria,
+    "subcategorias": SubCategoria,
+    "articulos": Articulo,
+}
+COLUMNAS = {
+    Tipo: ("nombre", "slug"),
+    Pagina: ("titulo", "slug", "contenido", "orden", "publico", "tipo"),
+    Categoria: ("nombre", "desc", "publico", "paginas"),
+    SubCategoria: ("nombre", "slug", "categoria", "desc", "publico", "imagen", "usar_miniatura",
+                   "video_url", "video_file"),
+    Articulo: ("titulo", "contenido", "publico", "categoria", "subcategoria", "tipo", "imagen",
+               "usar_miniatura", "video_url", "video_file"),
+}
+# (campo de nombre, campo slug o None)
+UNICOS = {
+    Tipo: ("nombre", "slug"),
+    Pagina: ("titulo", "slug"),
+    Categoria: ("nombre", None),
+    SubCategoria: ("nombre", "slug"),
+    Articulo: ("titulo", None),
+}
+# columna -> (modelo, campo por el que se busca)
+REFERENCIAS = {
+    "tipo": (Tipo, "slug"),
+    "categoria": (Categoria, "nombre"),
+    "subcategoria": (SubCategoria, "slug"),
+    "paginas": (Pagina, "slug"),
+}
+CLAVE_NATURAL = {modelo: campo for modelo, campo in REFERENCIAS.values()}
+# varias páginas en una celda CSV: "inicio|discos"
+SEPARADOR_LISTA = "|"
+LOTE = 500
+
+
+class ErrorImportacion(ValueError):
+    def __init__(self, fila, mensaje):
+        self.fila = fila
+        super().__init__(f"fila {fila}: {mensaje}")
+
+
+def formato_de(nombre):
+    extension = os.path.splitext(nombre)[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(extension, "json")
+
+
+def leer(archivo, formato=None):
+    """Filas (dict) de un archivo de texto: CSV con encabezado, JSON Lines o una lista JSON."""
+    formato = formato or formato_de(getattr(archivo, "name", ""))
+    if formato == "csv":
+        yield from csv.DictReader(archivo)
+    elif formato == "jsonl":
+        # se lee de a una línea: sirve para archivos más grandes que la memoria
+        for linea in archivo:
+            if linea.strip():
+                yield json.loads(linea)
+    else:
+        yield from json.load(archivo)
+
+
+def _alguno_ocupado(modelo, objetos):
+    """Si otra fila ya tiene alguno de los nombres o slugs asignados al lote (el savepoint deshizo los nuestros)."""
+    filtro = Q()
+    for campo in filter(None, UNICOS[modelo]):
+        filtro |= Q(**{f"{campo}__in": [getattr(objeto, campo) for objeto in objetos]})
+    return modelo._default_manager.filter(filtro).exists()
+
+
+def claves(columna, valor):
+    """Los valores referenciados por una celda: una lista (JSON) o "a|b" (CSV) en `paginas`."""
+    if columna != "paginas":
+        return [str(valor).strip()]
+    valores = valor if isinstance(valor, list) else str(valor).split(SEPARADOR_LISTA)
+    return [str(v).strip() for v in valores if str(v).strip()]
+
+
+class Importador:
+    """
+    Importa filas por lotes dentro de la transacción de quien llama. Recuerda las claves
+    de lo importado entre llamadas: se pueden importar páginas y después categorías que
+    las referencian.
+    """
+
+    def __init__(self, usuario=None, lote=LOTE):
+        self.usuario = usuario
+        self.lote = lote
+        self.creados = Counter()
+        self.renombrados = Counter()
+        self._asignadores = {}
+        # (modelo, valor) -> pk
+        self._importados = {}
+        self._existentes = {}
+
+    def importar(self, modelo, filas):
+        """Importa `filas` (dicts con las columnas de COLUMNAS[modelo]). Devuelve cuántas creó."""
+        creados = 0
+        lote = []
+        for numero, fila in enumerate(filas, 1):
+            lote.append((numero, fila))
+            if len(lote) >= self.lote:
+                creados += self._importar_lote(modelo, lote)
+                lote = []
+        if lote:
+            creados += self._importar_lote(modelo, lote)
+        return creados
+
+    def terminar(self):
+        # bulk_create no dispara señales: invalidar la navegación (y con ella las páginas cacheadas)
+        invalidar_navegacion()
+
+    # region lote
+    def _importar_lote(self, modelo, lote):
+        self._buscar_referencias(lote)
+        objetos, originales, paginas = [], [], []
+        for numero, fila in lote:
+            objeto, paginas_fila = self._instancia(modelo, numero, fila)
+            campo_nombre, campo_slug = UNICOS[modelo]
+            originales.append((getattr(objeto, campo_nombre), getattr(objeto, campo_slug) if campo_slug else ""))
+            objetos.append(objeto)
+            paginas.append(paginas_fila)
+
+        for intento in range(INTENTOS):
+            self._asignar_unicos(modelo, objetos, originales)
+            try:
+                # savepoint: si otra transacción ocupó un nombre se reintenta solo este lote
+                with transaction.atomic():
+                    self._insertar(modelo, objetos, paginas)
+                break
+            except IntegrityError:
+                # solo se reintenta si el choque fue por un nombre que otra transacción ocupó
+                if intento == INTENTOS - 1 or not _alguno_ocupado(modelo, objetos):
+                    raise
+                for asignador in self._asignadores.values():
+                    asignador.olvidar()
+                for objeto in objetos:
+                    objeto.pk = None
+
+        campo_nombre, _ = UNICOS[modelo]
+        campo_clave = CLAVE_NATURAL.get(modelo)
+        for objeto, (nombre, slug) in zip(objetos, originales):
+            if getattr(objeto, campo_nombre) != nombre:
+                self.renombrados[modelo] += 1
+            if campo_clave:
+                original = nombre if campo_clave == campo_nombre else slug
+                self._importados[(modelo, getattr(objeto, campo_clave))] = objeto.pk
+                if original:
+                    self._importados.setdefault((modelo, original), objeto.pk)
+        self.creados[modelo] += len(objetos)
+        return len(objetos)
+
+    def _instancia(self, modelo, numero, fila):
+        desconocidas = set(fila) - set(COLUMNAS[modelo])
+        if desconocidas:
+            raise ErrorImportacion(numero, f"columnas desconocidas: {', '.join(sorted(desconocidas))}")
+        datos, paginas = {}, []
+        for columna, valor in fila.items():
+            # las celdas vacías del CSV valen como ausentes: queda el default del modelo
+            if valor in ("", None):
+                continue
+            if columna == "paginas":
+                paginas = list(dict.fromkeys(self._referencia(columna, numero, v) for v in claves(columna, valor)))
+            elif columna in REFERENCIAS:
+                datos[f"{columna}_id"] = self._referencia(columna, numero, str(valor).strip())
+            else:
+                datos[columna] = valor
+        objeto = modelo(**datos)
+        if any(campo.name == "usuario" for campo in modelo._meta.fields):
+            objeto.usuario = self.usuario
+
+        try:
+            # sin las FK (ya resueltas) ni los únicos (se asignan después): no consulta la base
+            objeto.clean_fields(exclude=["usuario", "tipo", "categoria", "subcategoria", "slug"])
+        except ValidationError as exc:
+            errores = "; ".join(f"{campo}: {' '.join(mensajes)}" for campo, mensajes in exc.message_dict.items())
+            raise ErrorImportacion(numero, errores) from exc
+        if getattr(objeto, "video_url", None) and getattr(objeto, "video_file", None):
+            raise ErrorImportacion(numero, "Solo se permite 1 tipo de video: URL o ARCHIVO.")
+        if modelo is Pagina:
+            objeto.actualizar_resumen()
+        return objeto, paginas
+
+    def _asignador(self, modelo, campo, formato):
+        if (modelo, campo) not in self._asignadores:
+            self._asignadores[(modelo, campo)] = Asignador(modelo, campo, formato)
+        return self._asignadores[(modelo, campo)]
+
+    def _asignar_unicos(self, modelo, objetos, originales):
+        campo_nombre, campo_slug = UNICOS[modelo]
+        nombres = self._asignador(modelo, campo_nombre, FORMATO_NOMBRE)
+        nombres.preparar(nombre for nombre, _ in originales)
+        for objeto, (nombre, _) in zip(objetos, originales):
+            setattr(objeto, campo_nombre, nombres.asignar(nombre))
+        if not campo_slug:
+            return
+        # como save(): el slug propio se respeta si está libre; si no, sale del nombre asignado
+        bases = [slug or slugify(getattr(objeto, campo_nombre)) or modelo._meta.model_name
+                 for objeto, (_, slug) in zip(objetos, originales)]
+        slugs = self._asignador(modelo, campo_slug, FORMATO_SLUG)
+        slugs.preparar(bases)
+        for objeto, base in zip(objetos, bases):
+            setattr(objeto, campo_slug, slugs.asignar(base))
+
+    def _insertar(self, modelo, objetos, paginas):
+        modelo.objects.bulk_create(objetos)
+        if objetos and objetos[0].pk is None:
+            # bases sin RETURNING en INSERT múltiple (MySQL): releer por el nombre, que es único
+            campo_nombre, _ = UNICOS[modelo]
+            pks = dict(modelo.objects.filter(
+                **{f"{campo_nombre}__in": [getattr(objeto, campo_nombre) for objeto in objetos]}
+            ).values_list(campo_nombre, "pk"))
+            for objeto in objetos:
+                objeto.pk = pks[getattr(objeto, campo_nombre)]
+        if modelo is Categoria:
+            Relacion = Categoria.paginas.through
+            Relacion.objects.bulk_create([
+                Relacion(categoria_id=objeto.pk, pagina_id=pagina_id)
+                for objeto, paginas_objeto in zip(objetos, paginas) for pagina_id in paginas_objeto
+            ])
+        if modelo in (SubCategoria, Articulo):
+            encolar_medios(objetos)
+    #endregion
+
+    # region referencias
+    def _buscar_referencias(self, lote):
+        """Resuelve con una consulta por modelo las referencias del lote que no se conocen todavía."""
+        pendientes = {}
+        for _, fila in lote:
+            for columna, valor in fila.items():
+                if columna not in REFERENCIAS or valor in ("", None):
+                    continue
+                modelo, _ = REFERENCIAS[columna]
+                for v in claves(columna, valor):
+                    if (modelo, v) not in self._importados and (modelo, v) not in self._existentes:
+                        pendientes.setdefault(modelo, set()).add(v)
+        for modelo, valores in pendientes.items():
+            campo = CLAVE_NATURAL[modelo]
+            for valor, pk in modelo.objects.filter(**{f"{campo}__in": valores}).values_list(campo, "pk"):
+                self._existentes[(modelo, valor)] = pk
+
+    def _referencia(self, columna, numero, valor):
+        modelo, campo = REFERENCIAS[columna]
+        pk = self._importados.get((modelo, valor)) or self._existentes.get((modelo, valor))
+        if pk is None:
+            raise ErrorImportacion(numero, f"{columna}: no existe {modelo._meta.verbose_name} con {campo} {valor!r}")
+        return pk
+    #endregion
+
+
+@transaction.atomic
+def importar(fuentes, usuario=None, lote=LOTE):
+    """
+    Importa `fuentes` ({"paginas": filas, "articulos": filas, ...}) en el orden de MODELOS,
+    todo o nada. Devuelve el Importador (cantidades en `creados` y `renombrados`).
+    """
+    desconocidas = set(fuentes) - set(MODELOS)
+    if desconocidas:
+        raise KeyError(f"Modelos desconocidos: {', '.join(sorted(desconocidas))}")
+    importador = Importador(usuario, lote)
+    for nombre, modelo in MODELOS.items():
+        if nombre in fuentes:
+            importador.importar(modelo, fuentes[nombre])
+    importador.terminar()
+    return importador
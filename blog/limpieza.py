@@ -0,0 +1,210 @@
+# blog/limpieza.py
+"""
+Borrado diferido de los archivos del storage que dejan de usarse.
+
+save() y los post_delete no borran el archivo en el momento: lo anotan en
+mantenimiento.ArchivoPorBorrar dentro de la misma transacción y, al confirmarla,
+encolan una tarea que borra los anotados por lotes (`manage.py procesar_tareas`).
+Lo mismo con las imágenes que se quitan del contenido de CKEditor (blog/signals.py).
+Así un rollback no deja filas apuntando a archivos que ya no existen, y eliminar
+mil artículos desde mantenimiento no hace mil borrados en el storage dentro del request.
+Antes de borrar se vuelve a mirar que ninguna fila use ese nombre, ni en un campo de
+archivo ni enlazado desde otro contenido.
+
+`barrer_huerfanos` (manage.py barrer_archivos, pensado para cron) recorre MEDIA_ROOT
+y anota los archivos que nada referencia: ni un FileField ni el contenido de CKEditor.
+"""
+import logging
+import posixpath
+import re
+from datetime import timedelta
+from urllib.parse import quote, unquote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.utils import timezone
+from django_ckeditor_5.fields import CKEditor5Field
+
+from mantenimiento.models import ArchivoPorBorrar
+from mantenimiento.tareas import encolar, registrar_tarea
+from .variantes import base_de_variante, borrar_variantes
+
+logger = logging.getLogger(__name__)
+
+TAREA_BORRADO = "blog.borrar_archivos"
+CLAVE_BORRADO = "borrar_archivos"
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+# region programar
+def programar_borrado(*nombres):
+    """Anota `nombres` para borrarlos del storage cuando la transacción actual se confirme."""
+    nombres = {nombre for nombre in nombres if nombre}
+    if not nombres:
+        return
+    ArchivoPorBorrar.objects.bulk_create(
+        [ArchivoPorBorrar(nombre=nombre) for nombre in nombres], ignore_conflicts=True)
+    # Se registra un callback por llamada (un post_delete por fila), pero los de la conexión
+    # comparten un aviso hasta que uno corre: la tarea se encola una vez por commit. Si la
+    # transacción se revierte, el aviso sin usar lo toman los callbacks de la siguiente.
+    conexion = transaction.get_connection()
+    aviso = getattr(conexion, "aviso_borrado", None)
+    if aviso is None or aviso.encolado:
+        aviso = conexion.aviso_borrado = _AvisoBorrado()
+    transaction.on_commit(aviso.encolar)
+
+
+def encolar_borrado():
+    encolar(TAREA_BORRADO, clave=CLAVE_BORRADO, repetir=True)
+
+
+class _AvisoBorrado:
+    encolado = False
+
+    def encolar(self):
+        if not self.encolado:
+            self.encolado = True
+            encolar_borrado()
+#endregion
+
+
+# region referencias
+def campos_archivo():
+    """(modelo, campo) de todos los FileField/ImageField del proyecto."""
+    return [
+        (modelo, campo)
+        for modelo in apps.get_models()
+        for campo in modelo._meta.concrete_fields
+        if isinstance(campo, models.FileField)
+    ]
+
+
+def campos_contenido():
+    """(modelo, campo) de todos los CKEditor5Field del proyecto."""
+    return [
+        (modelo, campo)
+        for modelo in apps.get_models()
+        for campo in modelo._meta.concrete_fields
+        if isinstance(campo, CKEditor5Field)
+    ]
+
+
+def referenciados(nombres):
+    """Los de `nombres` que alguna fila todavía usa en un campo de archivo o enlaza desde CKEditor."""
+    en_uso = set()
+    for modelo, campo in campos_archivo():
+        en_uso.update(modelo._default_manager.filter(**{f"{campo.name}__in": nombres})
+                      .values_list(campo.name, flat=True))
+    buscados = set(nombres)
+    if not buscados:
+        return en_uso
+    # el enlace puede tener el nombre tal cual o codificado (espacios, acentos)
+    formas = {forma for nombre in buscados for forma in (nombre, quote(nombre))}
+    for modelo, campo in campos_contenido():
+        filtro = models.Q()
+        for forma in formas:
+            filtro |= models.Q(**{f"{campo.name}__contains": forma})
+        for html in modelo._default_manager.filter(filtro).values_list(campo.name, flat=True).iterator():
+            en_uso.update(buscados.intersection(urls_media(html)))
+    return en_uso
+
+
+def _patron_media():
+    return re.compile(r'((?:src|href)=["\']' + re.escape(settings.MEDIA_URL) + r')([^"\'?#]+)')
+
+
+def urls_media(html):
+    """Nombres en el storage de los archivos que `html` enlaza bajo MEDIA_URL."""
+    return [unquote(enlace.group(2)) for enlace in _patron_media().finditer(html or "")]
+
+
+def reemplazar_urls_media(html, nombres):
+    """`html` con los enlaces a los archivos de `nombres` ({nombre: nuevo nombre}) cambiados."""
+    def reemplazar(enlace):
+        nuevo = nombres.get(unquote(enlace.group(2)))
+        return enlace.group(1) + quote(nuevo) if nuevo else enlace.group(0)
+    return _patron_media().sub(reemplazar, html or "")
+
+
+def nombres_en_uso():
+    """Todos los nombres referenciados: campos de archivo y enlaces a MEDIA_URL en CKEditor."""
+    en_uso = set()
+    for modelo, campo in campos_archivo():
+        en_uso.update(modelo._default_manager.exclude(**{campo.name: ""}).exclude(**{f"{campo.name}__isnull": True})
+                      .values_list(campo.name, flat=True).iterator())
+    for modelo, campo in campos_contenido():
+        for html in modelo._default_manager.values_list(campo.name, flat=True).iterator():
+            en_uso.update(urls_media(html))
+    return en_uso
+#endregion
+
+
+# region borrado
+@registrar_tarea(TAREA_BORRADO)
+def borrar_pendientes(payload=None):
+    """Borra los archivos anotados, por lotes. Los que fallan quedan para la próxima vez."""
+    lote = _config("ARCHIVOS_BORRADO_LOTE", 200)
+    borrados = 0
+    ultimo = 0
+    while True:
+        pendientes = list(ArchivoPorBorrar.objects.filter(pk__gt=ultimo).order_by('pk')
+                          .values_list('pk', 'nombre')[:lote])
+        if not pendientes:
+            return borrados
+        ultimo = pendientes[-1][0]
+        en_uso = referenciados([nombre for _, nombre in pendientes])
+        resueltos = []
+        for pk, nombre in pendientes:
+            if nombre not in en_uso:
+                try:
+                    # primero las variantes responsive (blog/variantes.py), después el original
+                    borrar_variantes(nombre, default_storage)
+                    default_storage.delete(nombre)
+                except Exception:
+                    logger.warning("No se pudo borrar %s", nombre, exc_info=True)
+                    continue
+                borrados += 1
+            resueltos.append(pk)
+        ArchivoPorBorrar.objects.filter(pk__in=resueltos).delete()
+
+
+def _listar(directorio=""):
+    carpetas, archivos = default_storage.listdir(directorio)
+    for archivo in archivos:
+        yield posixpath.join(directorio, archivo)
+    for carpeta in carpetas:
+        yield from _listar(posixpath.join(directorio, carpeta))
+
+
+def huerfanos(antiguedad=None):
+    """
+    Archivos de MEDIA_ROOT que nada referencia y no se modificaron en `antiguedad` segundos
+    (un archivo recién subido puede no tener todavía su fila confirmada).
+    Las variantes cuentan como usadas si su original está en uso.
+    """
+    antiguedad = _config("ARCHIVOS_HUERFANOS_ANTIGUEDAD", 60 * 60 * 24) if antiguedad is None else antiguedad
+    limite = timezone.now() - timedelta(seconds=antiguedad)
+    if not default_storage.exists(""):
+        return
+    en_uso = nombres_en_uso()
+    for nombre in _listar():
+        if nombre in en_uso or base_de_variante(nombre) in en_uso:
+            continue
+        if default_storage.get_modified_time(nombre) > limite:
+            continue
+        yield nombre
+
+
+def barrer_huerfanos(antiguedad=None, simular=False):
+    """Anota para borrar los archivos huérfanos. Devuelve sus nombres."""
+    nombres = list(huerfanos(antiguedad))
+    if nombres and not simular:
+        with transaction.atomic():
+            programar_borrado(*nombres)
+    return nombres
+#endregion
@@ -0,0 +1,37 @@
+# blog/management/commands/barrer_archivos.py
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.limpieza import barrer_huerfanos
+
+
+class Command(BaseCommand):
+    help = (
+        "Busca en MEDIA_ROOT los archivos que ninguna fila referencia (campos de archivo y "
+        "contenido de CKEditor) y los anota para que el worker los borre. Pensado para cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--antiguedad',
+            type=int,
+            default=None,
+            help='Ignorar los archivos modificados hace menos de estos segundos '
+                 '(por defecto: ARCHIVOS_HUERFANOS_ANTIGUEDAD, un día).'
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Solo listar los huérfanos, sin anotarlos.'
+        )
+
+    def handle(self, *args, **options):
+        if options['antiguedad'] is not None and options['antiguedad'] < 0:
+            raise CommandError("--antiguedad no puede ser negativa.")
+        nombres = barrer_huerfanos(options['antiguedad'], simular=options['simular'])
+        if options['simular']:
+            for nombre in nombres:
+                self.stdout.write(nombre)
+            self.stdout.write(self.style.SUCCESS(f"Archivos huérfanos: {len(nombres)}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Archivos huérfanos anotados para borrar: {len(nombres)} (los borra procesar_tareas)."))
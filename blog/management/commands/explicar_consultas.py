@@ -0,0 +1,119 @@
+# blog/management/commands/explicar_consultas.py
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from AppPagina.models import Pagina
+from blog.models import Articulo, SubCategoria
+from blog.paginacion import tamanio_pagina
+from blog.views import subcategorias_visibles
+from mainApp.datos_escala import muestra_publica
+
+# Índices de las consultas públicas (migraciones blog 0033/0034 y AppPagina 0015)
+INDICES = [
+    (Articulo, "articulo_creacion_id_idx"),
+    (Articulo, "articulo_cat_tipo_pub_idx"),
+    (Articulo, "articulo_sub_tipo_pub_idx"),
+    (SubCategoria, "subcat_categoria_pub_idx"),
+    (Pagina, "pagina_pub_orden_idx"),
+    (Pagina, "pagina_inicio_idx"),
+]
+
+
+def consultas_publicas(articulo, pagina):
+    """Las consultas de las vistas públicas, con los mismos filtros y orden, para un artículo de muestra."""
+    pagina_articulos = tamanio_pagina() + 1
+    orden = ("-creacion", "-id")
+    publicos = Articulo.objects.filter(
+        tipo_id=pagina.tipo_id, publico=True, categoria__publico=True, categoria__paginas=pagina
+    )
+    return {
+        "listar_articulos": Articulo.objects.filter(publico=True, categoria__publico=True)
+        .order_by(*orden)[:pagina_articulos],
+        "categoria": publicos.filter(categoria_id=articulo.categoria_id).order_by(*orden)[:pagina_articulos],
+        "subcategoria": publicos.filter(subcategoria_id=articulo.subcategoria_id).order_by(*orden)[:pagina_articulos],
+        # vista de categoría: subcategorías públicas (subcat_categoria_pub_idx)
+        "categoria_subcategorias": subcategorias_visibles(articulo.categoria, pagina),
+        "pagina": Pagina.objects.filter(slug=pagina.slug, publico=True),
+        "inicio": Pagina.objects.filter(es_inicio=True),
+        "navegacion": Pagina.objects.filter(publico=True).order_by("orden"),
+    }
+
+
+def explicar(queryset, marca):
+    """
+    EXPLAIN de la consulta. Es QuerySet.explain() con una marca en un comentario SQL:
+    sqlite3 reutiliza el EXPLAIN preparado para el mismo texto aunque se borren
+    índices en el medio, y mostraría el plan viejo.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql} /* {marca} */", params)
+        return "\n".join(" ".join(str(columna) for columna in fila) for fila in cursor.fetchall())
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra el plan (EXPLAIN) y el tiempo de las consultas de las vistas públicas. "
+        "Con --comparar repite la medición sin los índices de los filtros públicos, "
+        "dentro de una transacción que se revierte. Pensado para una base cargada con seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--comparar',
+            action='store_true',
+            help='Medir también sin los índices públicos (requiere una base con DDL transaccional).'
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=20,
+            help='Veces que se ejecuta cada consulta para tomar la mediana (por defecto: 20).'
+        )
+
+    def handle(self, *args, **options):
+        if options['comparar'] and not connection.features.can_rollback_ddl:
+            raise CommandError("--comparar necesita una base que pueda revertir DDL (SQLite o PostgreSQL).")
+
+        muestra = muestra_publica()
+        if not muestra:
+            raise CommandError("No hay artículos públicos con subcategoría, tipo y página: cargá datos con seed.")
+
+        articulo, pagina = muestra
+        self.stdout.write(f"Artículos: {Articulo.objects.count()} — muestra: artículo {articulo.pk}, página {pagina.slug}")
+        self.medir("Con índices", articulo, pagina, options['repeticiones'])
+        if options['comparar']:
+            with self.sin_indices():
+                self.medir("Sin índices", articulo, pagina, options['repeticiones'])
+
+    @contextmanager
+    def sin_indices(self):
+        editor = connection.schema_editor()
+        nombre_sql = connection.ops.quote_name
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for modelo, nombre in INDICES:
+                    cursor.execute(editor.sql_delete_index % {
+                        "name": nombre_sql(nombre), "table": nombre_sql(modelo._meta.db_table),
+                    })
+            try:
+                yield
+            finally:
+                transaction.set_rollback(True)
+
+    def medir(self, titulo, articulo, pagina, repeticiones):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {titulo} =="))
+        for nombre, queryset in consultas_publicas(articulo, pagina).items():
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                list(queryset.all())
+                tiempos.append(time.perf_counter() - inicio)
+            self.stdout.write(self.style.SUCCESS(
+                f"\n{nombre}: mediana {statistics.median(tiempos) * 1000:.2f} ms"
+            ))
+            self.stdout.write(explicar(queryset, titulo))
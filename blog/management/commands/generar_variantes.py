@@ -0,0 +1,19 @@
+# blog/management/commands/generar_variantes.py
+from django.core.management.base import BaseCommand
+
+from blog.limpieza import nombres_en_uso
+from blog.tareas import encolar_variantes_lote
+from blog.variantes import es_imagen
+
+
+class Command(BaseCommand):
+    help = (
+        "Encola las variantes responsive de todas las imágenes en uso (campos de imagen y "
+        "contenido de CKEditor). Las subidas nuevas ya se encolan solas; esto es para las "
+        "anteriores. Las que ya tienen tarea no se repiten."
+    )
+
+    def handle(self, *args, **options):
+        nombres = sorted(nombre for nombre in nombres_en_uso() if es_imagen(nombre))
+        encolar_variantes_lote(nombres)
+        self.stdout.write(self.style.SUCCESS(f"Imágenes: {len(nombres)} (las genera procesar_tareas)."))
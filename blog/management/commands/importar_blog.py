@@ -0,0 +1,66 @@
+# blog/management/commands/importar_blog.py
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.bulk import LOTE, MODELOS, ErrorImportacion, importar, leer
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa tipos, páginas, categorías, subcategorías y artículos desde CSV, JSON o "
+        "JSON Lines con bulk_create por lotes (ver blog/bulk.py). Los archivos se procesan "
+        "en orden de dependencias y todo se revierte si una fila tiene errores."
+    )
+
+    def add_arguments(self, parser):
+        for nombre in MODELOS:
+            parser.add_argument(f'--{nombre}', help=f'Archivo con las filas de {nombre}.')
+        parser.add_argument(
+            '--formato',
+            choices=['csv', 'json', 'jsonl'],
+            help='Formato de los archivos (por defecto: según la extensión; .jsonl/.ndjson son JSON Lines).'
+        )
+        parser.add_argument(
+            '--usuario',
+            default='Dueño',
+            help='Usuario al que se asignan las filas (por defecto: Dueño, el que crea seed).'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=LOTE,
+            help=f'Filas por bulk_create (por defecto: {LOTE}).'
+        )
+
+    def handle(self, *args, **options):
+        archivos = {nombre: options[nombre] for nombre in MODELOS if options[nombre]}
+        if not archivos:
+            raise CommandError(f"Indicá al menos un archivo: {', '.join('--' + n for n in MODELOS)}.")
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser al menos 1.")
+        usuario = get_user_model().objects.filter(username=options['usuario']).first()
+        if usuario is None:
+            raise CommandError(f"No existe el usuario {options['usuario']}.")
+
+        with ExitStack() as pila:
+            try:
+                fuentes = {
+                    nombre: leer(pila.enter_context(open(ruta, encoding="utf-8", newline="")), options['formato'])
+                    for nombre, ruta in archivos.items()
+                }
+            except OSError as exc:
+                raise CommandError(str(exc))
+            try:
+                importador = importar(fuentes, usuario, options['lote'])
+            except ErrorImportacion as exc:
+                raise CommandError(f"No se importó nada. {exc}")
+
+        for nombre, modelo in MODELOS.items():
+            if nombre in archivos:
+                self.stdout.write(
+                    f"{nombre}: {importador.creados[modelo]} creados, "
+                    f"{importador.renombrados[modelo]} renombrados por nombre repetido"
+                )
+        self.stdout.write(self.style.SUCCESS("Importación terminada."))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0030_remove_tipo_publico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articulo',
+            name='estado_miniatura',
+            field=models.CharField(blank=True, choices=[('', 'Sin generar'), ('pendiente', 'Pendiente'), ('lista', 'Lista'), ('fallida', 'Fallida')], default='', editable=False, max_length=10, verbose_name='Estado de la miniatura'),
+        ),
+        migrations.AddField(
+            model_name='subcategoria',
+            name='estado_miniatura',
+            field=models.CharField(blank=True, choices=[('', 'Sin generar'), ('pendiente', 'Pendiente'), ('lista', 'Lista'), ('fallida', 'Fallida')], default='', editable=False, max_length=10, verbose_name='Estado de la miniatura'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0031_articulo_subcategoria_estado_miniatura'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articulo',
+            name='video_optimizado',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to='videos/optimizados/', verbose_name='Video optimizado para web'),
+        ),
+        migrations.AddField(
+            model_name='subcategoria',
+            name='video_optimizado',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to='videos/optimizados/', verbose_name='Video optimizado para web'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0032_articulo_subcategoria_video_optimizado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(fields=['-creacion', '-id'], name='articulo_creacion_id_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0033_articulo_creacion_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(condition=models.Q(('publico', True)), fields=['-creacion', '-id'], name='articulo_pub_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(condition=models.Q(('publico', True)), fields=['categoria', 'tipo', '-creacion', '-id'], name='articulo_cat_tipo_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(condition=models.Q(('publico', True)), fields=['subcategoria', 'tipo', '-creacion', '-id'], name='articulo_sub_tipo_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subcategoria',
+            index=models.Index(condition=models.Q(('publico', True)), fields=['categoria'], name='subcat_categoria_pub_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def renombrar_repetidos(apps, schema_editor):
+    from mainApp.nombres_unicos import renombrar_repetidos
+
+    for modelo, campo in (('Articulo', 'titulo'), ('Categoria', 'nombre'),
+                          ('SubCategoria', 'nombre'), ('Tipo', 'nombre')):
+        renombrar_repetidos(apps.get_model('blog', modelo), campo)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppPagina', '0016_nombres_unicos'),
+        ('blog', '0034_indices_publicos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # los datos cargados sin pasar por save() (loaddata, bulk_create) pueden tener repetidos
+        migrations.RunPython(renombrar_repetidos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='articulo',
+            constraint=models.UniqueConstraint(fields=('titulo',), name='articulo_titulo_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='categoria',
+            constraint=models.UniqueConstraint(fields=('nombre',), name='categoria_nombre_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='subcategoria',
+            constraint=models.UniqueConstraint(fields=('nombre',), name='subcategoria_nombre_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='tipo',
+            constraint=models.UniqueConstraint(fields=('nombre',), name='tipo_nombre_unico'),
+        ),
+    ]
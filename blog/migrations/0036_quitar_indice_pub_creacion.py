@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:44
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0035_nombres_unicos'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='articulo',
+            name='articulo_pub_creacion_idx',
+        ),
+    ]
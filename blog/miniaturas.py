@@ -0,0 +1,97 @@
+# blog/miniaturas.py
+"""
+Elección del cuadro para la miniatura de un video.
+
+En lugar de saltar a una posición fija (CAP_PROP_POS_MSEC obliga a decodificar
+desde el keyframe anterior y muchas veces cae en un cuadro negro), se recorre el
+video en orden durante los primeros segundos:
+  - grab() avanza sin convertir el cuadro; solo se hace retrieve() de las muestras,
+  - cada muestra se puntúa con estadísticas baratas de NumPy (brillo y contraste)
+    sobre una versión submuestreada,
+  - se conserva la mejor y se achica antes de codificarla como JPEG.
+La memoria queda acotada a un par de cuadros sin importar el largo del video.
+"""
+import cv2
+import numpy as np
+
+SEGUNDOS_A_REVISAR = 5
+MUESTRAS = 8
+ANCHO_MAXIMO = 640
+CALIDAD_JPEG = 85
+# Cuadros casi negros o casi blancos (fundidos, placas) se penalizan
+BRILLO_MINIMO = 24
+BRILLO_MAXIMO = 235
+FPS_POR_DEFECTO = 25
+
+
+def _propiedad(cap, propiedad, defecto):
+    try:
+        valor = float(cap.get(propiedad))
+    except (TypeError, ValueError):
+        return defecto
+    return valor if valor > 0 else defecto
+
+
+def puntaje(frame):
+    """Mayor es mejor: el contraste del cuadro, penalizado si es demasiado oscuro o claro."""
+    muestra = np.asarray(frame)[::4, ::4]
+    if muestra.size == 0:
+        return 0.0
+    gris = muestra.mean(axis=2) if muestra.ndim == 3 else muestra
+    brillo = float(gris.mean())
+    contraste = float(gris.std())
+    if brillo < BRILLO_MINIMO or brillo > BRILLO_MAXIMO:
+        return contraste * 0.1
+    return contraste
+
+
+def reducir(frame, ancho_maximo=ANCHO_MAXIMO):
+    """Achica el cuadro a `ancho_maximo` conservando la proporción (nunca lo agranda)."""
+    alto, ancho = frame.shape[:2]
+    if ancho <= ancho_maximo:
+        return frame
+    nuevo_alto = max(int(alto * ancho_maximo / ancho), 1)
+    return cv2.resize(frame, (ancho_maximo, nuevo_alto), interpolation=cv2.INTER_AREA)
+
+
+def elegir_cuadro(video_path, segundos=SEGUNDOS_A_REVISAR, muestras=MUESTRAS):
+    """Mejor cuadro entre `muestras` repartidas en los primeros `segundos`, o None."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = _propiedad(cap, cv2.CAP_PROP_FPS, FPS_POR_DEFECTO)
+        limite = int(fps * segundos)
+        total = _propiedad(cap, cv2.CAP_PROP_FRAME_COUNT, 0)
+        if total:
+            limite = min(limite, int(total))
+        limite = max(limite, 1)
+        paso = max(limite // muestras, 1)
+        # el primer cuadro suele ser negro: muestrear a mitad de cada tramo
+        desfase = paso // 2
+
+        mejor, mejor_puntaje = None, -1.0
+        for indice in range(limite):
+            if not cap.grab():
+                break
+            if indice % paso != desfase:
+                continue
+            ok, frame = cap.retrieve()
+            if not ok or frame is None:
+                continue
+            valor = puntaje(frame)
+            if valor > mejor_puntaje:
+                mejor, mejor_puntaje = frame.copy(), valor
+        return mejor
+    finally:
+        cap.release()
+
+
+def miniatura_jpeg(video_path):
+    """Bytes JPEG de la miniatura del video, o None si no se pudo leer ningún cuadro."""
+    frame = elegir_cuadro(video_path)
+    if frame is None:
+        return None
+    ok, buffer = cv2.imencode('.jpg', reducir(frame), [cv2.IMWRITE_JPEG_QUALITY, CALIDAD_JPEG])
+    if not ok:
+        return None
+    # cv2.imencode devuelve un array de numpy; en los tests puede estar mockeado con bytes
+    return buffer.tobytes() if hasattr(buffer, "tobytes") else buffer
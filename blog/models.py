@@ -9,12 +9,97 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.files import File
 import os
-import cv2
 from django.core.files.base import ContentFile
+from django.db.models.fields.files import FieldFile
 from solo.models import SingletonModel
+from .miniaturas import miniatura_jpeg
+from .limpieza import programar_borrado
+from mainApp.nombres_unicos import FORMATO_NOMBRE, FORMATO_SLUG, guardar_unico, valor_unico
 # Create your models here.
 
-class Layout(SingletonModel):
+# estado de la miniatura generada desde el video (ver blog/tareas.py)
+ESTADOS_MINIATURA = [
+    ("", "Sin generar"),
+    ("pendiente", "Pendiente"),
+    ("lista", "Lista"),
+    ("fallida", "Fallida"),
+]
+
+# region rastreo_cambios
+class CamposCargadosMixin:
+    """
+    Recuerda los valores de `campos_rastreados` con que se leyó la fila (from_db), para
+    que save() y las señales comparen en memoria en vez de volver a leer la fila entera.
+    Los archivos se recuerdan por nombre. Si un campo no se leyó (defer, o una instancia
+    armada a mano con pk), `valores_cargados` consulta solo esos campos.
+    """
+    campos_rastreados = ()
+    # archivos que se borran del storage al quitarlos o reemplazarlos, y los que dependen de ellos
+    archivos_reemplazables = ()
+    archivos_derivados = {}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.recordar_cargados()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.recordar_cargados()
+
+    def _actual(self, attname):
+        valor = getattr(self, attname)
+        if isinstance(valor, FieldFile):
+            return valor.name or ""
+        return valor
+
+    def recordar_cargados(self, campos=None):
+        """Toma los valores actuales como los guardados (de `campos` si es un save con update_fields)."""
+        cargados = getattr(self, '_cargados', {})
+        for attname in self.campos_rastreados:
+            # los diferidos no están en __dict__: leerlos acá sería una consulta
+            if attname not in self.__dict__:
+                continue
+            if campos is None or attname in campos or attname.removesuffix('_id') in campos:
+                cargados[attname] = self._actual(attname)
+        self._cargados = cargados
+
+    def valores_cargados(self, *attnames):
+        """Valores guardados de `attnames`, sin consultar los que se leyeron. {} si la fila no existe."""
+        cargados = getattr(self, '_cargados', {})
+        valores = {attname: cargados[attname] for attname in attnames if attname in cargados}
+        faltantes = [attname for attname in attnames if attname not in cargados]
+        if faltantes:
+            fila = type(self)._default_manager.filter(pk=self.pk).values(*faltantes).first()
+            if fila is None:
+                return {}
+            for attname, valor in fila.items():
+                es_archivo = isinstance(self._meta.get_field(attname), models.FileField)
+                valores[attname] = (valor or "") if es_archivo else valor
+        return valores
+
+    def borrar_archivos_reemplazados(self):
+        """Programa el borrado de los archivos que se quitaron o reemplazaron desde que se leyó la fila."""
+        if not self.pk:
+            return
+        derivados = [derivado for campo in self.archivos_reemplazables
+                     for derivado in self.archivos_derivados.get(campo, ())]
+        anteriores = self.valores_cargados(*self.archivos_reemplazables, *derivados)
+        for campo in self.archivos_reemplazables:
+            anterior = anteriores.get(campo)
+            if anterior and anterior != self._actual(campo):
+                programar_borrado(anterior)
+                # Los derivados también se rastrean (campos_rastreados): el worker los escribe con un
+                # update() condicionado al archivo original, así que si terminó después de leer esta
+                # fila el valor en memoria es viejo y el archivo queda para barrer_archivos.
+                for derivado in self.archivos_derivados.get(campo, ()):
+                    programar_borrado(anteriores.get(derivado))
+                    setattr(self, derivado, None)
+#endregion
+
+
+class Layout(CamposCargadosMixin, SingletonModel):
 
     class Meta:
         verbose_name = " Layout"
@@ -23,18 +108,12 @@ class Layout(SingletonModel):
 
     titulo = models.CharField(max_length=200, default="Mi sitio")
     logo = models.ImageField(upload_to="images/", null=True, blank=True)
+    campos_rastreados = archivos_reemplazables = ('logo',)
     def save(self, *args, **kwargs):
-        if self.pk:
-            old = type(self).objects.filter(pk=self.pk).first()
-            if old:
-                # Si había logo y ahora no → borrar archivo
-                if old.logo and not self.logo:
-                    borrar_fieldfile(old.logo)
-                # Si cambió el archivo → borrar el anterior
-                elif old.logo and self.logo and old.logo.name != self.logo.name:
-                    borrar_fieldfile(old.logo)
-
+        # Si había logo y ahora no, o cambió el archivo → borrar el anterior
+        self.borrar_archivos_reemplazados()
         super().save(*args, **kwargs)
+        self.recordar_cargados(kwargs.get('update_fields'))
     def __str__(self):
         return "Layout"
     
@@ -53,20 +132,23 @@ class Categoria(models.Model):
     class Meta:
         verbose_name = "categoría"
         verbose_name_plural = "categorías"
+        constraints = [
+            models.UniqueConstraint(fields=['nombre'], name='categoria_nombre_unico'),
+        ]
+    def clean(self):
+        super().clean()
+        # un nombre repetido se renombra con sufijo en vez de rechazar el formulario
+        self.nombre = valor_unico(Categoria, 'nombre', self.nombre, self.pk)
     def save(self, *args, **kwargs):
-        counter = 1
-        base_nombre = self.nombre
-        while Categoria.objects.filter(nombre=self.nombre).exclude(pk=self.pk).exists():
-            self.nombre = f"{base_nombre} ({counter})"
-            counter += 1
-        super().save(*args, **kwargs)
+        guardar_unico(self, lambda: super(Categoria, self).save(*args, **kwargs),
+                      {'nombre': (self.nombre, FORMATO_NOMBRE)})
     def __str__(self):
         return self.nombre
 
 
 
 
-class SubCategoria(models.Model): 
+class SubCategoria(CamposCargadosMixin, models.Model): 
     nombre = models.CharField(max_length=100)
     desc = models.CharField(max_length=255,verbose_name='Descripción',blank=True, null=True)
     categoria = models.ForeignKey(
@@ -79,7 +161,12 @@ class SubCategoria(models.Model):
     usar_miniatura = models.BooleanField(default=False,verbose_name="¿Usar miniatura?",help_text="Si marcás esto, indicarás si la miniatura que tenés cargada se verá o no. Si no hay una miniatura cargada, el sistema intentará obtenerla del vídeo después de guardar.")
     video_url = EmbedVideoField(blank=True, null=True,verbose_name="Video (URLS)")
     video_file = models.FileField(upload_to="videos/", blank=True, null=True, verbose_name="Videos (ARCHIVO)")
+    video_optimizado = models.FileField(upload_to="videos/optimizados/", blank=True, null=True, editable=False, verbose_name="Video optimizado para web")
+    estado_miniatura = models.CharField(max_length=10, choices=ESTADOS_MINIATURA, default="", blank=True, editable=False, verbose_name="Estado de la miniatura")
     publico = models.BooleanField(default=True)
+    archivos_reemplazables = ('imagen', 'video_file')
+    archivos_derivados = {'video_file': ('video_optimizado',)}
+    campos_rastreados = archivos_reemplazables + ('video_optimizado',)
     creacion = models.DateTimeField(auto_now_add=True)
     usuario = models.ForeignKey(User, verbose_name="Usuario",editable=False ,on_delete=models.CASCADE,null=True)
     
@@ -88,47 +175,37 @@ class SubCategoria(models.Model):
     class Meta:
         verbose_name = "Subcategoría"
         verbose_name_plural = "Subcategorías"
+        indexes = [
+            # subcategorías públicas de una categoría (vista de categoría)
+            models.Index(fields=['categoria'], condition=models.Q(publico=True), name='subcat_categoria_pub_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['nombre'], name='subcategoria_nombre_unico'),
+        ]
 
     def save(self, *args, **kwargs):
-        counter = 1
-        base_nombre = self.nombre
-        while SubCategoria.objects.filter(nombre=self.nombre).exclude(pk=self.pk).exists():
-            self.nombre = f"{base_nombre} ({counter})"
-            counter += 1
+        unicos = {'nombre': (self.nombre, FORMATO_NOMBRE)}
         if not self.slug:
-            base_slug = slugify(self.nombre)
-            slug = base_slug
-            counter = 1
-            while SubCategoria.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-        if self.pk:
-            old = type(self).objects.filter(pk=self.pk).first()
-            if old:
-                
-                if getattr(old, 'imagen', None) and not getattr(self, 'imagen', None):
-                    borrar_fieldfile(old.imagen)
-                
-                elif getattr(old, 'imagen', None) and getattr(self, 'imagen', None) and old.imagen.name != self.imagen.name:
-                    borrar_fieldfile(old.imagen)
-
-                
-                if getattr(old, 'video_file', None) and not getattr(self, 'video_file', None):
-                    borrar_fieldfile(old.video_file)
-                elif getattr(old, 'video_file', None) and getattr(self, 'video_file', None) and old.video_file.name != self.video_file.name:
-                    borrar_fieldfile(old.video_file)
-
-        super().save(*args, **kwargs)
+            unicos['slug'] = (lambda: slugify(self.nombre), FORMATO_SLUG)
+        # imagen o video quitados/reemplazados; con el video se va también su versión optimizada
+        self.borrar_archivos_reemplazados()
+        guardar_unico(self, lambda: super(SubCategoria, self).save(*args, **kwargs), unicos)
+        self.recordar_cargados(kwargs.get('update_fields'))
     
     def clean(self):
         super().clean()
         
         if self.video_url and self.video_file:
             raise ValidationError("Solo se permite 1 tipo de video: URL o ARCHIVO.")
+        self.nombre = valor_unico(SubCategoria, 'nombre', self.nombre, self.pk)
     def __str__(self):
         return self.nombre
 
+    @property
+    def video_archivo(self):
+        """El video a reproducir: la versión optimizada si ya existe, si no el original."""
+        return self.video_optimizado or self.video_file
+
 
 
 class Tipo(models.Model):
@@ -140,33 +217,30 @@ class Tipo(models.Model):
     class Meta:
         verbose_name = "Tipo"
         verbose_name_plural = "Tipos"
+        constraints = [
+            models.UniqueConstraint(fields=['nombre'], name='tipo_nombre_unico'),
+        ]
+    def clean(self):
+        super().clean()
+        self.nombre = valor_unico(Tipo, 'nombre', self.nombre, self.pk)
     def save(self, *args, **kwargs):
-        counter = 1
-        base_nombre = self.nombre
-        while Tipo.objects.filter(nombre=self.nombre).exclude(pk=self.pk).exists():
-            self.nombre = f"{base_nombre} ({counter})"
-            counter += 1
-
+        unicos = {'nombre': (self.nombre, FORMATO_NOMBRE)}
         if not self.slug:
-            base_slug = slugify(self.nombre)
-            slug = base_slug
-            counter = 1
-            while Tipo.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+            unicos['slug'] = (lambda: slugify(self.nombre), FORMATO_SLUG)
+        guardar_unico(self, lambda: super(Tipo, self).save(*args, **kwargs), unicos)
     def __str__(self):
         return f"{self.nombre}"
 
 
-class Articulo(models.Model):
+class Articulo(CamposCargadosMixin, models.Model):
     titulo = models.CharField(max_length=100,verbose_name='Título')
     contenido = CKEditor5Field('Contenido', config_name='default')
     imagen = models.ImageField(verbose_name="Miniatura", upload_to="thumbnails/", blank=True, null="True")
     usar_miniatura = models.BooleanField(default=False,verbose_name="¿Usar miniatura?", help_text="Si marcás esto, indicarás si la miniatura que tenés cargada se verá o no. Si no hay una miniatura cargada, el sistema intentará obtenerla del vídeo después de guardar.")
     video_url = EmbedVideoField(blank=True, null=True,verbose_name="Video (URLS)")
     video_file = models.FileField(upload_to="videos/", blank=True, null=True, verbose_name="Videos (ARCHIVO)")
+    video_optimizado = models.FileField(upload_to="videos/optimizados/", blank=True, null=True, editable=False, verbose_name="Video optimizado para web")
+    estado_miniatura = models.CharField(max_length=10, choices=ESTADOS_MINIATURA, default="", blank=True, editable=False, verbose_name="Estado de la miniatura")
     publico = models.BooleanField(verbose_name="Publicado")
     usuario = models.ForeignKey(User, verbose_name="Usuario",editable=False ,on_delete=models.CASCADE)
     categoria = models.ForeignKey(Categoria, verbose_name="Categorias", null=True, blank=True,on_delete=models.CASCADE)
@@ -174,6 +248,11 @@ class Articulo(models.Model):
     tipo = models.ForeignKey(Tipo, on_delete=models.CASCADE, related_name='articulos', null=True, blank=True)
     creacion = models.DateTimeField(auto_now_add=True , verbose_name="creación")
     ultima_modificacion = models.DateTimeField(auto_now=True,verbose_name="ultima modificación" )
+    archivos_reemplazables = ('imagen', 'video_file')
+    archivos_derivados = {'video_file': ('video_optimizado',)}
+    # la ubicación anterior la usa la señal que purga la caché de los listados; el contenido,
+    # la que borra las imágenes que se quitaron del texto (blog/signals.py)
+    campos_rastreados = archivos_reemplazables + ('video_optimizado', 'categoria_id', 'subcategoria_id', 'contenido')
     
     
     descripcion_modelo = """Los artículos son visibles dentro de una categoría y una subcategoría. Dependiendo del tipo, se mostrarán en una u otra página."""
@@ -181,29 +260,27 @@ class Articulo(models.Model):
         verbose_name = "Artículo"
         verbose_name_plural = "Artículos"
         ordering = ['-creacion']
+        indexes = [
+            # paginación por cursor de los listados (blog/paginacion.py), públicos o no
+            models.Index(fields=['-creacion', '-id'], name='articulo_creacion_id_idx'),
+            # Listados públicos por categoría/subcategoría: solo indexan los artículos publicados
+            # (índices parciales) y ya vienen en el orden del cursor, así que una página se lee
+            # sin ordenar. Bases sin índices parciales (MySQL) los omiten.
+            models.Index(fields=['categoria', 'tipo', '-creacion', '-id'], condition=models.Q(publico=True),
+                         name='articulo_cat_tipo_pub_idx'),
+            # vista de subcategoría
+            models.Index(fields=['subcategoria', 'tipo', '-creacion', '-id'], condition=models.Q(publico=True),
+                         name='articulo_sub_tipo_pub_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['titulo'], name='articulo_titulo_unico'),
+        ]
     
     def save(self, *args, **kwargs):
-        counter = 1
-        base_titulo = self.titulo
-        while Articulo.objects.filter(titulo=self.titulo).exclude(pk=self.pk).exists():
-            self.titulo = f"{base_titulo} ({counter})"
-            counter += 1
-        if self.pk:
-            old = type(self).objects.filter(pk=self.pk).first()
-            if old:
-                
-                if getattr(old, 'imagen', None) and not getattr(self, 'imagen', None):
-                    borrar_fieldfile(old.imagen)
-                elif getattr(old, 'imagen', None) and getattr(self, 'imagen', None) and old.imagen.name != self.imagen.name:
-                    borrar_fieldfile(old.imagen)
-
-                
-                if getattr(old, 'video_file', None) and not getattr(self, 'video_file', None):
-                    borrar_fieldfile(old.video_file)
-                elif getattr(old, 'video_file', None) and getattr(self, 'video_file', None) and old.video_file.name != self.video_file.name:
-                    borrar_fieldfile(old.video_file)
-
-        super().save(*args, **kwargs)
+        self.borrar_archivos_reemplazados()
+        guardar_unico(self, lambda: super(Articulo, self).save(*args, **kwargs),
+                      {'titulo': (self.titulo, FORMATO_NOMBRE)})
+        self.recordar_cargados(kwargs.get('update_fields'))
     
     def __str__(self):     
         
@@ -213,68 +290,88 @@ class Articulo(models.Model):
         
         if self.video_url and self.video_file:
             raise ValidationError("Solo se permite 1 tipo de video: URL o ARCHIVO.")
+        self.titulo = valor_unico(Articulo, 'titulo', self.titulo, self.pk)
+
+    @property
+    def video_archivo(self):
+        """El video a reproducir: la versión optimizada si ya existe, si no el original."""
+        return self.video_optimizado or self.video_file
+
+
 # region fun_miniatura_video
+def con_modificacion(instance, campos):
+    """
+    `campos` para save(update_fields=...) más `ultima_modificacion` si el modelo la tiene:
+    auto_now solo se actualiza si está en update_fields, y el ETag del artículo sale de ahí.
+    """
+    if any(campo.name == "ultima_modificacion" for campo in instance._meta.fields):
+        return [*campos, "ultima_modificacion"]
+    return campos
+
+
 def crear_miniatura_video(instance):
-    video_path = instance.video_file.path  
-    cap = cv2.VideoCapture(video_path)
-    cap.set(cv2.CAP_PROP_POS_MSEC, 1000)
-    ret, frame = cap.read()
-    cap.release()
-
-    if ret:
-        _, buffer = cv2.imencode('.jpg', frame)
-        # cv2.imencode usually returns a numpy array which has .tobytes(),
-        # but in tests we may mock it to return plain bytes. Handle both.
-        if hasattr(buffer, "tobytes"):
-            data = buffer.tobytes()
-        else:
-            data = buffer
+    """Extrae un cuadro del video y lo guarda como miniatura. Lo ejecuta el worker de tareas."""
+    video_path = instance.video_file.path
+    # ver blog/miniaturas.py: muestreo secuencial de los primeros segundos y el mejor cuadro
+    data = miniatura_jpeg(video_path)
 
+    if data:
         instance.imagen.save(
             f"{instance.pk}_thumb.jpg",
             ContentFile(data),
             save=False
         )
-        instance.save(update_fields=["imagen"])
+        instance.estado_miniatura = "lista"
+        instance.save(update_fields=con_modificacion(instance, ["imagen", "estado_miniatura"]))
+    else:
+        # la tarea se reintenta (p. ej. el archivo todavía se estaba copiando)
+        raise ValueError(f"No se pudo leer un cuadro de {video_path}")
 
+# La decodificación del video no bloquea el guardado: se encola y la hace `procesar_tareas`
 @receiver(post_save, sender=Articulo)
 def generar_miniatura_video_articulo(sender, instance, created, **kwargs):
     if instance.usar_miniatura and instance.video_file and not instance.imagen:
-        crear_miniatura_video(instance)
+        from .tareas import encolar_miniatura
+        encolar_miniatura(instance)
 
 
 @receiver(post_save, sender=SubCategoria)
 def generar_miniatura_video_subcategoria(sender, instance, created, **kwargs):
     if instance.usar_miniatura and instance.video_file and not instance.imagen:
-        crear_miniatura_video(instance)   
+        from .tareas import encolar_miniatura
+        encolar_miniatura(instance)
+#endregion
+
+# region fun_video_optimizado
+# Remux "fast start" (y recodificación opcional) en el worker: ver blog/video.py
+@receiver(post_save, sender=Articulo)
+@receiver(post_save, sender=SubCategoria)
+def optimizar_video_subido(sender, instance, raw=False, **kwargs):
+    if not raw and instance.video_file and not instance.video_optimizado:
+        from .tareas import encolar_optimizacion_video
+        encolar_optimizacion_video(instance)
 #endregion
 
 # region fun_borrar_imagenes
 
 
-def borrar_fieldfile(fieldfile):
+def borrar_fieldfile(*fieldfiles):
     """
-    Borra un FieldFile (ImageField/FileField) de forma segura.
-    delete(save=False) usa el storage configurado (funciona con S3, GCS, local, etc).
+    Programa el borrado de los FieldFile (ImageField/FileField) y sus variantes.
+    El worker los borra después del commit (ver blog/limpieza.py): si la transacción
+    se revierte, los archivos quedan.
     """
-    try:
-        if fieldfile and getattr(fieldfile, "name", None):
-            fieldfile.delete(save=False)
-    except Exception:
-        # no romper el flujo por un fallo al borrar; opcional: loggear aquí
-        pass
+    programar_borrado(*(getattr(fieldfile, "name", None) for fieldfile in fieldfiles if fieldfile))
 
 @receiver(post_delete, sender=Articulo)
 def borrar_archivos_articulo_al_eliminar(sender, instance, **kwargs):
-    borrar_fieldfile(getattr(instance, 'imagen', None))
-    borrar_fieldfile(getattr(instance, 'video_file', None))
+    borrar_fieldfile(instance.imagen, instance.video_file, instance.video_optimizado)
 
 @receiver(post_delete, sender=SubCategoria)
 def borrar_archivos_subcategoria_al_eliminar(sender, instance, **kwargs):
-    borrar_fieldfile(getattr(instance, 'imagen', None))
-    borrar_fieldfile(getattr(instance, 'video_file', None))
+    borrar_fieldfile(instance.imagen, instance.video_file, instance.video_optimizado)
 
 @receiver(post_delete, sender=Layout)
 def borrar_logo_layout_al_eliminar(sender, instance, **kwargs):
-    borrar_fieldfile(getattr(instance, 'logo', None))
+    borrar_fieldfile(instance.logo)
 #endregion
\ No newline at end of file
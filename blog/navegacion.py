@@ -0,0 +1,112 @@
+# blog/navegacion.py
+"""
+Snapshot de la navegación del sitio (páginas, categorías, subcategorías y layout).
+
+Los context processors de AppPagina y blog leen de este snapshot en lugar de
+consultar la base de datos en cada request. El snapshot se guarda en la caché
+bajo una clave versionada; las señales de `blog.signals` cambian la versión
+cuando se modifica alguno de los modelos que lo componen.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+CLAVE_VERSION = "navegacion:version"
+CLAVE_SNAPSHOT = "navegacion:snapshot:{version}"
+
+
+def timeout_navegacion():
+    return getattr(settings, "NAVEGACION_CACHE_TIMEOUT", 60 * 60)
+
+
+def version_actual():
+    """Versión vigente de la navegación (milisegundos de la última invalidación)."""
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, int(time.time() * 1000), None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def _incrementar_version():
+    anterior = cache.get(CLAVE_VERSION) or 0
+    cache.set(CLAVE_VERSION, max(int(time.time() * 1000), anterior + 1), None)
+
+
+def invalidar_navegacion():
+    """
+    Descarta el snapshot vigente.
+    Se incrementa la versión ahora (para que la misma transacción ya vea los cambios)
+    y otra vez al confirmar, por si otro request reconstruyó el snapshot antes del commit.
+    """
+    _incrementar_version()
+    transaction.on_commit(_incrementar_version)
+
+
+def construir_navegacion():
+    """Consulta la base de datos y arma el snapshot (solo tipos simples y el FieldFile del logo)."""
+    from AppPagina.models import Pagina
+    from .models import SubCategoria, Layout
+
+    # Solo columnas chicas: el cuerpo de la página nunca se carga para la navegación
+    paginas = list(Pagina.objects.filter(publico=True).order_by('orden').values_list(
+        'id', 'titulo', 'slug', 'tipo__nombre', 'tiene_contenido'
+    ))
+
+    menu = construir_menu()
+    subcategorias = list(SubCategoria.objects.filter(publico=True).values_list(
+        'id', 'nombre', 'slug'))
+
+    layout = Layout.get_solo()
+    return {
+        'paginas': paginas,
+        'menu': menu,
+        'subcategorias': subcategorias,
+        'titulo': layout.titulo,
+        'logo': layout.logo,
+    }
+
+
+def construir_menu():
+    """
+    Agrupa las categorías públicas por página: {pagina_id: [(categoria_id, nombre), ...]}.
+    Con esto la plantilla hace una sola búsqueda por página en lugar de recorrer
+    todas las categorías para cada una.
+    """
+    from .models import Categoria
+
+    menu = {}
+    filas = Categoria.objects.filter(publico=True, paginas__isnull=False).order_by('id').values_list(
+        'paginas__id', 'id', 'nombre')
+    for pagina_id, categoria_id, nombre in filas:
+        menu.setdefault(pagina_id, []).append((categoria_id, nombre))
+    return menu
+
+
+def obtener_navegacion(request=None):
+    """
+    Devuelve el snapshot vigente, construyéndolo si no está en la caché.
+    Si se pasa el request, el resultado se guarda en él para que los demás
+    context processors del mismo render no vuelvan a consultar la caché.
+    """
+    if request is not None:
+        snapshot = getattr(request, "_navegacion", None)
+        if snapshot is not None:
+            return snapshot
+
+    version = version_actual()
+    clave = CLAVE_SNAPSHOT.format(version=version)
+    snapshot = cache.get(clave)
+    if snapshot is None:
+        snapshot = construir_navegacion()
+        snapshot['version'] = version
+        # Si la versión cambió mientras se armaba (p. ej. get_solo() creó el Layout),
+        # el snapshot puede estar desactualizado: se usa pero no se guarda.
+        if version_actual() == version:
+            cache.set(clave, snapshot, timeout_navegacion())
+
+    if request is not None:
+        request._navegacion = snapshot
+    return snapshot
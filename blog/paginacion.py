@@ -0,0 +1,51 @@
+# blog/paginacion.py
+"""
+Paginación por cursor (keyset) para listados ordenados por (-creacion, -id).
+
+A diferencia de OFFSET, la página N cuesta lo mismo que la primera (el índice
+articulo_creacion_id_idx se recorre desde el cursor) y no se saltean ni repiten
+filas si se publican artículos mientras alguien navega. El cursor es opaco para
+el usuario: "<microsegundos de creacion>-<id>" del último artículo mostrado.
+"""
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db.models import Q
+
+
+def tamanio_pagina():
+    return getattr(settings, "ARTICULOS_POR_PAGINA", 20)
+
+
+def codificar_cursor(articulo):
+    creacion = articulo.creacion.astimezone(timezone.utc)
+    microsegundos = int(creacion.timestamp()) * 1_000_000 + creacion.microsecond
+    return f"{microsegundos}-{articulo.pk}"
+
+
+def decodificar_cursor(cursor):
+    """(creacion, id) del cursor, o None si no es válido."""
+    try:
+        microsegundos, pk = (int(parte) for parte in cursor.split("-"))
+        creacion = datetime.fromtimestamp(microsegundos // 1_000_000, tz=timezone.utc)
+        return creacion.replace(microsecond=microsegundos % 1_000_000), pk
+    except (AttributeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def pagina_por_cursor(queryset, cursor=None, tamanio=None):
+    """
+    Devuelve (artículos, cursor_siguiente). cursor_siguiente es None en la última página.
+    Un cursor inválido se trata como la primera página.
+    """
+    tamanio = tamanio or tamanio_pagina()
+    queryset = queryset.order_by("-creacion", "-id")
+    posicion = decodificar_cursor(cursor) if cursor else None
+    if posicion:
+        creacion, pk = posicion
+        queryset = queryset.filter(Q(creacion__lt=creacion) | Q(creacion=creacion, id__lt=pk))
+
+    # uno de más para saber si hay página siguiente sin hacer un COUNT
+    filas = list(queryset[:tamanio + 1])
+    siguiente = codificar_cursor(filas[tamanio - 1]) if len(filas) > tamanio else None
+    return filas[:tamanio], siguiente
@@ -1,11 +1,8 @@
-from .models import Categoria
+from .navegacion import obtener_navegacion
 
 def C_obtener_paginas(request):
-    categorias = Categoria.objects.filter(publico=True).values_list(
-    'id', 'nombre', 'paginas__titulo')
-
-    
+    navegacion = obtener_navegacion(request)
 
     return{
-        'V_categorias':categorias,
-    }
\ No newline at end of file
+        'V_menu':navegacion['menu'],
+    }
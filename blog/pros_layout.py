@@ -1,5 +1,7 @@
-from blog.models import Layout
+from .navegacion import obtener_navegacion, timeout_navegacion
 
 def layout(request):
-    layout=Layout.get_solo()
-    return {"V_titulo":layout.titulo,"V_logo":layout.logo}
\ No newline at end of file
+    navegacion = obtener_navegacion(request)
+    # V_nav_version / V_nav_timeout: clave y duración del fragmento cacheado del menú en layout.html
+    return {"V_titulo":navegacion['titulo'],"V_logo":navegacion['logo'],
+            "V_nav_version":navegacion['version'],"V_nav_timeout":timeout_navegacion()}
@@ -1,11 +1,8 @@
-from .models import SubCategoria
+from .navegacion import obtener_navegacion
 
 def SC_obtener_paginas(request):
-    subcategorias = SubCategoria.objects.filter(publico=True).values_list(
-    'id', 'nombre','slug',)
-
-    
+    subcategorias = obtener_navegacion(request)['subcategorias']
 
     return{
         'V_subcategorias':subcategorias,
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,140 @@
+# blog/signals.py
+from django.db.models.signals import pre_save, pre_delete, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.urls import NoReverseMatch, reverse
+from django_ckeditor_5 import signals as ckeditor_signals
+from django_ckeditor_5.fields import CKEditor5Field
+
+from AppPagina.models import Pagina
+from mainApp import cache_publico
+from .models import Articulo, Categoria, SubCategoria, Tipo, Layout
+from .limpieza import programar_borrado, urls_media
+from .navegacion import invalidar_navegacion
+from .tareas import encolar_variantes
+from .variantes import es_imagen
+
+
+# region navegacion
+@receiver(post_save, sender=Pagina)
+@receiver(post_delete, sender=Pagina)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_save, sender=SubCategoria)
+@receiver(post_delete, sender=SubCategoria)
+@receiver(post_save, sender=Tipo)
+@receiver(post_delete, sender=Tipo)
+@receiver(post_save, sender=Layout)
+@receiver(post_delete, sender=Layout)
+@receiver(m2m_changed, sender=Categoria.paginas.through)
+def invalidar_navegacion_al_cambiar(sender, **kwargs):
+    """Cualquier cambio en los modelos que forman la barra de navegación descarta el snapshot."""
+    invalidar_navegacion()
+#endregion
+
+
+# region cache_publico
+def rutas_articulo(articulo_id, categoria_id, subcategoria_id):
+    """Rutas públicas donde aparece un artículo: su detalle y los listados que lo incluyen."""
+    rutas = [reverse("N_articulos")]
+    if not categoria_id:
+        return rutas
+
+    slugs = Pagina.objects.filter(categorias__id=categoria_id).values_list('slug', flat=True)
+    sub_slug = None
+    if subcategoria_id:
+        sub_slug = SubCategoria.objects.filter(pk=subcategoria_id).values_list('slug', flat=True).first()
+    for slug in slugs:
+        try:
+            rutas.append(reverse("N_articulo", args=[slug, articulo_id]))
+            rutas.append(reverse("N_categoria", args=[slug, categoria_id]))
+            if sub_slug:
+                rutas.append(reverse("N_subcategoria", args=[slug, sub_slug]))
+        except NoReverseMatch:
+            # la página de inicio (slug vacío) no tiene rutas de detalle
+            continue
+    return rutas
+
+
+@receiver(pre_save, sender=Articulo)
+def recordar_ubicacion_articulo(sender, instance, raw, **kwargs):
+    # Si el artículo cambia de categoría/subcategoría hay que purgar también los listados anteriores
+    instance._ubicacion_previa = None
+    if instance.pk and not raw:
+        # la recordada al leer el artículo (blog.models.CamposCargadosMixin): sin consulta
+        previa = instance.valores_cargados('categoria_id', 'subcategoria_id')
+        if previa:
+            instance._ubicacion_previa = (previa['categoria_id'], previa['subcategoria_id'])
+
+
+@receiver(post_save, sender=Articulo)
+@receiver(post_delete, sender=Articulo)
+def purgar_cache_articulo(sender, instance, **kwargs):
+    rutas = rutas_articulo(instance.pk, instance.categoria_id, instance.subcategoria_id)
+    previa = getattr(instance, '_ubicacion_previa', None)
+    if previa and previa != (instance.categoria_id, instance.subcategoria_id):
+        rutas += rutas_articulo(instance.pk, *previa)
+    cache_publico.purgar(*rutas)
+
+
+@receiver(post_save, sender=Pagina)
+@receiver(post_delete, sender=Pagina)
+def purgar_cache_pagina(sender, instance, **kwargs):
+    # Los cambios de menú ya invalidan todo el sitio por la versión de la navegación;
+    # esto cubre el contenido propio de la página.
+    rutas = [reverse("N_inicio")] if instance.es_inicio or not instance.slug else []
+    if instance.slug:
+        rutas.append(reverse("N_pagina", args=[instance.slug]))
+    cache_publico.purgar(*rutas)
+#endregion
+
+
+# region variantes
+@receiver(post_save, sender=Articulo)
+@receiver(post_save, sender=SubCategoria)
+def encolar_variantes_imagen(sender, instance, raw=False, **kwargs):
+    # Las variantes se generan en el worker; encolar es idempotente por nombre de archivo
+    if not raw and es_imagen(instance.imagen.name if instance.imagen else ""):
+        encolar_variantes(instance.imagen.name)
+
+
+@receiver(post_save, sender=Layout)
+def encolar_variantes_logo(sender, instance, raw=False, **kwargs):
+    if not raw and es_imagen(instance.logo.name if instance.logo else ""):
+        encolar_variantes(instance.logo.name)
+#endregion
+
+
+# region imagenes_ckeditor
+# django_ckeditor_5 borra del storage, dentro del save o el delete, las imágenes que se
+# quitaron del texto, y en cada save relee la fila entera para saberlo. Acá se compara con
+# el contenido recordado al leer el artículo (los demás modelos, como Pagina, leen solo las
+# columnas del editor) y los archivos se anotan con programar_borrado: el worker los borra
+# después del commit si ninguna otra fila los usa (blog/limpieza.py).
+pre_save.disconnect(ckeditor_signals.cleanup_unused_ckeditor_images_on_update)
+pre_delete.disconnect(ckeditor_signals.cleanup_ckeditor_images_on_delete)
+
+
+def _campos_contenido(instance):
+    return [f.attname for f in instance._meta.fields if isinstance(f, CKEditor5Field)]
+
+
+@receiver(pre_save)
+def borrar_imagenes_quitadas_del_contenido(sender, instance, **kwargs):
+    campos = _campos_contenido(instance)
+    if not campos or not instance.pk:
+        return
+    if hasattr(instance, 'valores_cargados'):
+        anteriores = instance.valores_cargados(*campos)
+    else:
+        anteriores = sender._default_manager.filter(pk=instance.pk).values(*campos).first() or {}
+    quitadas = set()
+    for campo in campos:
+        quitadas |= set(urls_media(anteriores.get(campo))) - set(urls_media(getattr(instance, campo)))
+    programar_borrado(*quitadas)
+
+
+@receiver(post_delete)
+def borrar_imagenes_del_contenido(sender, instance, **kwargs):
+    programar_borrado(*(nombre for campo in _campos_contenido(instance)
+                        for nombre in urls_media(getattr(instance, campo))))
+#endregion
@@ -0,0 +1,179 @@
+# blog/tareas.py
+"""Tareas en segundo plano del blog (se ejecutan con `manage.py procesar_tareas`)."""
+import logging
+
+from django.apps import apps
+from PIL import UnidentifiedImageError
+
+from mantenimiento.models import Tarea
+from mantenimiento.tareas import encolar, encolar_lote, registrar_tarea
+
+logger = logging.getLogger(__name__)
+
+TAREA_MINIATURA = "blog.miniatura_video"
+TAREA_VARIANTES = "blog.variantes_imagen"
+TAREA_VIDEO = "blog.optimizar_video"
+
+MINIATURA_PENDIENTE = "pendiente"
+MINIATURA_LISTA = "lista"
+MINIATURA_FALLIDA = "fallida"
+
+
+def _tarea_video(prefijo, instance):
+    """(clave, payload) de una tarea sobre el video de un Articulo/SubCategoria."""
+    modelo = instance._meta.label_lower
+    video = instance.video_file.name
+    return f"{prefijo}:{modelo}:{instance.pk}:{video}", {'modelo': modelo, 'pk': instance.pk, 'video': video}
+
+
+def encolar_miniatura(instance):
+    """
+    Encola la miniatura del video de un Articulo/SubCategoria.
+    La clave incluye el nombre del archivo: guardar de nuevo el mismo video no repite el trabajo.
+    """
+    clave, payload = _tarea_video("miniatura", instance)
+    _, creada = encolar(
+        TAREA_MINIATURA,
+        clave=clave,
+        payload=payload,
+        # si ya se hizo pero la miniatura se quitó, volver a generarla
+        repetir=True,
+    )
+    if creada:
+        type(instance).objects.filter(pk=instance.pk).update(estado_miniatura=MINIATURA_PENDIENTE)
+        instance.estado_miniatura = MINIATURA_PENDIENTE
+
+
+def _marcar_fallida(payload, exc):
+    Modelo = apps.get_model(payload['modelo'])
+    Modelo.objects.filter(pk=payload['pk'], video_file=payload['video']).update(
+        estado_miniatura=MINIATURA_FALLIDA)
+
+
+@registrar_tarea(TAREA_MINIATURA, al_fallar=_marcar_fallida)
+def generar_miniatura_video(payload):
+    from .models import crear_miniatura_video
+
+    Modelo = apps.get_model(payload['modelo'])
+    instance = Modelo.objects.filter(pk=payload['pk']).first()
+    # borrado o con otro video: la tarea del video nuevo (si hay) se encarga
+    if instance is None or instance.video_file.name != payload['video']:
+        return
+    if instance.imagen or not instance.usar_miniatura:
+        Modelo.objects.filter(pk=instance.pk).update(estado_miniatura="")
+        return
+    crear_miniatura_video(instance)
+
+
+def _clave_variantes(nombre):
+    return f"variantes:{nombre}"
+
+
+def encolar_variantes(nombre):
+    """Encola las variantes responsive de una imagen del storage (ver blog/variantes.py)."""
+    encolar(TAREA_VARIANTES, clave=_clave_variantes(nombre), payload={'nombre': nombre})
+
+
+def encolar_variantes_lote(nombres):
+    """`encolar_variantes` para muchas imágenes en un solo INSERT."""
+    return encolar_lote(TAREA_VARIANTES, ((_clave_variantes(nombre), {'nombre': nombre}) for nombre in nombres))
+
+
+def olvidar_variantes(nombre):
+    """Al borrar la imagen: si se sube otra con el mismo nombre, sus variantes se vuelven a generar."""
+    Tarea.objects.filter(clave=_clave_variantes(nombre)).delete()
+
+
+@registrar_tarea(TAREA_VARIANTES)
+def generar_variantes_imagen(payload):
+    from django.core.files.storage import default_storage
+    from .variantes import generar_variantes
+
+    # si la imagen se borró antes de procesar la tarea no hay nada que hacer
+    if not default_storage.exists(payload['nombre']):
+        return
+    try:
+        generar_variantes(payload['nombre'])
+    except UnidentifiedImageError:
+        # no es una imagen válida: reintentar no cambia nada
+        logger.warning("No se generan variantes de %s: no es una imagen válida", payload['nombre'])
+
+
+def encolar_optimizacion_video(instance):
+    """Encola la versión fast start del video subido (clave: modelo, pk y nombre del archivo)."""
+    clave, payload = _tarea_video("video", instance)
+    encolar(TAREA_VIDEO, clave=clave, payload=payload)
+
+
+def encolar_medios(instancias):
+    """
+    Las tareas que encolan las señales post_save (variantes, miniatura del video, video
+    fast start) para filas creadas con bulk_create, con un INSERT por tipo de tarea.
+    Las filas, todas del mismo modelo, ya tienen que tener pk; las que esperan miniatura
+    se marcan como pendientes.
+    """
+    from .variantes import es_imagen
+
+    if not instancias:
+        return
+    Modelo = type(instancias[0])
+    variantes, miniaturas, videos = {}, [], []
+    for instance in instancias:
+        if instance.imagen and es_imagen(instance.imagen.name):
+            variantes[_clave_variantes(instance.imagen.name)] = {'nombre': instance.imagen.name}
+        if instance.video_file:
+            videos.append(_tarea_video("video", instance))
+            if instance.usar_miniatura and not instance.imagen:
+                miniaturas.append(_tarea_video("miniatura", instance))
+                instance.estado_miniatura = MINIATURA_PENDIENTE
+    if miniaturas:
+        Modelo.objects.filter(pk__in=[payload['pk'] for _, payload in miniaturas]).update(
+            estado_miniatura=MINIATURA_PENDIENTE)
+    encolar_lote(TAREA_VARIANTES, variantes.items())
+    encolar_lote(TAREA_MINIATURA, miniaturas)
+    encolar_lote(TAREA_VIDEO, videos)
+
+
+@registrar_tarea(TAREA_VIDEO)
+def optimizar_video_subido(payload):
+    import os
+    import tempfile
+
+    from django.core.files import File
+    from django.db.models.signals import post_save
+    from django.utils import timezone
+    from .limpieza import programar_borrado
+    from .models import con_modificacion
+    from .video import optimizar_video
+
+    Modelo = apps.get_model(payload['modelo'])
+    instance = Modelo.objects.filter(pk=payload['pk']).first()
+    if instance is None or instance.video_file.name != payload['video'] or instance.video_optimizado:
+        return
+
+    descriptor, temporal = tempfile.mkstemp(suffix=".mp4")
+    os.close(descriptor)
+    try:
+        if not optimizar_video(instance.video_file.path, temporal):
+            # ya era fast start o no es un MP4: se sirve el original
+            return
+        campo = Modelo._meta.get_field("video_optimizado")
+        base = os.path.splitext(os.path.basename(instance.video_file.name))[0]
+        with open(temporal, "rb") as archivo:
+            nombre = campo.storage.save(campo.generate_filename(instance, f"{base}.mp4"), File(archivo))
+    finally:
+        os.remove(temporal)
+
+    # el remux tarda: si mientras tanto se cambió el video, esta versión ya no le corresponde
+    cambios = {"video_optimizado": nombre}
+    campos = con_modificacion(instance, ["video_optimizado"])
+    if "ultima_modificacion" in campos:
+        cambios["ultima_modificacion"] = timezone.now()
+    if not Modelo.objects.filter(pk=instance.pk, video_file=payload['video']).update(**cambios):
+        programar_borrado(nombre)
+        return
+    for nombre_campo, valor in cambios.items():
+        setattr(instance, nombre_campo, valor)
+    # lo que haría save(): purgar la caché pública e invalidar la navegación
+    post_save.send(sender=Modelo, instance=instance, created=False, update_fields=frozenset(campos),
+                   raw=False, using=instance._state.db)
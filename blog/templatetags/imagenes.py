@@ -0,0 +1,71 @@
+import re
+from urllib.parse import unquote
+
+from django import template
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.safestring import mark_safe
+
+from blog.variantes import manifiesto, nombre_variante
+
+register = template.Library()
+
+_IMG = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_SRC = re.compile(r'\ssrc="([^"]+)"', re.IGNORECASE)
+
+
+def _candidatos(fieldfile, datos, formato):
+    storage = fieldfile.storage
+    candidatos = [f"{storage.url(nombre_variante(fieldfile.name, ancho, formato))} {ancho}w"
+                  for ancho in datos["anchos"]]
+    candidatos.append(f"{fieldfile.url} {datos['ancho']}w")
+    return ", ".join(candidatos)
+
+
+@register.simple_tag
+def srcset(fieldfile, formato="jpg"):
+    """
+    Valor para el atributo srcset de una imagen subida: sus variantes más el original.
+    Vacío si las variantes todavía no se generaron (el navegador usa el src).
+    Ejemplo: <img src="{{ art.imagen.url }}" srcset="{% srcset art.imagen %}">
+    """
+    datos = manifiesto(fieldfile.name, fieldfile.storage) if fieldfile else None
+    return _candidatos(fieldfile, datos, formato) if datos else ""
+
+
+@register.inclusion_tag("imagenes/imagen_responsiva.html")
+def imagen_responsiva(fieldfile, alt="", sizes="100vw"):
+    """<picture> con variantes WebP y JPEG de la imagen (o solo el <img> original si no hay)."""
+    datos = manifiesto(fieldfile.name, fieldfile.storage) if fieldfile else None
+    return {
+        "url": fieldfile.url if fieldfile else "",
+        "alt": alt,
+        "sizes": sizes,
+        "srcset_webp": _candidatos(fieldfile, datos, "webp") if datos else "",
+        "srcset_jpg": _candidatos(fieldfile, datos, "jpg") if datos else "",
+    }
+
+
+@register.filter
+def con_srcset(html, sizes="(max-width: 800px) 100vw, 800px"):
+    """
+    Agrega srcset a las <img> de un HTML de CKEditor que apuntan a MEDIA_URL.
+    Se usa en lugar de |safe: el contenido ya viene del editor (confiable).
+    """
+    if not html:
+        return ""
+
+    def reemplazar(match):
+        etiqueta = match.group(0)
+        src = _SRC.search(etiqueta)
+        if not src or "srcset=" in etiqueta.lower() or not src.group(1).startswith(settings.MEDIA_URL):
+            return etiqueta
+        nombre = unquote(src.group(1)[len(settings.MEDIA_URL):])
+        datos = manifiesto(nombre, default_storage)
+        if not datos or not datos["anchos"]:
+            return etiqueta
+        candidatos = [f"{default_storage.url(nombre_variante(nombre, ancho, 'jpg'))} {ancho}w" for ancho in datos["anchos"]]
+        candidatos.append(f"{src.group(1)} {datos['ancho']}w")
+        return etiqueta[:-1].rstrip("/ ") + f' srcset="{", ".join(candidatos)}" sizes="{sizes}">'
+
+    return mark_safe(_IMG.sub(reemplazar, str(html)))
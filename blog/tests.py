@@ -1,15 +1,48 @@
 import tempfile
 import shutil
 from unittest.mock import patch
+import io
+import json
+import os
+import struct
+from urllib.parse import quote
+from io import StringIO
+from unittest import mock
 
 import numpy as np
+import cv2
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction, IntegrityError
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.test import RequestFactory, TestCase, override_settings, Client
 from django.urls import reverse
 from AppPagina.models import Pagina
-from .models import Categoria, SubCategoria, Articulo, Tipo
+from mantenimiento.tareas import procesar_pendientes
+from .models import Categoria, SubCategoria, Articulo, Tipo, Layout
+from AppPagina.context_processors import obtener_paginas
+from blog.bulk import importar, ErrorImportacion, Importador
+from blog.navegacion import obtener_navegacion, construir_menu, version_actual
+from blog.pros_categorias import C_obtener_paginas as categorias_cp, C_obtener_paginas
+from blog.pros_layout import layout as layout_cp
+from blog.pros_subcategorias import SC_obtener_paginas as subcategorias_cp, SC_obtener_paginas
+from mainApp.nombres_unicos import Asignador
+from mantenimiento.models import Tarea, ArchivoPorBorrar
+from .limpieza import borrar_pendientes, programar_borrado, barrer_huerfanos, encolar_borrado
+from .miniaturas import puntaje, elegir_cuadro, miniatura_jpeg
+from .variantes import generar_variantes, nombre_variante, manifiesto, nombres_variantes, AlmacenamientoConVariantes, borrar_variantes
+from .video import mover_moov_al_inicio, optimizar_video
+from .views import validacion_subcategoria, subcategorias_visibles
 
 
 
@@ -89,7 +122,9 @@ class SubCategoriaModelTest(TestCase):
     @patch("cv2.imencode")
     def test_signal_generar_miniatura(self, mock_imencode, mock_cap):
       
-        mock_cap.return_value.read.return_value = (
+        mock_cap.return_value.get.return_value = 25
+        mock_cap.return_value.grab.return_value = True
+        mock_cap.return_value.retrieve.return_value = (
             True,
             np.zeros((100, 100, 3), dtype=np.uint8)
         )
@@ -107,8 +142,15 @@ class SubCategoriaModelTest(TestCase):
             video_file=archivo,
         )
 
+        # el guardado no decodifica el video: queda encolado para el worker
+        s.refresh_from_db()
+        self.assertFalse(s.imagen)
+        self.assertEqual(s.estado_miniatura, "pendiente")
+
+        procesar_pendientes()
         s.refresh_from_db()
         self.assertTrue(s.imagen)
+        self.assertEqual(s.estado_miniatura, "lista")
 
 
 class TipoModelTest(TestCase):
@@ -187,7 +229,9 @@ class ArticuloModelTest(TestCase):
     @patch("cv2.VideoCapture")
     @patch("cv2.imencode")
     def test_signal_miniatura_video(self, mock_imencode, mock_cap):
-        mock_cap.return_value.read.return_value = (
+        mock_cap.return_value.get.return_value = 25
+        mock_cap.return_value.grab.return_value = True
+        mock_cap.return_value.retrieve.return_value = (
             True,
             np.zeros((100, 100, 3), dtype=np.uint8)
         )
@@ -204,8 +248,10 @@ class ArticuloModelTest(TestCase):
             video_file=archivo,
         )
 
+        procesar_pendientes()
         a.refresh_from_db()
         self.assertTrue(a.imagen)
+        self.assertEqual(a.estado_miniatura, "lista")
 
     def test_ordenamiento_articulos(self):
         a1 = Articulo.objects.create(
@@ -519,7 +565,6 @@ class BlogViewsTest(TestCase):
             usuario=self.user
         )
 
-        from .views import validacion_subcategoria
         self.assertFalse(validacion_subcategoria(sub, pagina))
 
 
@@ -533,8 +578,6 @@ class LayoutContextProcessorTest(TestCase):
         self.factory = RequestFactory()
 
     def test_layout_context_processor_ok(self):
-        from blog.pros_layout import layout as layout_cp
-
         request = self.factory.get("/")
         ctx = layout_cp(request)
 
@@ -547,12 +590,10 @@ class CategoriasContextProcessorTest(TestCase):
         self.factory = RequestFactory()
 
     def test_categorias_context_processor_ok(self):
-        from blog.pros_categorias import C_obtener_paginas as categorias_cp
-
         request = self.factory.get("/")
         ctx = categorias_cp(request)
 
-        self.assertIn("V_categorias", ctx)
+        self.assertIn("V_menu", ctx)
         
 
 class SubcategoriasContextProcessorTest(TestCase):
@@ -561,8 +602,6 @@ class SubcategoriasContextProcessorTest(TestCase):
         self.factory = RequestFactory()
 
     def test_subcategorias_context_processor_ok(self):
-        from blog.pros_subcategorias import SC_obtener_paginas as subcategorias_cp
-
         request = self.factory.get("/")
         ctx = subcategorias_cp(request)
 
@@ -571,3 +610,873 @@ class SubcategoriasContextProcessorTest(TestCase):
 
 
 
+
+
+class NavegacionCacheTest(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create(username="nav")
+        self.tipo = Tipo.objects.create(nombre="Nav", usuario=self.user)
+        self.pagina = Pagina.objects.create(
+            titulo="Pagina Nav", slug="pagina-nav", tipo=self.tipo,
+            usuario=self.user, publico=True, contenido="<p>Hola</p>"
+        )
+        self.categoria = Categoria.objects.create(nombre="Cat Nav")
+        self.categoria.paginas.add(self.pagina)
+        Layout.get_solo()
+
+    def test_cache_hit_no_hace_consultas(self):
+        obtener_navegacion()
+        with self.assertNumQueries(0):
+            nav = obtener_navegacion()
+        self.assertEqual(nav["menu"][self.pagina.id], [(self.categoria.id, "Cat Nav")])
+
+    def test_context_processors_comparten_snapshot(self):
+        obtener_navegacion()
+
+        request = self.factory.get("/")
+        with self.assertNumQueries(0):
+            for cp in (obtener_paginas, C_obtener_paginas, SC_obtener_paginas, layout_cp):
+                cp(request)
+
+    def test_senales_invalidan_snapshot(self):
+        obtener_navegacion()
+
+        self.pagina.titulo = "Renombrada"
+        self.pagina.save()
+        titulos = [p[1] for p in obtener_navegacion()["paginas"]]
+        self.assertIn("Renombrada", titulos)
+
+        otra = Categoria.objects.create(nombre="Otra Cat")
+        otra.paginas.add(self.pagina)
+        self.assertIn(otra.id, [c[0] for c in obtener_navegacion()["menu"][self.pagina.id]])
+
+        SubCategoria.objects.create(nombre="Sub Nav", categoria=self.categoria)
+        self.assertIn("Sub Nav", [s[1] for s in obtener_navegacion()["subcategorias"]])
+
+        otra.delete()
+        self.assertNotIn(otra.id, [c[0] for c in obtener_navegacion()["menu"][self.pagina.id]])
+
+
+class NavegacionMenuTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="menu")
+        self.tipo = Tipo.objects.create(nombre="Menu", usuario=self.user)
+        Pagina.objects.create(titulo="Inicio", tipo=self.tipo, usuario=self.user,
+                              publico=True, es_inicio=True, contenido="Inicio")
+        self.pagina_a = Pagina.objects.create(titulo="Pagina A", slug="pagina-a", tipo=self.tipo,
+                                              usuario=self.user, publico=True, contenido="A")
+        self.pagina_b = Pagina.objects.create(titulo="Pagina B", slug="pagina-b", tipo=self.tipo,
+                                              usuario=self.user, publico=True, contenido="B")
+        self.cat_a = Categoria.objects.create(nombre="Solo A")
+        self.cat_a.paginas.add(self.pagina_a)
+        self.cat_ab = Categoria.objects.create(nombre="En A y B")
+        self.cat_ab.paginas.add(self.pagina_a, self.pagina_b)
+        privada = Categoria.objects.create(nombre="Privada", publico=False)
+        privada.paginas.add(self.pagina_b)
+        Layout.get_solo()
+
+    def test_menu_agrupado_por_id_de_pagina(self):
+        menu = construir_menu()
+        self.assertEqual(menu[self.pagina_a.id], [(self.cat_a.id, "Solo A"), (self.cat_ab.id, "En A y B")])
+        self.assertEqual(menu[self.pagina_b.id], [(self.cat_ab.id, "En A y B")])
+
+    def test_layout_marca_categoria_actual(self):
+        Articulo.objects.create(titulo="Art A", categoria=self.cat_a, tipo=self.tipo,
+                                publico=True, usuario=self.user)
+        url = reverse("N_categoria", args=[self.pagina_a.slug, self.cat_a.id])
+        response = self.client.get(url)
+
+        self.assertContains(response, f'<a class="actual" href="{url}">Solo A</a>', html=True)
+        otra = reverse("N_categoria", args=[self.pagina_a.slug, self.cat_ab.id])
+        self.assertContains(response, f'<a href="{otra}">En A y B</a>', html=True)
+        self.assertNotContains(response, "Privada")
+
+    def test_fragmento_del_menu_se_cachea_y_se_invalida(self):
+        url = reverse("N_pagina", args=[self.pagina_a.slug])
+        self.client.get(url)
+        clave = make_template_fragment_key(
+            "navegacion", [version_actual(), self.pagina_a.slug, "", "", ""])
+        self.assertIn("Pagina B", cache.get(clave))
+
+        self.pagina_b.titulo = "Pagina B renombrada"
+        self.pagina_b.save()
+        response = self.client.get(url)
+        self.assertContains(response, "Pagina B renombrada")
+
+
+# sin la caché de páginas completas: se miden las consultas de la vista, no un hit
+@override_settings(CACHE_PUBLICO_TIMEOUT=0)
+class SubcategoriasVisiblesTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="subvis")
+        self.tipo = Tipo.objects.create(nombre="SubVis", usuario=self.user)
+        self.otro_tipo = Tipo.objects.create(nombre="Otro", usuario=self.user)
+        self.pagina = Pagina.objects.create(titulo="Pagina SV", slug="pagina-sv", tipo=self.tipo,
+                                            usuario=self.user, publico=True, contenido="x")
+        self.categoria = Categoria.objects.create(nombre="Cat SV")
+        self.categoria.paginas.add(self.pagina)
+        Layout.get_solo()
+
+    def _crear_subcategorias(self, cantidad):
+        for i in range(cantidad):
+            sub = SubCategoria.objects.create(nombre=f"Sub {i}", categoria=self.categoria, publico=True)
+            Articulo.objects.create(titulo=f"Art {i}", subcategoria=sub, categoria=self.categoria,
+                                    tipo=self.tipo, publico=True, usuario=self.user)
+
+    def test_mismo_resultado_que_validacion_subcategoria(self):
+        self._crear_subcategorias(2)
+        SubCategoria.objects.create(nombre="Privada", categoria=self.categoria, publico=False)
+        sub_otro_tipo = SubCategoria.objects.create(nombre="Otro tipo", categoria=self.categoria, publico=True)
+        Articulo.objects.create(titulo="Art otro", subcategoria=sub_otro_tipo, categoria=self.categoria,
+                                tipo=self.otro_tipo, publico=True, usuario=self.user)
+
+        publicas = SubCategoria.objects.filter(categoria=self.categoria, publico=True)
+        esperadas = {s.pk for s in publicas if validacion_subcategoria(s, self.pagina)}
+        obtenidas = {s.pk for s in subcategorias_visibles(self.categoria, self.pagina)}
+        self.assertEqual(obtenidas, esperadas)
+
+    def test_consultas_no_dependen_de_la_cantidad_de_subcategorias(self):
+        url = reverse("N_categoria", args=[self.pagina.slug, self.categoria.id])
+        self._crear_subcategorias(2)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as pocas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self._crear_subcategorias(20)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as muchas:
+            response = self.client.get(url)
+        self.assertContains(response, "Sub 19")
+        self.assertEqual(len(muchas), len(pocas))
+
+
+class MiniaturasTest(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="test_miniaturas_")
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def crear_video(self, cuadros_negros=10, total=30, tamanio=(64, 48)):
+        ruta = os.path.join(self.dir, "video.avi")
+        writer = cv2.VideoWriter(ruta, cv2.VideoWriter_fourcc(*"MJPG"), 10, tamanio)
+        for i in range(total):
+            if i < cuadros_negros:
+                frame = np.zeros((tamanio[1], tamanio[0], 3), dtype=np.uint8)
+            else:
+                frame = np.random.RandomState(i).randint(0, 255, (tamanio[1], tamanio[0], 3), dtype=np.uint8)
+            writer.write(frame)
+        writer.release()
+        return ruta
+
+    def test_puntaje_penaliza_cuadros_negros(self):
+        negro = np.zeros((40, 40, 3), dtype=np.uint8)
+        ruido = np.random.RandomState(0).randint(0, 255, (40, 40, 3), dtype=np.uint8)
+        self.assertGreater(puntaje(ruido), puntaje(negro))
+
+    def test_elegir_cuadro_evita_el_inicio_negro(self):
+        frame = elegir_cuadro(self.crear_video())
+        self.assertIsNotNone(frame)
+        self.assertGreater(frame.mean(), 50)
+
+    def test_miniatura_se_reduce_antes_de_codificar(self):
+        data = miniatura_jpeg(self.crear_video(tamanio=(1280, 720), total=12, cuadros_negros=0))
+        imagen = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(imagen.shape[:2], (360, 640))
+
+    @patch("cv2.VideoCapture")
+    def test_sin_seek_solo_retrieve_de_las_muestras(self, mock_cap):
+        cap = mock_cap.return_value
+        # 25 fps y cantidad de cuadros desconocida
+        cap.get.side_effect = lambda propiedad: 25 if propiedad == cv2.CAP_PROP_FPS else 0
+        cap.grab.return_value = True
+        cap.retrieve.return_value = (True, np.zeros((10, 10, 3), dtype=np.uint8))
+        elegir_cuadro("video.mp4", segundos=4, muestras=5)
+        cap.set.assert_not_called()
+        self.assertEqual(cap.grab.call_count, 100)
+        self.assertEqual(cap.retrieve.call_count, 5)
+        cap.release.assert_called_once()
+
+    def test_video_ilegible_devuelve_none(self):
+        ruta = os.path.join(self.dir, "roto.mp4")
+        with open(ruta, "wb") as f:
+            f.write(b"no es un video")
+        self.assertIsNone(miniatura_jpeg(ruta))
+
+
+VARIANTES_MEDIA_ROOT = tempfile.mkdtemp(prefix="test_media_variantes_")
+
+
+@override_settings(MEDIA_ROOT=VARIANTES_MEDIA_ROOT, IMAGEN_VARIANTES_ANCHOS=(320, 640, 1024))
+class VariantesImagenTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(VARIANTES_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="tester")
+
+    def png(self, nombre="foto.png", ancho=800, alto=400):
+        buffer = io.BytesIO()
+        Image.new("RGB", (ancho, alto), (200, 100, 50)).save(buffer, "PNG")
+        return SimpleUploadedFile(nombre, buffer.getvalue(), content_type="image/png")
+
+    def crear_articulo(self):
+        return Articulo.objects.create(titulo="Con imagen", contenido="x", publico=True,
+                                       usuario=self.user, imagen=self.png())
+
+    def test_generar_variantes_no_agranda(self):
+        nombre = default_storage.save("thumbnails/foto.png", self.png())
+        datos = generar_variantes(nombre)
+        self.assertEqual(datos, {"ancho": 800, "anchos": [320, 640]})
+        self.assertTrue(default_storage.exists(nombre_variante(nombre, 320, "webp")))
+        self.assertTrue(default_storage.exists(nombre_variante(nombre, 640, "jpg")))
+        self.assertFalse(default_storage.exists(nombre_variante(nombre, 1024, "jpg")))
+
+    def test_subir_imagen_encola_y_el_worker_genera(self):
+        art = self.crear_articulo()
+        html = Template("{% load imagenes %}{% srcset art.imagen %}").render(Context({"art": art}))
+        self.assertEqual(html, "")
+
+        procesar_pendientes()
+        html = Template("{% load imagenes %}{% srcset art.imagen %}").render(Context({"art": art}))
+        self.assertIn(".w320.jpg 320w", html)
+        self.assertIn(f"{art.imagen.url} 800w", html)
+
+    def test_render_sin_variantes_no_encola_ni_repite_el_storage(self):
+        nombre = default_storage.save("thumbnails/anterior.png", self.png())
+        self.assertIsNone(manifiesto(nombre))
+        self.assertFalse(Tarea.objects.exists())
+        with mock.patch.object(default_storage, "open") as abrir:
+            self.assertIsNone(manifiesto(nombre))
+        abrir.assert_not_called()
+
+    def test_comando_generar_variantes_encola_las_anteriores(self):
+        nombre = default_storage.save("thumbnails/anterior.png", self.png())
+        Articulo.objects.filter(pk=self.crear_articulo().pk).update(imagen=nombre)
+        procesar_pendientes()
+        self.assertIsNone(manifiesto(nombre))
+
+        call_command("generar_variantes", stdout=StringIO())
+        procesar_pendientes()
+        self.assertEqual(manifiesto(nombre)["anchos"], [320, 640])
+
+    def test_imagen_responsiva_con_webp(self):
+        art = self.crear_articulo()
+        procesar_pendientes()
+        html = Template('{% load imagenes %}{% imagen_responsiva art.imagen "Alt" "150px" %}').render(
+            Context({"art": art}))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn(".w640.webp 640w", html)
+
+    def test_borrar_articulo_borra_variantes(self):
+        art = self.crear_articulo()
+        procesar_pendientes()
+        nombre = art.imagen.name
+        with self.captureOnCommitCallbacks(execute=True):
+            art.delete()
+        procesar_pendientes()
+        for variante in nombres_variantes(nombre):
+            self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, variante)))
+
+    def test_originales_con_la_misma_raiz_no_comparten_variantes(self):
+        png = default_storage.save("thumbnails/raiz.png", self.png())
+        buffer = io.BytesIO()
+        Image.new("RGB", (800, 600), "blue").save(buffer, "JPEG")
+        jpg = default_storage.save("thumbnails/raiz.jpg", ContentFile(buffer.getvalue()))
+        generar_variantes(png)
+        generar_variantes(jpg)
+        self.assertNotEqual(nombre_variante(png, 320, "jpg"), nombre_variante(jpg, 320, "jpg"))
+        with default_storage.open(nombre_variante(jpg, 320, "jpg"), "rb") as archivo:
+            # la del JPEG de 800x600, no la del PNG de 800x400
+            self.assertEqual(Image.open(archivo).size, (320, 240))
+
+        borrar_variantes(png)
+        self.assertFalse(any(default_storage.exists(variante) for variante in nombres_variantes(png)[:4]))
+        self.assertTrue(all(default_storage.exists(variante) for variante in nombres_variantes(jpg)[:4]))
+
+    def test_con_srcset_en_contenido_de_ckeditor(self):
+        nombre = AlmacenamientoConVariantes().save("foto.png", self.png())
+        procesar_pendientes()
+        html = Template("{% load imagenes %}{{ contenido|con_srcset }}").render(Context({
+            "contenido": f'<p><img src="/media/{nombre}" alt="x"></p>'}))
+        self.assertIn(f'srcset="/media/{nombre}.w320.jpg 320w', html)
+        self.assertIn(f'/media/{nombre} 800w"', html)
+
+
+def mp4_con_moov_al_final(datos=b"0123456789" * 50):
+    """MP4 mínimo: ftyp, mdat y al final un moov con una tabla stco que apunta a dos chunks de mdat."""
+
+    def atomo(tipo, contenido):
+        return struct.pack(">I4s", 8 + len(contenido), tipo) + contenido
+
+    ftyp = atomo(b"ftyp", b"isom" + b"\x00\x00\x02\x00" + b"isomiso2mp41")
+    inicio_datos = len(ftyp) + 8
+    stco = atomo(b"stco", struct.pack(">IIII", 0, 2, inicio_datos, inicio_datos + 100))
+    moov = atomo(b"moov", atomo(b"trak", atomo(b"mdia", atomo(b"minf", atomo(b"stbl", stco)))))
+    return ftyp + atomo(b"mdat", datos) + moov
+
+
+@override_settings(MEDIA_ROOT=ARTICLE_MEDIA_ROOT, VIDEO_FFMPEG="")
+class VideoOptimizadoTest(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="test_video_")
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.user = User.objects.create(username="tester")
+
+    def offsets_stco(self, contenido):
+        posicion = contenido.index(b"stco") + 8
+        cantidad = struct.unpack_from(">I", contenido, posicion)[0]
+        return list(struct.unpack_from(f">{cantidad}I", contenido, posicion + 4))
+
+    def test_mover_moov_corrige_offsets(self):
+        original = mp4_con_moov_al_final()
+        origen, destino = os.path.join(self.dir, "in.mp4"), os.path.join(self.dir, "out.mp4")
+        with open(origen, "wb") as f:
+            f.write(original)
+
+        self.assertTrue(mover_moov_al_inicio(origen, destino))
+        with open(destino, "rb") as f:
+            optimizado = f.read()
+        self.assertEqual(len(optimizado), len(original))
+        self.assertLess(optimizado.index(b"moov"), optimizado.index(b"mdat"))
+        # cada offset sigue apuntando a los mismos bytes
+        for antes, despues in zip(self.offsets_stco(original), self.offsets_stco(optimizado)):
+            self.assertEqual(original[antes:antes + 10], optimizado[despues:despues + 10])
+
+        # ya optimizado: no hay nada que hacer
+        self.assertFalse(mover_moov_al_inicio(destino, os.path.join(self.dir, "otra.mp4")))
+
+    def test_archivo_que_no_es_mp4(self):
+        origen = os.path.join(self.dir, "in.mp4")
+        with open(origen, "wb") as f:
+            f.write(b"no es un video")
+        self.assertFalse(optimizar_video(origen, os.path.join(self.dir, "out.mp4")))
+
+    def test_worker_guarda_version_optimizada(self):
+        archivo = SimpleUploadedFile("clip.mp4", mp4_con_moov_al_final(), content_type="video/mp4")
+        art = Articulo.objects.create(titulo="Video", contenido="x", publico=True,
+                                      usuario=self.user, video_file=archivo)
+        self.assertEqual(art.video_archivo, art.video_file)
+        antes = art.ultima_modificacion
+
+        procesar_pendientes()
+        art.refresh_from_db()
+        self.assertTrue(art.video_optimizado.name.startswith("videos/optimizados/clip"))
+        # cambia el ETag del detalle y de los listados
+        self.assertGreater(art.ultima_modificacion, antes)
+        self.assertEqual(art.video_archivo, art.video_optimizado)
+        with art.video_optimizado.open("rb") as f:
+            contenido = f.read()
+        self.assertLess(contenido.index(b"moov"), contenido.index(b"mdat"))
+
+    def test_video_reemplazado_durante_el_remux_no_recibe_la_version_vieja(self):
+        archivo = SimpleUploadedFile("clip.mp4", mp4_con_moov_al_final(), content_type="video/mp4")
+        art = Articulo.objects.create(titulo="Video", contenido="x", publico=True,
+                                      usuario=self.user, video_file=archivo)
+
+        def optimizar_y_reemplazar(origen, destino):
+            resultado = optimizar_video(origen, destino)
+            Articulo.objects.filter(pk=art.pk).update(video_file="videos/nuevo.mp4")
+            return resultado
+
+        with patch("blog.video.optimizar_video", optimizar_y_reemplazar), \
+                self.captureOnCommitCallbacks(execute=True):
+            procesar_pendientes()
+        art.refresh_from_db()
+        self.assertFalse(art.video_optimizado)
+        huerfano = ArchivoPorBorrar.objects.get().nombre
+        self.assertTrue(huerfano.startswith("videos/optimizados/clip"))
+        procesar_pendientes()
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, huerfano)))
+
+    def test_cambiar_video_descarta_la_version_optimizada(self):
+        archivo = SimpleUploadedFile("clip.mp4", mp4_con_moov_al_final(), content_type="video/mp4")
+        art = Articulo.objects.create(titulo="Video", contenido="x", publico=True,
+                                      usuario=self.user, video_file=archivo)
+        procesar_pendientes()
+        art.refresh_from_db()
+        viejo = art.video_optimizado.path
+
+        art.video_file = SimpleUploadedFile("otro.mp4", mp4_con_moov_al_final(), content_type="video/mp4")
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as consultas:
+            art.save()
+        # la versión optimizada se recordó al leer la fila: no se vuelve a consultar
+        self.assertFalse([c for c in consultas if c["sql"].startswith('SELECT "blog_articulo"."video_optimizado"')])
+        self.assertFalse(art.video_optimizado)
+        procesar_pendientes()
+        self.assertFalse(os.path.exists(viejo))
+
+
+@override_settings(MEDIA_ROOT=ARTICLE_MEDIA_ROOT)
+class ArchivosReemplazadosTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="tester")
+        self.cat = Categoria.objects.create(nombre="Cat", desc="d")
+
+    def imagen(self, nombre):
+        return SimpleUploadedFile(nombre, b"\x89PNG", content_type="image/png")
+
+    def crear(self, **kwargs):
+        art = Articulo.objects.create(titulo="Con archivos", contenido="x", publico=True, usuario=self.user,
+                                      imagen=self.imagen("antes.png"), categoria=self.cat, **kwargs)
+        return Articulo.objects.get(pk=art.pk)
+
+    def guardar(self, art):
+        # el borrado se encola al confirmar y lo hace el worker (blog/limpieza.py)
+        with self.captureOnCommitCallbacks(execute=True):
+            art.save()
+        procesar_pendientes()
+
+    def selects_de_la_fila(self, consultas):
+        # la fila anterior se leía entera; las consultas de títulos únicos solo traen el título
+        return [c["sql"] for c in consultas
+                if c["sql"].startswith("SELECT") and ('"blog_articulo"."imagen"' in c["sql"]
+                                                      or '"blog_articulo"."categoria_id"' in c["sql"])]
+
+    def test_guardar_no_relee_la_fila(self):
+        art = self.crear()
+        art.contenido = "otro"
+        with CaptureQueriesContext(connection) as consultas:
+            art.save()
+        self.assertEqual(self.selects_de_la_fila(consultas), [])
+
+    def test_reemplazar_y_quitar_imagen_borra_el_archivo(self):
+        art = self.crear()
+        primera = art.imagen.path
+        art.imagen = self.imagen("despues.png")
+        self.guardar(art)
+        self.assertFalse(os.path.exists(primera))
+        segunda = art.imagen.path
+        self.assertTrue(os.path.exists(segunda))
+
+        # la instancia guardada recuerda el archivo nuevo
+        art.imagen = None
+        self.guardar(art)
+        self.assertFalse(os.path.exists(segunda))
+
+    def test_sin_cambios_no_borra(self):
+        art = self.crear()
+        self.guardar(art)
+        art.save(update_fields=["contenido"])
+        procesar_pendientes()
+        self.assertTrue(os.path.exists(art.imagen.path))
+
+    def test_instancia_diferida_o_armada_consulta_la_anterior(self):
+        art = self.crear()
+        ruta = art.imagen.path
+        diferida = Articulo.objects.defer("imagen").get(pk=art.pk)
+        diferida.imagen = self.imagen("nueva.png")
+        self.guardar(diferida)
+        self.assertFalse(os.path.exists(ruta))
+
+        armada = Articulo.objects.get(pk=art.pk)
+        armada.__dict__.pop("_cargados")
+        ruta = armada.imagen.path
+        armada.imagen = None
+        self.guardar(armada)
+        self.assertFalse(os.path.exists(ruta))
+
+    def test_quitar_imagen_del_contenido_la_borra(self):
+        almacen = AlmacenamientoConVariantes()
+        nombre = almacen.save("foto.png", self.imagen("foto.png"))
+        art = self.crear()
+        art.contenido = f'<p><img src="/media/{nombre}"></p>'
+        art.save()
+        self.assertTrue(os.path.exists(almacen.path(nombre)))
+        art.contenido = "<p>sin imagen</p>"
+        self.guardar(art)
+        self.assertFalse(os.path.exists(almacen.path(nombre)))
+
+    def test_cambio_de_categoria_recuerda_la_anterior(self):
+        art = self.crear()
+        art.categoria = Categoria.objects.create(nombre="Otra", desc="d")
+        art.save()
+        self.assertEqual(art._ubicacion_previa, (self.cat.pk, None))
+        art.save()
+        self.assertEqual(art._ubicacion_previa, (art.categoria_id, None))
+
+
+@override_settings(MEDIA_ROOT=ARTICLE_MEDIA_ROOT)
+class LimpiezaArchivosTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="tester")
+
+    def crear(self, nombre):
+        imagen = SimpleUploadedFile(nombre, b"\x89PNG", content_type="image/png")
+        return Articulo.objects.create(titulo=nombre, contenido="x", publico=True, usuario=self.user, imagen=imagen)
+
+    def test_rollback_conserva_el_archivo(self):
+        art = self.crear("queda.png")
+        ruta = art.imagen.path
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                art.delete()
+                raise RuntimeError
+        procesar_pendientes()
+        self.assertEqual(callbacks, [])
+        self.assertFalse(ArchivoPorBorrar.objects.exists())
+        self.assertTrue(os.path.exists(ruta))
+
+    @override_settings(ARCHIVOS_BORRADO_LOTE=2)
+    def test_borrado_masivo_en_una_tarea_por_lotes(self):
+        rutas = [self.crear(f"masivo{i}.png").imagen.path for i in range(5)]
+        with patch("blog.limpieza.encolar") as encolar, self.captureOnCommitCallbacks(execute=True):
+            Articulo.objects.all().delete()
+        # los archivos siguen hasta que corre el worker
+        encolar.assert_called_once()
+        encolar_borrado()
+        self.assertEqual(ArchivoPorBorrar.objects.count(), 5)
+        self.assertTrue(all(os.path.exists(ruta) for ruta in rutas))
+
+        procesar_pendientes()
+        self.assertFalse(any(os.path.exists(ruta) for ruta in rutas))
+        self.assertFalse(ArchivoPorBorrar.objects.exists())
+        self.assertEqual(Tarea.objects.get(nombre="blog.borrar_archivos").estado, Tarea.COMPLETADA)
+
+    def test_despues_de_un_rollback_se_sigue_encolando(self):
+        art = self.crear("siguiente.png")
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                programar_borrado("thumbnails/revertido.png")
+                raise RuntimeError
+            with transaction.atomic():
+                art.delete()
+        self.assertTrue(Tarea.objects.filter(clave="borrar_archivos", estado=Tarea.PENDIENTE).exists())
+        procesar_pendientes()
+        self.assertFalse(os.path.exists(art.imagen.path))
+
+    def test_imagenes_del_contenido_se_borran_en_el_worker(self):
+        quitada = default_storage.save("uploads/quitada.png", ContentFile(b"q"))
+        compartida = default_storage.save("uploads/compartida nueva.png", ContentFile(b"c"))
+        html = f'<img src="/media/{quitada}"><img src="/media/{quote(compartida)}">'
+        art = Articulo.objects.create(titulo="Con imágenes", publico=True, usuario=self.user, contenido=html)
+        Articulo.objects.create(titulo="Otra", publico=True, usuario=self.user,
+                                contenido=f'<img src="/media/{quote(compartida)}">')
+
+        art = Articulo.objects.get(pk=art.pk)
+        art.contenido = "<p>sin imágenes</p>"
+        with self.captureOnCommitCallbacks(execute=True):
+            art.save()
+        # no se borran dentro del save: las anota para el worker
+        self.assertTrue(default_storage.exists(quitada))
+        self.assertEqual(set(ArchivoPorBorrar.objects.values_list("nombre", flat=True)), {quitada, compartida})
+        procesar_pendientes()
+        self.assertFalse(default_storage.exists(quitada))
+        # la otra fila todavía la enlaza
+        self.assertTrue(default_storage.exists(compartida))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Articulo.objects.filter(titulo="Otra").delete()
+        self.assertTrue(default_storage.exists(compartida))
+        procesar_pendientes()
+        self.assertFalse(default_storage.exists(compartida))
+
+    def test_no_borra_un_nombre_que_se_volvio_a_usar(self):
+        art = self.crear("usado.png")
+        programar_borrado(art.imagen.name)
+        borrar_pendientes()
+        self.assertTrue(os.path.exists(art.imagen.path))
+
+    def test_barrido_de_huerfanos(self):
+        usado = self.crear("barrido.png").imagen.name
+        variante = default_storage.save(f"{usado}.w320.jpg", ContentFile(b"v"))
+        # misma raíz que la usada pero de otro original, que ya no está: también es huérfana
+        ajena = default_storage.save(usado.replace(".png", ".jpg.w320.jpg"), ContentFile(b"a"))
+        en_contenido = default_storage.save("uploads/barrido_ck.png", ContentFile(b"c"))
+        Articulo.objects.create(titulo="Con imagen en el texto", publico=True, usuario=self.user,
+                                contenido=f'<img src="/media/{en_contenido}">')
+        huerfano = default_storage.save("thumbnails/barrido_huerfano.png", ContentFile(b"h"))
+
+        # recién subido: todavía puede estar por guardarse su fila
+        self.assertNotIn(huerfano, barrer_huerfanos(simular=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            nombres = barrer_huerfanos(antiguedad=0)
+        self.assertIn(huerfano, nombres)
+        self.assertIn(ajena, nombres)
+        self.assertFalse({usado, variante, en_contenido} & set(nombres))
+
+        procesar_pendientes()
+        self.assertFalse(default_storage.exists(huerfano))
+        for nombre in (usado, variante, en_contenido):
+            self.assertTrue(os.path.exists(default_storage.path(nombre)))
+
+    def test_comando_barrer_archivos_simular(self):
+        huerfano = default_storage.save("thumbnails/simulado.png", ContentFile(b"h"))
+        salida = StringIO()
+        call_command("barrer_archivos", "--simular", "--antiguedad", "0", stdout=salida)
+        self.assertIn(huerfano, salida.getvalue())
+        self.assertFalse(ArchivoPorBorrar.objects.exists())
+        self.assertTrue(default_storage.exists(huerfano))
+        default_storage.delete(huerfano)
+
+
+@override_settings(ARTICULOS_POR_PAGINA=2)
+class ListarArticulosPaginadoTest(TestCase):
+
+    def setUp(self):
+        Layout.get_solo()
+        self.user = User.objects.create(username="tester")
+        self.categoria = Categoria.objects.create(nombre="CatLista", publico=True)
+        self.articulos = [
+            Articulo.objects.create(titulo=f"Art {i}", contenido="<p>cuerpo largo</p>", publico=True,
+                                    categoria=self.categoria, usuario=self.user)
+            for i in range(5)
+        ]
+        # dos artículos con la misma fecha: el id desempata
+        Articulo.objects.filter(pk=self.articulos[3].pk).update(creacion=self.articulos[2].creacion)
+
+    def recorrer(self):
+        titulos, url = [], reverse("N_articulos")
+        while url:
+            response = self.client.get(url)
+            titulos += [a.titulo for a in response.context["lista_art"]]
+            siguiente = response.context["cursor_siguiente"]
+            url = f"{reverse('N_articulos')}?despues={siguiente}" if siguiente else None
+        return titulos
+
+    def test_recorre_todo_sin_repetir_ni_saltear(self):
+        esperado = [a.titulo for a in Articulo.objects.order_by("-creacion", "-id")]
+        self.assertEqual(self.recorrer(), esperado)
+        self.assertEqual(len(esperado), 5)
+
+    def test_no_carga_el_contenido(self):
+        response = self.client.get(reverse("N_articulos"))
+        art = response.context["lista_art"][0]
+        self.assertIn("contenido", art.get_deferred_fields())
+        self.assertNotContains(response, "cuerpo largo")
+
+    def test_cursor_invalido_es_la_primera_pagina(self):
+        response = self.client.get(reverse("N_articulos") + "?despues=basura")
+        primera = self.client.get(reverse("N_articulos"))
+        self.assertEqual([a.pk for a in response.context["lista_art"]],
+                         [a.pk for a in primera.context["lista_art"]])
+
+
+@override_settings(CACHE_PUBLICO_TIMEOUT=0, ARTICULOS_POR_PAGINA=3)
+class ListadosCategoriaPaginadosTest(TestCase):
+
+    def setUp(self):
+        Layout.get_solo()
+        self.user = User.objects.create(username="paginado")
+        self.tipo = Tipo.objects.create(nombre="TipoPag", usuario=self.user)
+        self.pagina = Pagina.objects.create(titulo="Pagina Pag", slug="pagina-pag", tipo=self.tipo,
+                                            usuario=self.user, publico=True, contenido="x")
+        self.categoria = Categoria.objects.create(nombre="Cat Pag", publico=True)
+        self.categoria.paginas.add(self.pagina)
+        self.url_categoria = reverse("N_categoria", args=[self.pagina.slug, self.categoria.id])
+
+    def _crear_articulos(self, cantidad, **extra):
+        inicio = Articulo.objects.count()
+        for i in range(inicio, inicio + cantidad):
+            Articulo.objects.create(titulo=f"Art {i}", contenido="<p>cuerpo largo</p>", categoria=self.categoria,
+                                    tipo=self.tipo, publico=True, usuario=self.user, **extra)
+
+    def _consultas(self, url):
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(consultas)
+
+    def test_categoria_pagina_y_recorre_todo(self):
+        self._crear_articulos(7)
+        titulos, url = [], self.url_categoria
+        while url:
+            response = self.client.get(url)
+            pagina = response.context["v_cat_articulos"]
+            self.assertLessEqual(len(pagina), 3)
+            self.assertIn("contenido", pagina[0].get_deferred_fields())
+            titulos += [a.titulo for a in pagina]
+            siguiente = response.context["cursor_siguiente"]
+            url = f"{self.url_categoria}?despues={siguiente}" if siguiente else None
+        self.assertEqual(titulos, [a.titulo for a in Articulo.objects.order_by("-creacion", "-id")])
+        self.assertNotContains(response, "cuerpo largo")
+        self.assertContains(response, "Más recientes")
+
+    def test_consultas_de_categoria_no_dependen_de_la_cantidad(self):
+        self._crear_articulos(2)
+        pocas = self._consultas(self.url_categoria)
+        self._crear_articulos(10)
+        self.assertEqual(self._consultas(self.url_categoria), pocas)
+
+    def test_consultas_de_subcategoria_no_dependen_de_la_cantidad(self):
+        sub = SubCategoria.objects.create(nombre="Sub Pag", categoria=self.categoria, publico=True)
+        url = reverse("N_subcategoria", args=[self.pagina.slug, sub.slug])
+        self._crear_articulos(2, subcategoria=sub)
+        pocas = self._consultas(url)
+        self._crear_articulos(10, subcategoria=sub)
+        muchas = self._consultas(url)
+        self.assertEqual(muchas, pocas)
+        response = self.client.get(url)
+        self.assertEqual(len(response.context["v_subcat_art"]), 3)
+        self.assertContains(response, "Cat Pag")
+        self.assertIsNotNone(response.context["cursor_siguiente"])
+
+    def test_cursor_mas_alla_del_final_no_redirige(self):
+        self._crear_articulos(2)
+        response = self.client.get(f"{self.url_categoria}?despues=1-1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["v_cat_articulos"]), [])
+
+
+class ExplicarConsultasTest(TestCase):
+
+    def setUp(self):
+        user = User.objects.create(username="explain")
+        tipo = Tipo.objects.create(nombre="TipoExplain", usuario=user)
+        self.pagina = Pagina.objects.create(titulo="Pagina Explain", slug="pagina-explain", tipo=tipo,
+                                            usuario=user, publico=True, contenido="x")
+        categoria = Categoria.objects.create(nombre="Cat Explain", publico=True)
+        categoria.paginas.add(self.pagina)
+        sub = SubCategoria.objects.create(nombre="Sub Explain", categoria=categoria, publico=True)
+        for i in range(3):
+            Articulo.objects.create(titulo=f"Explain {i}", categoria=categoria, subcategoria=sub,
+                                    tipo=tipo, publico=True, usuario=user)
+
+    def test_compara_con_y_sin_indices_sin_perderlos(self):
+        out = StringIO()
+        call_command("explicar_consultas", "--comparar", "--repeticiones", "1", stdout=out)
+        con, sin = out.getvalue().split("== Sin índices ==")
+        self.assertIn("articulo_sub_tipo_pub_idx", con)
+        self.assertNotIn("articulo_sub_tipo_pub_idx", sin)
+        with connection.cursor() as cursor:
+            restricciones = connection.introspection.get_constraints(cursor, Articulo._meta.db_table)
+        self.assertIn("articulo_sub_tipo_pub_idx", restricciones)
+
+    def test_sin_datos_avisa(self):
+        Articulo.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command("explicar_consultas")
+
+
+class ImportarBlogTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="importador")
+        self.tipo = Tipo.objects.create(nombre="Noticias", slug="noticias", usuario=self.user)
+
+    def _importar(self, fuentes, **kwargs):
+        return importar(fuentes, usuario=self.user, **kwargs)
+
+    def test_importa_con_nombres_unicos_y_relaciones(self):
+        Categoria.objects.create(nombre="Discos", desc="existente")
+        importador = self._importar({
+            "paginas": [{"titulo": "Música", "contenido": "<p>Hola&nbsp;mundo</p>", "publico": True,
+                         "tipo": "noticias"},
+                        {"titulo": "Música", "slug": "musica", "publico": "0", "tipo": "noticias"}],
+            "categorias": [{"nombre": "Discos", "desc": "d", "paginas": ["musica", "musica-1"]}],
+            "subcategorias": [{"nombre": "Vinilos", "categoria": "Discos"},
+                              {"nombre": "Vinilos", "categoria": "Discos"}],
+            "articulos": [{"titulo": "Noticia", "contenido": "x", "publico": True, "categoria": "Discos",
+                           "subcategoria": "vinilos-1", "tipo": "noticias"}],
+        })
+        paginas = list(Pagina.objects.order_by("pk"))
+        self.assertEqual([(p.titulo, p.slug) for p in paginas], [("Música", "musica"), ("Música (1)", "musica-1")])
+        self.assertTrue(paginas[0].tiene_contenido)
+        self.assertEqual(paginas[0].extracto, "Hola mundo")
+        self.assertFalse(paginas[1].publico)
+
+        # "Discos" ya existía: la importada se renombra y las referencias del archivo apuntan a ella
+        importada = Categoria.objects.get(nombre="Discos (1)")
+        self.assertEqual(set(importada.paginas.values_list("slug", flat=True)), {"musica", "musica-1"})
+        self.assertEqual(list(SubCategoria.objects.order_by("pk").values_list("nombre", "slug", "categoria")),
+                         [("Vinilos", "vinilos", importada.pk), ("Vinilos (1)", "vinilos-1", importada.pk)])
+        articulo = Articulo.objects.get()
+        self.assertEqual((articulo.categoria_id, articulo.subcategoria.slug), (importada.pk, "vinilos-1"))
+        self.assertEqual(articulo.usuario, self.user)
+        self.assertEqual(importador.renombrados[Categoria], 1)
+        self.assertEqual(importador.creados[Articulo], 1)
+
+    def test_consultas_no_crecen_con_los_repetidos(self):
+        def consultas(cantidad):
+            filas = [{"titulo": "Noticia", "contenido": "x", "publico": True, "tipo": "noticias"}] * cantidad
+            with CaptureQueriesContext(connection) as capturadas:
+                self._importar({"articulos": filas}, lote=1000)
+            # SQLite parte el INSERT según su límite de parámetros: se cuenta el resto
+            return len([q for q in capturadas if not q["sql"].startswith('INSERT INTO "blog_articulo"')])
+
+        pocas = consultas(5)
+        self.assertEqual(consultas(300), pocas)
+        self.assertEqual(Articulo.objects.filter(titulo__startswith="Noticia").count(), 305)
+        self.assertTrue(Articulo.objects.filter(titulo="Noticia (304)").exists())
+
+    def test_encola_medios_en_lugar_de_generarlos(self):
+        with patch("blog.models.miniatura_jpeg") as miniatura:
+            self._importar({"articulos": [
+                {"titulo": "Con video", "contenido": "x", "publico": True,
+                 "video_file": "videos/v.mp4", "usar_miniatura": True},
+                {"titulo": "Con imagen", "contenido": "x", "publico": True, "imagen": "thumbnails/i.jpg"},
+            ]})
+        miniatura.assert_not_called()
+        con_video = Articulo.objects.get(titulo="Con video")
+        self.assertEqual(con_video.estado_miniatura, "pendiente")
+        self.assertEqual(set(Tarea.objects.values_list("clave", flat=True)), {
+            f"miniatura:blog.articulo:{con_video.pk}:videos/v.mp4",
+            f"video:blog.articulo:{con_video.pk}:videos/v.mp4",
+            "variantes:thumbnails/i.jpg",
+        })
+
+    def test_reintenta_el_lote_si_otra_transaccion_ocupa_un_nombre(self):
+        Categoria.objects.bulk_create([Categoria(nombre="Discos", desc="otra")])
+        asignados = []
+
+        def asignar(asignador, base, recortada=False):
+            # la primera vez "Discos" estaba libre: otra transacción la ocupó antes del INSERT
+            valor = base if not asignados else original(asignador, base, recortada)
+            asignados.append(valor)
+            return valor
+
+        original = Asignador.asignar
+        with patch.object(Asignador, "asignar", asignar):
+            self._importar({"categorias": [{"nombre": "Discos", "desc": "d"}]})
+        self.assertEqual(asignados, ["Discos", "Discos (1)"])
+        self.assertTrue(Categoria.objects.filter(nombre="Discos (1)", desc="d").exists())
+
+    def test_otros_integrity_error_no_se_reintentan(self):
+        intentos = []
+
+        def insertar(importador, modelo, objetos, paginas):
+            intentos.append(1)
+            raise IntegrityError("otra restricción")
+
+        with patch.object(Importador, "_insertar", insertar), self.assertRaises(IntegrityError):
+            self._importar({"categorias": [{"nombre": "Discos", "desc": "d"}]})
+        self.assertEqual(len(intentos), 1)
+
+    def test_fila_con_error_no_importa_nada(self):
+        filas = [{"nombre": "Buena", "desc": "d"}, {"nombre": "Sin página", "desc": "d", "paginas": "no-existe"}]
+        with self.assertRaisesMessage(ErrorImportacion, "fila 2"):
+            self._importar({"categorias": filas})
+        with self.assertRaisesMessage(ErrorImportacion, "columnas desconocidas: color"):
+            self._importar({"categorias": [{"nombre": "X", "desc": "d", "color": "rojo"}]})
+        with self.assertRaisesMessage(ErrorImportacion, "titulo"):
+            self._importar({"articulos": [{"titulo": "x" * 101, "contenido": "x", "publico": True}]})
+        self.assertFalse(Categoria.objects.exists())
+        self.assertFalse(Articulo.objects.exists())
+
+    def test_comando_con_csv_y_json_lines(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        User.objects.create(username="Dueño")
+        paginas = os.path.join(directorio, "paginas.csv")
+        with open(paginas, "w", encoding="utf-8") as archivo:
+            archivo.write("titulo,slug,publico,tipo\nUno,,1,noticias\nDos,dos,1,noticias\n")
+        categorias = os.path.join(directorio, "categorias.jsonl")
+        with open(categorias, "w", encoding="utf-8") as archivo:
+            archivo.write(json.dumps({"nombre": "Cat", "desc": "d", "paginas": "uno|dos"}) + "\n\n")
+
+        out = StringIO()
+        call_command("importar_blog", "--categorias", categorias, "--paginas", paginas, stdout=out)
+        self.assertIn("paginas: 2 creados", out.getvalue())
+        self.assertEqual(Categoria.objects.get(nombre="Cat").paginas.count(), 2)
+        with self.assertRaises(CommandError):
+            call_command("importar_blog", stdout=out)
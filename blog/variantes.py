@@ -0,0 +1,157 @@
+# blog/variantes.py
+"""
+Variantes redimensionadas de las imágenes subidas (miniaturas, logo y subidas de CKEditor).
+
+Para `thumbnails/foto.png` se generan, al lado del original:
+    thumbnails/foto.png.w320.webp   thumbnails/foto.png.w320.jpg
+    thumbnails/foto.png.w640.webp   thumbnails/foto.png.w640.jpg   ...
+solo para los anchos menores al de la imagen original. El nombre conserva la extensión
+del original: `foto.png` y `foto.jpg` en la misma carpeta no comparten variantes. Se generan con la cola de
+tareas al subir la imagen (las anteriores: `manage.py generar_variantes`) y se
+borran junto con el original (blog/limpieza.py).
+
+Las plantillas usan `{% imagen_responsiva %}` / `{% srcset %}` (blog/templatetags/imagenes.py),
+que solo consultan `manifiesto()`: si las variantes todavía no existen se usa el original.
+"""
+import io
+import logging
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp")
+# extensión -> (formato de Pillow, opciones de guardado)
+FORMATOS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "progressive": True, "optimize": True}),
+}
+CLAVE_MANIFIESTO = "variantes:{nombre}"
+# en la caché, en lugar del manifiesto: las variantes todavía no están (o fallaron)
+SIN_VARIANTES = "sin_variantes"
+_PATRON_VARIANTE = re.compile(r"\.w\d+\.(webp|jpg)$")
+
+
+def anchos():
+    return tuple(getattr(settings, "IMAGEN_VARIANTES_ANCHOS", (320, 640, 1024)))
+
+
+def es_imagen(nombre):
+    """Imagen original (no una variante ya generada)."""
+    return bool(nombre) and nombre.lower().endswith(EXTENSIONES) and not _PATRON_VARIANTE.search(nombre)
+
+
+def nombre_variante(nombre, ancho, formato):
+    """`thumbnails/foto.png`, 320, "webp" -> `thumbnails/foto.png.w320.webp`."""
+    return f"{nombre}.w{ancho}.{formato}"
+
+
+def base_de_variante(nombre):
+    """`thumbnails/foto.png.w320.webp` -> `thumbnails/foto.png` (el original); None si no es una variante."""
+    variante = _PATRON_VARIANTE.search(nombre)
+    return nombre[:variante.start()] if variante else None
+
+
+def nombres_variantes(nombre):
+    return [nombre_variante(nombre, ancho, formato) for ancho in anchos() for formato in FORMATOS]
+
+
+def generar_variantes(nombre, storage=default_storage):
+    """
+    Crea las variantes que falten y devuelve el manifiesto {'ancho': original, 'anchos': [...]}.
+    Se omiten los anchos iguales o mayores al original (no se agranda).
+    """
+    with storage.open(nombre, "rb") as archivo:
+        imagen = Image.open(archivo)
+        imagen.load()
+    imagen = ImageOps.exif_transpose(imagen)
+    ancho_original = imagen.width
+    generados = []
+    for ancho in anchos():
+        if ancho >= ancho_original:
+            continue
+        alto = max(round(imagen.height * ancho / ancho_original), 1)
+        reducida = None
+        for formato, (formato_pil, opciones) in FORMATOS.items():
+            destino = nombre_variante(nombre, ancho, formato)
+            if storage.exists(destino):
+                continue
+            if reducida is None:
+                reducida = imagen.convert("RGBA" if imagen.mode in ("RGBA", "LA", "P") else "RGB")
+                reducida = reducida.resize((ancho, alto), Image.LANCZOS)
+            salida = reducida.convert("RGB") if formato_pil == "JPEG" else reducida
+            buffer = io.BytesIO()
+            salida.save(buffer, formato_pil, **opciones)
+            guardado = storage.save(destino, ContentFile(buffer.getvalue()))
+            if guardado != destino:
+                # el storage renombró (carrera con otro worker): no dejar duplicados
+                storage.delete(guardado)
+        generados.append(ancho)
+
+    datos = {"ancho": ancho_original, "anchos": generados}
+    cache.set(CLAVE_MANIFIESTO.format(nombre=nombre), datos, None)
+    return datos
+
+
+def manifiesto(nombre, storage=default_storage):
+    """
+    Manifiesto de variantes listas para `nombre`, o None si faltan.
+    Se resuelve desde la caché; si no está (p. ej. se vació), se lee solo el encabezado de
+    la imagen. Lo llaman las plantillas: no encola nada, y si faltan variantes lo recuerda
+    unos segundos (IMAGEN_VARIANTES_REVISAR) para no ir al storage en cada request.
+    """
+    if not es_imagen(nombre):
+        return None
+    clave = CLAVE_MANIFIESTO.format(nombre=nombre)
+    datos = cache.get(clave)
+    if datos == SIN_VARIANTES:
+        return None
+    if datos is not None:
+        return datos
+    try:
+        with storage.open(nombre, "rb") as archivo:
+            ancho_original = Image.open(archivo).width
+    except (OSError, ValueError):
+        ancho_original = None
+    esperados = [ancho for ancho in anchos() if ancho_original and ancho < ancho_original]
+    if ancho_original and all(storage.exists(nombre_variante(nombre, ancho, formato))
+                              for ancho in esperados for formato in FORMATOS):
+        datos = {"ancho": ancho_original, "anchos": esperados}
+        cache.set(clave, datos, None)
+        return datos
+    cache.set(clave, SIN_VARIANTES, getattr(settings, "IMAGEN_VARIANTES_REVISAR", 60))
+    return None
+
+
+def borrar_variantes(nombre, storage=default_storage):
+    """Borra las variantes de `nombre` (si las hay) y su manifiesto."""
+    if not es_imagen(nombre):
+        return
+    for variante in nombres_variantes(nombre):
+        try:
+            storage.delete(variante)
+        except Exception:
+            logger.warning("No se pudo borrar la variante %s", variante, exc_info=True)
+    cache.delete(CLAVE_MANIFIESTO.format(nombre=nombre))
+
+    from .tareas import olvidar_variantes
+    olvidar_variantes(nombre)
+
+
+class AlmacenamientoConVariantes(FileSystemStorage):
+    """
+    Storage para las subidas de CKEditor (CKEDITOR_5_FILE_STORAGE):
+    igual que FileSystemStorage, pero encola las variantes de cada imagen subida.
+    """
+
+    def save(self, name, content, max_length=None):
+        nombre = super().save(name, content, max_length=max_length)
+        if es_imagen(nombre):
+            from .tareas import encolar_variantes
+            encolar_variantes(nombre)
+        return nombre
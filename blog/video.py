@@ -0,0 +1,159 @@
+# blog/video.py
+"""
+Versión "web" de los videos subidos: MP4 con el índice (átomo moov) al principio,
+para que el navegador empiece a reproducir sin descargar el archivo entero.
+
+- Si hay ffmpeg (settings.VIDEO_FFMPEG) se usa: remux sin recodificar, o
+  recodificación con bitrate máximo si settings.VIDEO_BITRATE_MAXIMO está definido.
+- Si no, se reubica el moov en Python puro (mismo algoritmo que qt-faststart):
+  se copia delante de los datos y se corrigen los offsets de las tablas stco/co64.
+
+`optimizar_video(origen, destino)` devuelve True si escribió `destino`, o False si
+no hacía falta (ya era fast start) o el formato no está soportado.
+"""
+import logging
+import os
+import shutil
+import struct
+import subprocess
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TAMANIO_BLOQUE = 1024 * 1024
+# moov de más de esto no se carga en memoria (no es un video razonable para el sitio)
+MOOV_MAXIMO = 64 * 1024 * 1024
+# Átomos que contienen otros átomos y pueden llevar (dentro) tablas de offsets
+CONTENEDORES = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts", b"dinf", b"udta"}
+
+
+class FormatoNoSoportado(Exception):
+    pass
+
+
+# region atomos
+def leer_atomos(archivo):
+    """Lista de (tipo, offset, tamaño) de los átomos de primer nivel del archivo."""
+    atomos = []
+    archivo.seek(0, os.SEEK_END)
+    total = archivo.tell()
+    offset = 0
+    while offset + 8 <= total:
+        archivo.seek(offset)
+        tamanio, tipo = struct.unpack(">I4s", archivo.read(8))
+        if tamanio == 1:
+            tamanio = struct.unpack(">Q", archivo.read(8))[0]
+        elif tamanio == 0:
+            tamanio = total - offset
+        if tamanio < 8 or offset + tamanio > total:
+            raise FormatoNoSoportado(f"Átomo {tipo!r} inválido en {offset}")
+        atomos.append((tipo, offset, tamanio))
+        offset += tamanio
+    return atomos
+
+
+def _corregir_offsets(datos, inicio, fin, desplazamiento):
+    """Suma `desplazamiento` a las tablas stco/co64 dentro de datos[inicio:fin] (in place)."""
+    posicion = inicio
+    while posicion + 8 <= fin:
+        tamanio, tipo = struct.unpack_from(">I4s", datos, posicion)
+        cabecera = 8
+        if tamanio == 1:
+            tamanio = struct.unpack_from(">Q", datos, posicion + 8)[0]
+            cabecera = 16
+        if tamanio < cabecera or posicion + tamanio > fin:
+            raise FormatoNoSoportado(f"Átomo {tipo!r} inválido dentro de moov")
+
+        if tipo in CONTENEDORES:
+            _corregir_offsets(datos, posicion + cabecera, posicion + tamanio, desplazamiento)
+        elif tipo in (b"stco", b"co64"):
+            cantidad = struct.unpack_from(">I", datos, posicion + cabecera + 4)[0]
+            formato, ancho = (">I", 4) if tipo == b"stco" else (">Q", 8)
+            entrada = posicion + cabecera + 8
+            for _ in range(cantidad):
+                valor = struct.unpack_from(formato, datos, entrada)[0] + desplazamiento
+                if tipo == b"stco" and valor > 0xFFFFFFFF:
+                    raise FormatoNoSoportado("Los offsets no entran en stco de 32 bits")
+                struct.pack_into(formato, datos, entrada, valor)
+                entrada += ancho
+        posicion += tamanio
+
+
+def _copiar(origen, destino, offset, tamanio):
+    origen.seek(offset)
+    restante = tamanio
+    while restante > 0:
+        bloque = origen.read(min(TAMANIO_BLOQUE, restante))
+        if not bloque:
+            break
+        destino.write(bloque)
+        restante -= len(bloque)
+#endregion
+
+
+def mover_moov_al_inicio(origen, destino):
+    """
+    Fast start en Python puro. Devuelve False si el moov ya estaba antes de los datos.
+    Lanza FormatoNoSoportado si el archivo no es un MP4/MOV que se pueda reordenar.
+    """
+    with open(origen, "rb") as entrada:
+        atomos = leer_atomos(entrada)
+        tipos = [tipo for tipo, _, _ in atomos]
+        if b"moov" not in tipos or b"mdat" not in tipos:
+            raise FormatoNoSoportado("No es un MP4 (faltan moov o mdat)")
+        moov = atomos[tipos.index(b"moov")]
+        mdats = [a for a in atomos if a[0] == b"mdat"]
+        if moov[1] < mdats[0][1]:
+            return False
+        if moov[1] < mdats[-1][1]:
+            raise FormatoNoSoportado("moov entre dos mdat")
+        if moov[2] > MOOV_MAXIMO:
+            raise FormatoNoSoportado("moov demasiado grande")
+
+        entrada.seek(moov[1])
+        datos = bytearray(entrada.read(moov[2]))
+        cabecera = 16 if struct.unpack_from(">I", datos, 0)[0] == 1 else 8
+        # todo lo que estaba antes del moov (desde el primer mdat) se corre moov[2] bytes
+        _corregir_offsets(datos, cabecera, len(datos), moov[2])
+
+        with open(destino, "wb") as salida:
+            for tipo, offset, tamanio in atomos:
+                if tipo == b"moov":
+                    continue
+                if offset == mdats[0][1]:
+                    salida.write(datos)
+                _copiar(entrada, salida, offset, tamanio)
+    return True
+
+
+def _ffmpeg(origen, destino):
+    binario = shutil.which(getattr(settings, "VIDEO_FFMPEG", "ffmpeg") or "")
+    if not binario:
+        return False
+    comando = [binario, "-y", "-v", "error", "-i", origen]
+    bitrate = getattr(settings, "VIDEO_BITRATE_MAXIMO", None)
+    if bitrate:
+        comando += ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+                    "-maxrate", bitrate, "-bufsize", bitrate, "-c:a", "aac", "-b:a", "128k"]
+    else:
+        comando += ["-c", "copy"]
+    comando += ["-movflags", "+faststart", "-f", "mp4", destino]
+    subprocess.run(comando, check=True, capture_output=True,
+                   timeout=getattr(settings, "VIDEO_FFMPEG_TIMEOUT", 60 * 60))
+    return True
+
+
+def optimizar_video(origen, destino):
+    """Escribe en `destino` la versión fast start de `origen`. False si no hace falta o no se puede."""
+    try:
+        if _ffmpeg(origen, destino):
+            return True
+    except (subprocess.SubprocessError, OSError) as exc:
+        logger.warning("ffmpeg no pudo optimizar %s, se intenta en Python: %s", origen, exc)
+
+    try:
+        return mover_moov_al_inicio(origen, destino)
+    except (FormatoNoSoportado, struct.error) as exc:
+        logger.info("No se optimiza %s: %s", origen, exc)
+        return False
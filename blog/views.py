@@ -1,35 +1,32 @@
 from django.shortcuts import redirect, render
 from django.contrib import messages
+from django.db.models import Count, Max, Prefetch
 from AppPagina.models import Pagina
+from mainApp.decorators import cache_publico
+from mainApp.cache_publico import render_condicional
 from .models import Categoria, Articulo, SubCategoria
-import re
-import html
-from django.utils.html import strip_tags
+from .paginacion import pagina_por_cursor
 
 # ------------------------------
 # Listar artículos (pública)
 # ------------------------------
+@cache_publico
 def listar_articulos(request):
     # Sólo artículos públicos cuya categoría también sea pública
-    lista = Articulo.objects.filter(publico=True, categoria__publico=True)
+    lista = (
+        Articulo.objects.filter(publico=True, categoria__publico=True)
+        .select_related('categoria')
+        # solo lo que muestra la plantilla: nunca el cuerpo de CKEditor
+        .only('id', 'titulo', 'imagen', 'creacion', 'categoria__id', 'categoria__nombre')
+    )
+    articulos, siguiente = pagina_por_cursor(lista, request.GET.get('despues'))
     return render(request, "articulos/articulos.html", {
         "titulo": "Artículos",
-        "lista_art": lista
+        "lista_art": articulos,
+        "cursor_siguiente": siguiente,
+        "es_primera_pagina": not request.GET.get('despues'),
     })
 
-def esta_vacio(html_text):
-    if not html_text:
-        return False
-    # quitar etiquetas html
-    text = strip_tags(html_text)
-    # decodificar entidades como &nbsp;
-    text = html.unescape(text)
-    # convertir NBSP unicode a espacio y quitar espacios / caracteres invisibles
-    text = text.replace('\xa0', ' ').replace('&nbsp;', ' ')
-    # borrar cualquier whitespace y caracteres zero-width
-    text = re.sub(r'[\s\u200B]+', '', text)
-    return bool(text)
-
 
 # ------------------------------
 # Validación de subcategoría
@@ -46,7 +43,7 @@ def validacion_subcategoria(subcategoria, pagina):
 
     articulos = Articulo.objects.filter(
         subcategoria=subcategoria,
-        tipo=pagina.tipo,
+        tipo_id=pagina.tipo_id,
         publico=True,
         categoria__publico=True,
         categoria__paginas=pagina  # asegurar asociación categoría <-> página
@@ -60,13 +57,56 @@ def validacion_subcategoria(subcategoria, pagina):
     ])
 
 
+def huella_articulos(articulos):
+    """
+    Resumen de un listado para su ETag: última modificación y cantidad de artículos.
+    La cantidad cubre las bajas, que no cambian la fecha máxima.
+    """
+    datos = articulos.aggregate(ultima=Max('ultima_modificacion'), cantidad=Count('id'))
+    ultima = datos['ultima'].isoformat() if datos['ultima'] else ''
+    return f"{ultima}:{datos['cantidad']}"
+
+
+def pagina_articulos(request, articulos):
+    """
+    Página del listado pedida con ?despues= y el contexto de paginación para
+    procesar_articulos.html. Las filas traen el tipo y la categoría en la misma
+    consulta y nunca el cuerpo de CKEditor, así que las consultas no dependen
+    de la cantidad de artículos.
+    """
+    cursor = request.GET.get('despues')
+    lista, siguiente = pagina_por_cursor(
+        articulos.select_related('tipo', 'categoria').defer('contenido'), cursor
+    )
+    return lista, {
+        'cursor_siguiente': siguiente,
+        'es_primera_pagina': not cursor,
+    }
+
+
+def subcategorias_visibles(categoria, pagina):
+    """
+    Subcategorías públicas de `categoria` para `pagina`. Como toda subcategoría
+    pública ya pasa `validacion_subcategoria`, alcanza con el filtro: no hace
+    falta mirar videos, descripción ni artículos.
+    """
+    return (
+        SubCategoria.objects
+        .filter(categoria=categoria, publico=True, categoria__publico=True)
+        # procesar_subcategorias.html recorre art.categoria.paginas: traerlas de una vez
+        .select_related('categoria')
+        .prefetch_related(Prefetch('categoria__paginas', queryset=Pagina.objects.only('id', 'slug')))
+    )
+
+
 # ------------------------------
 # Cargar página de categorías
 # ------------------------------
+@cache_publico
 def cargar_Pcategorias(request, Pagina_slug, Categoria_id):
     try:
         # Forzar que la página sea pública
-        N_pagina = Pagina.objects.get(slug=Pagina_slug, publico=True)
+        N_pagina = Pagina.objects.defer('contenido').get(slug=Pagina_slug, publico=True)
     except Pagina.DoesNotExist:
         messages.error(request, "No se encontró esa página.")
         return redirect("N_inicio")
@@ -78,45 +118,41 @@ def cargar_Pcategorias(request, Pagina_slug, Categoria_id):
         messages.error(request, "No se encontró esa categoría para la página indicada.")
         return redirect("N_inicio")
 
-    # Sólo subcategorías públicas cuya categoría es la verificada
-    sub_categoriaA = SubCategoria.objects.filter(categoria=categoria, publico=True)
-
-    if sub_categoriaA.exists():
-        # Filtramos por contenido válido (validacion_subcategoria ya comprueba articulos públicos y asociación con la página)
-        sub_categoriaB = [sub for sub in sub_categoriaA if validacion_subcategoria(sub, N_pagina)]
+    # Subcategorías públicas de la categoría verificada (todas pasan validacion_subcategoria)
+    sub_categoriaB = list(subcategorias_visibles(categoria, N_pagina))
 
-        if not sub_categoriaB:
-            messages.error(request, f"No se han cargado elementos en {categoria.nombre}")
-            if esta_vacio(N_pagina.contenido):
-                return redirect("N_pagina", N_pagina.slug)
-            return redirect("N_inicio")
-
-        return render(request, 'categorias/categoria.html', {
+    if sub_categoriaB:
+        # Las subcategorías no tienen fecha propia: sus cambios ya mueven la versión de la navegación
+        return render_condicional(request, 'categorias/categoria.html', {
             'v_categoria': categoria,
             'v_cat_pagina': N_pagina.titulo,
             'v_cat_subcategorias': sub_categoriaB,
-        })
+        }, huella=[s.pk for s in sub_categoriaB])
 
     # Cuando no hay subcategorías públicas: comprobar artículos públicos en la categoría
     # Aseguramos además que la categoría esté asociada a la página (ya lo hicimos arriba)
     v_cat_articulos_qs = Articulo.objects.filter(
         categoria=categoria,
-        tipo=N_pagina.tipo,
+        tipo_id=N_pagina.tipo_id,
         publico=True,
         categoria__publico=True,
         categoria__paginas=N_pagina  # redundante por 'categoria', pero clara la intención
     )
 
-    if v_cat_articulos_qs.exists():
-        return render(request, 'categorias/categoria.html', {
+    v_cat_articulos, paginacion = pagina_articulos(request, v_cat_articulos_qs)
+
+    # una página vacía más allá del final no significa que la categoría esté vacía
+    if v_cat_articulos or (not paginacion['es_primera_pagina'] and v_cat_articulos_qs.exists()):
+        return render_condicional(request, 'categorias/categoria.html', {
             'v_categoria': categoria,
             'v_cat_pagina': N_pagina.titulo,
-            'v_cat_articulos': v_cat_articulos_qs,
-        })
+            'v_cat_articulos': v_cat_articulos,
+            **paginacion,
+        }, huella=huella_articulos(v_cat_articulos_qs))
 
     else:
         messages.error(request, f"No se han cargado elementos en {categoria.nombre}")
-        if esta_vacio(N_pagina.contenido):
+        if N_pagina.tiene_contenido:
             return redirect("N_pagina", N_pagina.slug)
         return redirect("N_inicio")
 
@@ -124,10 +160,11 @@ def cargar_Pcategorias(request, Pagina_slug, Categoria_id):
 # ------------------------------
 # Cargar página de subcategorías
 # ------------------------------
+@cache_publico
 def cargar_Psubcategorias(request, Pagina_slug, SubCategoria_slug):
     try:
         # Forzar que la página sea pública
-        pagina = Pagina.objects.get(slug=Pagina_slug, publico=True)
+        pagina = Pagina.objects.defer('contenido').get(slug=Pagina_slug, publico=True)
     except Pagina.DoesNotExist:
         messages.error(request, "No se encontró esa página.")
         return redirect("N_inicio")
@@ -135,7 +172,7 @@ def cargar_Psubcategorias(request, Pagina_slug, SubCategoria_slug):
     try:
         # Forzar que la subcategoría sea pública, que su categoría sea pública
         # y que esa categoría esté asociada a la página (evita accesos desde páginas no relacionadas)
-        subcategoria = SubCategoria.objects.get(
+        subcategoria = SubCategoria.objects.select_related('categoria').get(
             slug=SubCategoria_slug,
             publico=True,
             categoria__publico=True,
@@ -148,34 +185,39 @@ def cargar_Psubcategorias(request, Pagina_slug, SubCategoria_slug):
     # Sólo artículos públicos cuya categoría esté asociada a la página (seguridad doble)
     articulos = Articulo.objects.filter(
         subcategoria=subcategoria,
-        tipo=pagina.tipo,
+        tipo_id=pagina.tipo_id,
         publico=True,
         categoria__publico=True,
         categoria__paginas=pagina
     )
 
+    v_subcat_art, paginacion = pagina_articulos(request, articulos)
+
     # Si no hay contenido visible en la subcategoría, respetar la lógica de redirección
-    if not (subcategoria.publico or subcategoria.video_file or subcategoria.video_url or subcategoria.desc or articulos.exists()):
+    if not (subcategoria.publico or subcategoria.video_file or subcategoria.video_url or subcategoria.desc
+            or v_subcat_art or (not paginacion['es_primera_pagina'] and articulos.exists())):
         messages.error(request, f"No se han cargado elementos en {subcategoria.nombre}")
         # Redirigir a la página si tiene contenido, o a inicio
-        if esta_vacio(pagina.contenido):
+        if pagina.tiene_contenido:
             return redirect("N_pagina", pagina.slug)
         return redirect("N_inicio")
 
-    return render(request, "subcategorias/subcategoria.html", {
+    return render_condicional(request, "subcategorias/subcategoria.html", {
         "v_subcategoria": subcategoria,
-        "v_subcat_art": articulos,
+        "v_subcat_art": v_subcat_art,
         "v_subcat_pagina": pagina.titulo,
-    })
+        **paginacion,
+    }, huella=huella_articulos(articulos))
 
 
 # ------------------------------
 # Cargar detalle de artículo
 # ------------------------------
+@cache_publico
 def cargar_Darticulo(request, Pagina_slug, Articulo_id):
     try:
         # Forzar que la página sea pública
-        pagina = Pagina.objects.get(slug=Pagina_slug, publico=True)
+        pagina = Pagina.objects.defer('contenido').get(slug=Pagina_slug, publico=True)
     except Pagina.DoesNotExist:
         messages.error(request, "No se encontró esa página.")
         return redirect("N_inicio")
@@ -183,9 +225,9 @@ def cargar_Darticulo(request, Pagina_slug, Articulo_id):
     try:
         # Forzar que el artículo sea público, que su categoría sea pública,
         # y que esa categoría esté asociada a la página (impide acceso desde páginas no relacionadas)
-        articulo = Articulo.objects.get(
+        articulo = Articulo.objects.select_related('tipo', 'categoria', 'subcategoria').get(
             id=Articulo_id,
-            tipo=pagina.tipo,
+            tipo_id=pagina.tipo_id,
             publico=True,
             categoria__publico=True,
             categoria__paginas=pagina
@@ -200,6 +242,6 @@ def cargar_Darticulo(request, Pagina_slug, Articulo_id):
         messages.error(request, "El artículo no esta disponible.")
         return redirect("N_inicio")
 
-    return render(request, 'articulo/articulo_detalle.html', {
+    return render_condicional(request, 'articulo/articulo_detalle.html', {
         'v_articulo': articulo,
-    })
+    }, fechas=[articulo.ultima_modificacion])
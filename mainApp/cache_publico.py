@@ -0,0 +1,180 @@
+# mainApp/cache_publico.py
+"""
+Caché de respuestas completas para las vistas públicas.
+
+Solo se cachean requests GET/HEAD de visitantes anónimos (sin cookie de sesión
+ni de mensajes) que terminan en un 200 sin cookies. La clave incluye:
+  - la versión de la navegación (cualquier cambio del menú invalida todo el sitio),
+  - una "generación" por ruta, que se incrementa al purgar esa ruta
+    (así se descartan también sus variantes con query string, p. ej. paginación).
+
+También genera los validadores HTTP (ETag / Last-Modified) de esas mismas vistas
+para responder 304 a los GET condicionales antes de renderizar la plantilla.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+logger = logging.getLogger(__name__)
+
+PREFIJO = "pagina_publica"
+COOKIE_MENSAJES = "messages"
+ESTADISTICAS = ("hits", "misses", "purgas")
+
+
+def _cache():
+    return caches[getattr(settings, "CACHE_PUBLICO_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "CACHE_PUBLICO_TIMEOUT", 60 * 10)
+
+
+def _hash(texto):
+    return hashlib.md5(texto.encode("utf-8")).hexdigest()
+
+
+def _clave_generacion(path):
+    return f"{PREFIJO}:gen:{_hash(path)}"
+
+
+def _clave_respuesta(request):
+    from blog.navegacion import version_actual
+
+    generacion = _cache().get(_clave_generacion(request.path)) or 0
+    recurso = _hash(request.get_host() + request.get_full_path())
+    return f"{PREFIJO}:{version_actual()}:{generacion}:{recurso}"
+
+
+def _con_estadisticas():
+    return getattr(settings, "CACHE_PUBLICO_ESTADISTICAS", False)
+
+
+def _contar(nombre):
+    # dos escrituras en la caché por request: solo si se pidieron las estadísticas
+    if not _con_estadisticas():
+        return
+    cache = _cache()
+    clave = f"{PREFIJO}:stats:{nombre}"
+    cache.add(clave, 0, None)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # la clave expiró entre add() e incr(): no vale la pena reintentar
+        pass
+
+
+def es_anonimo(request):
+    """GET/HEAD sin cookie de sesión ni de mensajes: la respuesta es la misma para cualquiera."""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    cookies = request.COOKIES
+    return settings.SESSION_COOKIE_NAME not in cookies and COOKIE_MENSAJES not in cookies
+
+
+def es_cacheable(request):
+    """Requests que pueden responderse desde (o guardarse en) la caché."""
+    return _timeout() > 0 and es_anonimo(request)
+
+
+def obtener(request):
+    """Respuesta cacheada para el request, o None."""
+    response = _cache().get(_clave_respuesta(request))
+    _contar("hits" if response is not None else "misses")
+    if response is not None:
+        response["X-Cache"] = "HIT"
+        # la respuesta cacheada ya trae sus validadores: contestar 304 si corresponde
+        response = get_conditional_response(
+            request,
+            etag=response.get("ETag"),
+            last_modified=parse_http_date_safe(response.get("Last-Modified", "")),
+            response=response,
+        )
+    return response
+
+
+def guardar(request, response):
+    """Guarda la respuesta si es la misma para cualquier visitante anónimo."""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return
+    if "private" in response.get("Cache-Control", "") or "no-store" in response.get("Cache-Control", ""):
+        return
+    # mensajes mostrados en este mismo render, token CSRF o sesión nueva: la página no es genérica
+    storage = getattr(request, "_messages", None)
+    if storage is not None and len(storage):
+        return
+    if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return
+    session = getattr(request, "session", None)
+    if session is not None and session.modified:
+        return
+    response["X-Cache"] = "MISS"
+    _cache().set(_clave_respuesta(request), response, _timeout())
+
+
+def purgar(*paths):
+    """Descarta las respuestas cacheadas de las rutas indicadas (con cualquier query string)."""
+    cache = _cache()
+    for path in set(paths):
+        clave = _clave_generacion(path)
+        cache.add(clave, 0, None)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, None)
+        _contar("purgas")
+    if paths:
+        logger.debug("Caché pública purgada: %s", ", ".join(sorted(set(paths))))
+
+
+def estadisticas():
+    """
+    Contadores de hits, misses y purgas del proceso/caché actual, más la tasa de aciertos.
+    None si settings.CACHE_PUBLICO_ESTADISTICAS está apagado (no se cuentan).
+    """
+    if not _con_estadisticas():
+        return None
+    valores = _cache().get_many([f"{PREFIJO}:stats:{nombre}" for nombre in ESTADISTICAS])
+    datos = {nombre: valores.get(f"{PREFIJO}:stats:{nombre}", 0) for nombre in ESTADISTICAS}
+    consultas = datos["hits"] + datos["misses"]
+    datos["tasa_hits"] = round(datos["hits"] / consultas, 3) if consultas else 0.0
+    return datos
+
+
+def render_condicional(request, template_name, context, fechas=(), huella=""):
+    """
+    render() con soporte de GET condicional para visitantes anónimos.
+
+    - fechas: modificación de los objetos mostrados. Si hay, se envía Last-Modified
+      (la más reciente entre ellas y la versión de la navegación).
+    - huella: datos extra que cambian el contenido sin cambiar las fechas
+      (p. ej. la cantidad de artículos de un listado); solo afecta la ETag.
+
+    Si el cliente ya tiene la versión vigente se devuelve 304 sin renderizar.
+    """
+    if not es_anonimo(request):
+        return render(request, template_name, context)
+
+    from blog.navegacion import version_actual
+
+    version = version_actual()
+    fechas = [f for f in fechas if f]
+    partes = [str(version), request.get_full_path(), str(huella)] + [f.isoformat() for f in fechas]
+    etag = quote_etag(_hash("|".join(partes)))
+    last_modified = None
+    if fechas:
+        # la versión está en milisegundos: redondear hacia arriba al segundo
+        last_modified = max(int(max(fechas).timestamp()), -(-version // 1000))
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render(request, template_name, context)
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
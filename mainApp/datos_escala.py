@@ -0,0 +1,221 @@
+# mainApp/datos_escala.py
+"""
+Datos sintéticos en volumen para medir rendimiento (manage.py seed --scale N).
+
+Todo sale de un `random.Random(semilla)`: la misma semilla y la misma escala generan
+exactamente los mismos títulos, contenidos, publicaciones y fechas, así una medición
+se puede repetir en otra máquina. Se inserta con bulk_create por lotes, sin pasar por
+save() ni por las señales, así que acá se calcula lo que harían ellos (slugs únicos,
+resumen de las páginas) y al final se invalida la navegación una sola vez.
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils.text import slugify
+
+from AppPagina.models import Pagina, texto_plano, LARGO_EXTRACTO
+from blog.models import Articulo, Categoria, SubCategoria, Tipo
+
+PALABRAS = (
+    "canción guitarra poema escenario gira disco entrevista recuerdo camino pueblo viaje "
+    "amigo silencio palabra libertad historia concierto radio teatro cuaderno carta tiempo "
+    "memoria esperanza verdad infancia madre río montaña ciudad noche mañana invierno "
+    "verano público aplauso grabación letra melodía homenaje festival exilio regreso"
+).split()
+ETIQUETAS = ("strong", "em", "u")
+# fechas de creación repartidas hacia atrás desde este momento (fijo: no depende del día)
+FECHA_BASE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+DIAS_HACIA_ATRAS = 5 * 365
+
+
+def tamanios(escala, paginas=None, categorias=None, subcategorias=None):
+    """Cantidades por modelo para `escala` artículos (las explícitas tienen prioridad)."""
+    paginas = paginas or min(max(escala // 2000, 3), 50)
+    categorias = categorias or min(max(escala // 200, 5), 2000)
+    return {
+        "paginas": paginas,
+        "tipos": paginas,
+        "categorias": categorias,
+        "subcategorias": subcategorias if subcategorias is not None else categorias * 3,
+        "articulos": escala,
+    }
+
+
+# region texto
+def frase(rng, minimo, maximo):
+    return " ".join(rng.choice(PALABRAS) for _ in range(rng.randint(minimo, maximo))).capitalize()
+
+
+def parrafo(rng):
+    palabras = [rng.choice(PALABRAS) for _ in range(rng.randint(25, 70))]
+    # algo de formato en línea, como el que deja CKEditor
+    for _ in range(rng.randint(0, 3)):
+        i = rng.randrange(len(palabras))
+        etiqueta = rng.choice(ETIQUETAS)
+        palabras[i] = f"<{etiqueta}>{palabras[i]}</{etiqueta}>"
+    if rng.random() < 0.3:
+        i = rng.randrange(len(palabras))
+        palabras[i] = f'<a href="https://example.com/{palabras[i]}">{palabras[i]}</a>'
+    return f"<p>{' '.join(palabras).capitalize()}.</p>"
+
+
+def contenido_html(rng, bloques=(3, 8)):
+    """HTML con la forma del que genera CKEditor 5: títulos, párrafos, listas y citas."""
+    partes = []
+    for _ in range(rng.randint(*bloques)):
+        tipo = rng.random()
+        if tipo < 0.15:
+            partes.append(f"<h2>{frase(rng, 2, 6)}</h2>")
+        elif tipo < 0.25:
+            items = "".join(f"<li>{frase(rng, 2, 8)}</li>" for _ in range(rng.randint(2, 5)))
+            partes.append(f"<ul>{items}</ul>")
+        elif tipo < 0.3:
+            partes.append(f"<blockquote><p>{frase(rng, 8, 20)}</p></blockquote>")
+        else:
+            partes.append(parrafo(rng))
+    return "".join(partes)
+#endregion
+
+
+@contextmanager
+def fechas_propias(modelo, *campos):
+    """Desactiva auto_now/auto_now_add de `campos` para poder insertar fechas elegidas."""
+    originales = []
+    for nombre in campos:
+        campo = modelo._meta.get_field(nombre)
+        originales.append((campo, campo.auto_now, campo.auto_now_add))
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in originales:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def muestra_publica():
+    """
+    (artículo, página) visibles en todas las vistas públicas: artículo, categoría y
+    subcategoría publicados y una página pública de su tipo asociada a la categoría.
+    La página no es la de inicio: su slug vacío no arma las rutas con página.
+    Lo usan los comandos que miden (bench, explicar_consultas). None si no hay.
+    """
+    articulo = (
+        Articulo.objects.filter(publico=True, categoria__publico=True, subcategoria__publico=True,
+                                tipo__isnull=False, categoria__paginas__publico=True,
+                                categoria__paginas__tipo=F("tipo"), categoria__paginas__es_inicio=False)
+        .select_related("categoria", "subcategoria").order_by("-creacion", "-id").first()
+    )
+    if articulo is None:
+        return None
+    pagina = (Pagina.objects.filter(publico=True, es_inicio=False, tipo_id=articulo.tipo_id,
+                                    categorias=articulo.categoria_id)
+              .order_by("-tiene_contenido", "orden").first())
+    return articulo, pagina
+
+
+def ya_generado(semilla):
+    return Tipo.objects.filter(slug=f"seed{semilla}-tipo-0").exists()
+
+
+def insertar(modelo, objetos, lote):
+    """bulk_create y devuelve las filas creadas, releídas en orden de inserción (con pk en todas las bases)."""
+    ultima = modelo.objects.aggregate(ultima=Max("id"))["ultima"] or 0
+    modelo.objects.bulk_create(objetos, batch_size=lote)
+    return list(modelo.objects.filter(id__gt=ultima).order_by("id"))
+
+
+@transaction.atomic
+def generar(escala, semilla, usuario, lote=5000, paginas=None, categorias=None, subcategorias=None,
+            progreso=None):
+    """
+    Inserta páginas, tipos, categorías (con sus páginas), subcategorías y `escala` artículos.
+    Devuelve las cantidades creadas por modelo. `progreso(modelo, cantidad)` se llama por lote.
+    """
+    rng = random.Random(semilla)
+    cantidades = tamanios(escala, paginas, categorias, subcategorias)
+    prefijo = f"seed{semilla}"
+    avisar = progreso or (lambda modelo, cantidad: None)
+
+    # los nombres llevan "semilla-i" al final: quedan únicos sin las consultas de save()
+    tipos = insertar(Tipo, [
+        Tipo(nombre=f"Tipo {semilla}-{i}", slug=f"{prefijo}-tipo-{i}", usuario=usuario)
+        for i in range(cantidades["tipos"])
+    ], lote)
+
+    nuevas_paginas = []
+    for i in range(cantidades["paginas"]):
+        contenido = contenido_html(rng) if rng.random() < 0.8 else ""
+        texto = texto_plano(contenido)
+        nuevas_paginas.append(Pagina(
+            titulo=f"Página {semilla}-{i}", slug=f"{prefijo}-pagina-{i}", contenido=contenido,
+            orden=i + 1, publico=rng.random() < 0.9, tipo=tipos[i], usuario=usuario,
+            tiene_contenido=bool(texto), extracto=texto[:LARGO_EXTRACTO],
+        ))
+    if not Pagina.objects.filter(es_inicio=True).exists():
+        # sin página de inicio la portada da 404: la primera generada ocupa ese lugar (como en save())
+        inicio = nuevas_paginas[0]
+        inicio.es_inicio, inicio.slug, inicio.orden, inicio.publico = True, "", 0, True
+    paginas = insertar(Pagina, nuevas_paginas, lote)
+    avisar("Pagina", len(paginas))
+
+    categorias = insertar(Categoria, [
+        Categoria(nombre=f"{frase(rng, 1, 3)[:35]} {semilla}-{i}", desc=frase(rng, 5, 15)[:255],
+                  publico=rng.random() < 0.95, usuario=usuario)
+        for i in range(cantidades["categorias"])
+    ], lote)
+    # cada categoría aparece en una o dos páginas; el tipo de esas páginas decide qué artículos se ven
+    con_categorias = [p for p in paginas if not p.es_inicio] or paginas
+    paginas_de = {}
+    relaciones = []
+    for categoria in categorias:
+        elegidas = rng.sample(con_categorias, min(len(con_categorias), rng.randint(1, 2)))
+        paginas_de[categoria.id] = elegidas
+        relaciones += [Categoria.paginas.through(categoria_id=categoria.id, pagina_id=p.id) for p in elegidas]
+    Categoria.paginas.through.objects.bulk_create(relaciones, batch_size=lote)
+    avisar("Categoria", len(categorias))
+
+    nuevas_subcategorias = []
+    for i in range(cantidades["subcategorias"]):
+        nombre = f"{frase(rng, 1, 4)[:80]} {semilla}-{i}"
+        nuevas_subcategorias.append(SubCategoria(
+            nombre=nombre, slug=f"{prefijo}-{slugify(nombre)}", categoria=rng.choice(categorias),
+            desc=frase(rng, 5, 15)[:255] if rng.random() < 0.5 else None,
+            publico=rng.random() < 0.9, usuario=usuario,
+        ))
+    subcategorias_de = {}
+    for sub in insertar(SubCategoria, nuevas_subcategorias, lote):
+        subcategorias_de.setdefault(sub.categoria_id, []).append(sub.id)
+    avisar("SubCategoria", len(nuevas_subcategorias))
+
+    segundos = DIAS_HACIA_ATRAS * 24 * 60 * 60
+    creados = 0
+    with fechas_propias(Articulo, "creacion", "ultima_modificacion"):
+        while creados < escala:
+            articulos = []
+            for i in range(creados, min(creados + lote, escala)):
+                categoria = rng.choice(categorias)
+                subcategorias_categoria = subcategorias_de.get(categoria.id)
+                creacion = FECHA_BASE - timedelta(seconds=rng.randrange(segundos))
+                articulos.append(Articulo(
+                    titulo=f"{frase(rng, 2, 8)[:80]} {semilla}-{i}",
+                    contenido=contenido_html(rng),
+                    publico=rng.random() < 0.9,
+                    usuario=usuario,
+                    categoria=categoria,
+                    subcategoria_id=(rng.choice(subcategorias_categoria)
+                                     if subcategorias_categoria and rng.random() < 0.7 else None),
+                    tipo_id=rng.choice(paginas_de[categoria.id]).tipo_id,
+                    creacion=creacion,
+                    ultima_modificacion=creacion,
+                ))
+            Articulo.objects.bulk_create(articulos, batch_size=lote)
+            creados += len(articulos)
+            avisar("Articulo", creados)
+
+    # bulk_create no dispara señales: invalidar la navegación a mano
+    from blog.navegacion import invalidar_navegacion
+    invalidar_navegacion()
+    return cantidades
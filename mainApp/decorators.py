@@ -3,6 +3,21 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from django.urls import reverse
 
+from . import cache_publico as _cache_publico
+
+
+def perfil_con_rol(user):
+    """
+    Perfil del usuario con su rol en una sola consulta (None si no tiene).
+    Queda guardado en user.perfil, así las plantillas no vuelven a consultar.
+    """
+    from .models import PerfilUsuario
+
+    perfil = PerfilUsuario.objects.select_related('rol').filter(user_id=user.pk).first()
+    if perfil is not None:
+        user.perfil = perfil
+    return perfil
+
 
 def rol_required(*roles_permitidos):
     """
@@ -24,12 +39,12 @@ def rol_required(*roles_permitidos):
                 login_url = reverse("N_inicio_sesion")
                 return redirect(f"{login_url}?next={request.get_full_path()}")
 
-            
+            # también para el superusuario: el layout muestra el menú según perfil.rol
+            perfil = perfil_con_rol(request.user)
             if request.user.is_superuser:
                 return view_func(request, *args, **kwargs)
 
             
-            perfil = getattr(request.user, 'perfil', None)
             if not perfil or not perfil.rol:
                 messages.warning(
                     request,
@@ -52,3 +67,23 @@ def rol_required(*roles_permitidos):
     return decorator
 
 
+def cache_publico(view_func):
+    """
+    Cachea la respuesta completa de una vista pública para visitantes anónimos.
+    Ver mainApp.cache_publico para las reglas de qué se cachea y cómo se purga.
+    """
+
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not _cache_publico.es_cacheable(request):
+            return view_func(request, *args, **kwargs)
+
+        response = _cache_publico.obtener(request)
+        if response is not None:
+            return response
+
+        response = view_func(request, *args, **kwargs)
+        _cache_publico.guardar(request, response)
+        return response
+
+    return _wrapped_view
@@ -0,0 +1,389 @@
+# mainApp/exportacion.py
+"""
+Exportar e importar todo el contenido del sitio (manage.py export_site / import_site).
+
+Lo exportado es un directorio:
+    contenido.ndjson    una cabecera y después un objeto por línea, con el formato del
+                        serializador "jsonl" de Django (model, pk, fields) más "media":
+                        {campo: sha256} para los campos con archivo y
+                        {campo: {nombre: sha256}} para las imágenes que enlaza el
+                        contenido de CKEditor
+    media/ab/abcd...    cada archivo una sola vez, guardado por el SHA-256 del contenido
+
+Todo se procesa de a un objeto y de a un bloque de archivo: exportar lee la base con
+iterator(chunk_size=...) e importar lee el NDJSON línea por línea, así que la memoria
+no depende del tamaño del contenido (los fixtures con loaddata cargan el JSON entero).
+
+La importación conserva las pk, como loaddata, así que solo se hace en un sitio sin
+contenido (o para seguir una importación cortada del mismo archivo): cada lote es un
+INSERT ... ON CONFLICT DO UPDATE, y repetir un lote no duplica nada. Después de confirmar
+cada lote se anota en el archivo de progreso hasta qué byte del NDJSON se llegó; si se
+corta, volver a correrla sigue desde ahí. Un archivo nunca pisa a otro del storage: si el
+nombre está ocupado por otro contenido se guarda con un nombre libre y la fila apunta a él.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import uuid
+
+from django.apps import apps
+from django.core import serializers
+from django.core.files import File
+from django.core.management.color import no_style
+from django.core.serializers.jsonl import Serializer as SerializadorJsonl
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django_ckeditor_5.fields import CKEditor5Field
+from django_ckeditor_5.storage_utils import get_django_storage_class
+
+from AppPagina.models import Pagina
+from blog.limpieza import reemplazar_urls_media, urls_media
+from blog.models import Articulo, Categoria, Layout, SubCategoria, Tipo
+from mainApp.datos_escala import fechas_propias
+
+logger = logging.getLogger(__name__)
+
+FORMATO = "basicblog-sitio"
+VERSION = 1
+CONTENIDO = "contenido.ndjson"
+MEDIA = "media"
+# en orden de dependencias: al importar, cada modelo solo referencia a los anteriores
+MODELOS = [Tipo, Pagina, Categoria, SubCategoria, Articulo, Layout]
+CHUNK_SIZE = 2000
+LOTE = 500
+BLOQUE = 1024 * 1024
+
+
+class ErrorArchivo(ValueError):
+    """El directorio no es una exportación válida o le falta un archivo."""
+
+
+class SitioConContenido(ValueError):
+    """El sitio de destino ya tiene contenido: importar con las pk del archivo lo pisaría."""
+
+
+def campos_archivo(modelo):
+    return [campo for campo in modelo._meta.concrete_fields if isinstance(campo, models.FileField)]
+
+
+def campos_contenido(modelo):
+    return [campo for campo in modelo._meta.concrete_fields if isinstance(campo, CKEditor5Field)]
+
+
+def storage_contenido():
+    """El storage donde CKEditor guarda las imágenes del contenido."""
+    return get_django_storage_class()()
+
+
+def ruta_media(directorio, digest):
+    return os.path.join(directorio, MEDIA, digest[:2], digest)
+
+
+def sha256(archivo):
+    """SHA-256 de un archivo abierto en binario, leído por bloques."""
+    hasher = hashlib.sha256()
+    for bloque in iter(lambda: archivo.read(BLOQUE), b""):
+        hasher.update(bloque)
+    return hasher.hexdigest()
+
+
+# region exportar
+def copiar_al_almacen(storage, nombre, directorio):
+    """Copia el archivo a media/ por su hash (si no estaba). None si no existe en el storage."""
+    try:
+        origen = storage.open(nombre, "rb")
+    except OSError:
+        return None
+    hasher = hashlib.sha256()
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.join(directorio, MEDIA))
+    try:
+        # hash y copia en la misma pasada
+        with origen, os.fdopen(descriptor, "wb") as copia:
+            for bloque in iter(lambda: origen.read(BLOQUE), b""):
+                hasher.update(bloque)
+                copia.write(bloque)
+        digest = hasher.hexdigest()
+        destino = ruta_media(directorio, digest)
+        if os.path.exists(destino):
+            os.remove(temporal)
+        else:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(temporal, destino)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return digest
+
+
+class Serializador(SerializadorJsonl):
+    """El serializador jsonl de Django, con los archivos de cada objeto copiados al almacén."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.storage_contenido = storage_contenido()
+
+    def copiar(self, storage, nombre, obj):
+        digest = copiar_al_almacen(storage, nombre, self.directorio)
+        if not digest:
+            logger.warning("No se exporta %s de %s %s: no está en el storage", nombre, obj._meta.label, obj.pk)
+        return digest
+
+    def get_dump_object(self, obj):
+        datos = super().get_dump_object(obj)
+        media = {}
+        for campo in campos_archivo(type(obj)):
+            archivo = getattr(obj, campo.name)
+            if archivo:
+                digest = self.copiar(archivo.storage, archivo.name, obj)
+                if digest:
+                    media[campo.name] = digest
+        for campo in campos_contenido(type(obj)):
+            enlazados = {}
+            for nombre in dict.fromkeys(urls_media(getattr(obj, campo.name))):
+                digest = self.copiar(self.storage_contenido, nombre, obj)
+                if digest:
+                    enlazados[nombre] = digest
+            if enlazados:
+                media[campo.name] = enlazados
+        if media:
+            datos["media"] = media
+        return datos
+
+
+def exportar(directorio, chunk_size=CHUNK_SIZE, avisar=None):
+    """Escribe la exportación en `directorio`. Devuelve {etiqueta del modelo: cantidad}."""
+    avisar = avisar or (lambda modelo, cantidad: None)
+    os.makedirs(os.path.join(directorio, MEDIA), exist_ok=True)
+    ruta = os.path.join(directorio, CONTENIDO)
+    cantidades = {}
+    # se escribe aparte y se renombra al final: una exportación cortada no pisa la anterior
+    with open(ruta + ".tmp", "w", encoding="utf-8") as salida:
+        cabecera = {"formato": FORMATO, "version": VERSION, "id": uuid.uuid4().hex,
+                    "fecha": timezone.now().isoformat()}
+        salida.write(json.dumps(cabecera) + "\n")
+        serializador = Serializador(directorio)
+        for modelo in MODELOS:
+            queryset = modelo._default_manager.order_by("pk")
+            if any(campo.name == "usuario" for campo in modelo._meta.fields):
+                # el usuario se exporta por username (natural key): sin esto, una consulta por fila
+                queryset = queryset.select_related("usuario")
+            if modelo._meta.many_to_many:
+                queryset = queryset.prefetch_related(*[campo.name for campo in modelo._meta.many_to_many])
+            contador = [0]
+
+            def contar(objetos):
+                for objeto in objetos:
+                    contador[0] += 1
+                    yield objeto
+
+            serializador.serialize(contar(queryset.iterator(chunk_size=chunk_size)), stream=salida,
+                                   use_natural_foreign_keys=True)
+            cantidades[modelo._meta.label] = contador[0]
+            avisar(modelo._meta.label, contador[0])
+    os.replace(ruta + ".tmp", ruta)
+    return cantidades
+#endregion
+
+
+# region importar
+def leer_cabecera(linea):
+    try:
+        cabecera = json.loads(linea)
+    except ValueError:
+        cabecera = None
+    if not isinstance(cabecera, dict) or cabecera.get("formato") != FORMATO:
+        raise ErrorArchivo(f"{CONTENIDO} no es una exportación de export_site.")
+    if cabecera.get("version") != VERSION:
+        raise ErrorArchivo(f"Versión de exportación no soportada: {cabecera.get('version')}.")
+    return cabecera
+
+
+def leer_progreso(ruta, cabecera):
+    """(posición, filas) donde quedó una importación anterior del mismo archivo, o None."""
+    try:
+        with open(ruta, encoding="utf-8") as archivo:
+            progreso = json.load(archivo)
+    except (OSError, ValueError):
+        return None
+    if progreso.get("id") != cabecera["id"]:
+        return None
+    return progreso["posicion"], progreso["filas"]
+
+
+def guardar_progreso(ruta, cabecera, posicion, filas):
+    with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+        json.dump({"id": cabecera["id"], "posicion": posicion, "filas": filas}, archivo)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def restaurar_archivo(directorio, digest, storage, nombre, max_length=None):
+    """
+    Copia del almacén al storage y devuelve con qué nombre quedó: `nombre` si ya estaba ese
+    mismo contenido o estaba libre; si lo ocupa otro archivo (que no se toca), el nombre
+    libre que elija el storage (get_available_name).
+    """
+    origen = ruta_media(directorio, digest)
+    if not os.path.exists(origen):
+        raise ErrorArchivo(f"Falta {origen} (archivo {nombre}).")
+    if storage.exists(nombre) and storage.size(nombre) == os.path.getsize(origen):
+        with storage.open(nombre, "rb") as existente:
+            if sha256(existente) == digest:
+                return nombre
+    with open(origen, "rb") as archivo:
+        return storage.save(nombre, File(archivo), max_length=max_length)
+
+
+def sitio_con_contenido():
+    # el Layout es un singleton que el sitio crea solo: importarlo reemplaza la configuración
+    return any(modelo._default_manager.exists() for modelo in MODELOS if modelo is not Layout)
+
+
+class Importacion:
+    """Estado de una corrida de import_site: usuarios resueltos y lote pendiente."""
+
+    def __init__(self, directorio, usuario=None, lote=LOTE):
+        self.directorio = directorio
+        self.usuario = usuario
+        self.lote = lote
+        self.cantidades = {}
+        self._usuarios = {}
+        self._storage_contenido = storage_contenido()
+
+    def usuario_id(self, natural_key):
+        """pk del usuario por username; si no existe en este sitio, el usuario por defecto."""
+        if natural_key is None:
+            return None
+        username = natural_key[0]
+        if username not in self._usuarios:
+            User = apps.get_model("auth", "User")
+            pk = User._default_manager.filter(username=username).values_list("pk", flat=True).first()
+            self._usuarios[username] = pk or (self.usuario.pk if self.usuario else None)
+        return self._usuarios[username]
+
+    def preparar(self, registro):
+        """DeserializedObject de una línea, con los archivos ya restaurados."""
+        modelo = apps.get_model(registro["model"])
+        if modelo not in MODELOS:
+            raise ErrorArchivo(f"Modelo no soportado: {registro['model']}.")
+        campos = registro["fields"]
+        if "usuario" in campos:
+            campos["usuario"] = self.usuario_id(campos["usuario"])
+        for nombre, media in registro.get("media", {}).items():
+            campo = modelo._meta.get_field(nombre)
+            if isinstance(campo, models.FileField):
+                campos[nombre] = restaurar_archivo(self.directorio, media, campo.storage, campos[nombre],
+                                                   campo.max_length)
+                continue
+            # imágenes del contenido de CKEditor: si alguna cambió de nombre, se corrige el enlace
+            renombrados = {}
+            for archivo, digest in media.items():
+                guardado = restaurar_archivo(self.directorio, digest, self._storage_contenido, archivo)
+                if guardado != archivo:
+                    renombrados[archivo] = guardado
+            if renombrados:
+                campos[nombre] = reemplazar_urls_media(campos[nombre], renombrados)
+        return next(serializers.deserialize("python", [registro]))
+
+    def guardar(self, modelo, objetos):
+        """
+        Inserta o actualiza (por pk) un lote de objetos del mismo modelo y pone al día la
+        secuencia de la pk, en una transacción.
+        """
+        instancias = [objeto.object for objeto in objetos]
+        actualizar = [campo.name for campo in modelo._meta.concrete_fields if not campo.primary_key]
+        conflicto = {}
+        if connection.features.supports_update_conflicts_with_target:
+            conflicto["unique_fields"] = [modelo._meta.pk.name]
+        fechas = [campo.name for campo in modelo._meta.concrete_fields
+                  if getattr(campo, "auto_now", False) or getattr(campo, "auto_now_add", False)]
+        with transaction.atomic(), fechas_propias(modelo, *fechas):
+            modelo._default_manager.bulk_create(instancias, update_conflicts=True,
+                                                update_fields=actualizar, **conflicto)
+            for campo in modelo._meta.many_to_many:
+                Relacion = campo.remote_field.through
+                origen, destino = f"{campo.m2m_field_name()}_id", f"{campo.m2m_reverse_field_name()}_id"
+                Relacion._default_manager.bulk_create([
+                    Relacion(**{origen: objeto.object.pk, destino: pk})
+                    for objeto in objetos for pk in objeto.m2m_data.get(campo.name, [])
+                ], ignore_conflicts=True)
+            self.encolar_medios(modelo, instancias)
+            # como loaddata: con pk explícitas la secuencia del autoincremental no avanza
+            # (PostgreSQL) y el próximo create() chocaría con una fila importada
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [modelo]):
+                    cursor.execute(sql)
+        self.cantidades[modelo._meta.label] = self.cantidades.get(modelo._meta.label, 0) + len(instancias)
+
+    def encolar_medios(self, modelo, instancias):
+        # lo que harían las señales post_save (bulk_create no las dispara)
+        from blog.tareas import encolar_medios, encolar_variantes
+        from blog.variantes import es_imagen
+        if modelo in (SubCategoria, Articulo):
+            encolar_medios(instancias)
+        elif modelo is Layout:
+            for layout in instancias:
+                if layout.logo and es_imagen(layout.logo.name):
+                    encolar_variantes(layout.logo.name)
+
+
+def importar(directorio, usuario=None, lote=LOTE, progreso=None, reiniciar=False, avisar=None):
+    """
+    Importa la exportación de `directorio` lote por lote, retomando donde quedó una corrida
+    anterior (salvo `reiniciar`). Devuelve {etiqueta del modelo: cantidad} de esta corrida.
+    Si el sitio ya tiene contenido y no es de una corrida anterior de este mismo archivo,
+    lanza SitioConContenido sin importar nada.
+    """
+    from blog.navegacion import invalidar_navegacion
+
+    avisar = avisar or (lambda filas: None)
+    ruta = os.path.join(directorio, CONTENIDO)
+    progreso = progreso or ruta + ".progreso"
+    importacion = Importacion(directorio, usuario, lote)
+    try:
+        archivo = open(ruta, "rb")
+    except OSError as exc:
+        raise ErrorArchivo(str(exc)) from exc
+    with archivo:
+        cabecera = leer_cabecera(archivo.readline())
+        posicion, filas = archivo.tell(), 0
+        anterior = leer_progreso(progreso, cabecera)
+        if anterior is None and sitio_con_contenido():
+            raise SitioConContenido(
+                "El sitio ya tiene contenido: import_site conserva las pk del archivo y lo pisaría. "
+                "Importá en un sitio vacío.")
+        if reiniciar:
+            anterior = None
+        if anterior:
+            posicion, filas = anterior
+            archivo.seek(posicion)
+
+        modelo, pendientes = None, []
+        # se lee en binario para llevar la posición en bytes (tell() no sirve al iterar en texto)
+        for linea in archivo:
+            if not linea.strip():
+                posicion += len(linea)
+                continue
+            registro = json.loads(linea)
+            siguiente = apps.get_model(registro["model"])
+            if pendientes and (siguiente is not modelo or len(pendientes) >= lote):
+                importacion.guardar(modelo, pendientes)
+                filas += len(pendientes)
+                guardar_progreso(progreso, cabecera, posicion, filas)
+                avisar(filas)
+                pendientes = []
+            modelo = siguiente
+            pendientes.append(importacion.preparar(registro))
+            posicion += len(linea)
+        if pendientes:
+            importacion.guardar(modelo, pendientes)
+            filas += len(pendientes)
+            avisar(filas)
+
+    if os.path.exists(progreso):
+        os.remove(progreso)
+    invalidar_navegacion()
+    return importacion.cantidades
+#endregion
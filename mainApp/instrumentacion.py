@@ -0,0 +1,162 @@
+# mainApp/instrumentacion.py
+"""
+Mediciones por request para InstrumentacionMiddleware (settings.INSTRUMENTACION).
+
+La medición del request en curso vive en un ContextVar, así se ve tanto desde el hilo
+de WSGI como desde el hilo donde ASGI corre las vistas sync (asgiref copia el contexto).
+Los ganchos, sin medición activa, solo leen el ContextVar:
+  - consultas: un execute_wrapper en cada conexión. Las conexiones son por hilo y con ASGI
+    las vistas consultan desde otro que el del middleware, así que se agrega desde la
+    señal request_started, que Django envía en el hilo donde corre el código sync del
+    request (la primera vez que ese hilo atiende uno),
+  - plantillas y context processors: el backend DjangoTemplates de este módulo
+    (settings.TEMPLATES), que mide el render más externo y cada context processor.
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.core.signals import request_started
+from django.db import connections
+from django.template.backends import django as backend_django
+
+logger = logging.getLogger(__name__)
+
+_medicion = ContextVar("instrumentacion", default=None)
+_instalado = False
+# execute_wrapper() es un context manager: los de las conexiones medidas quedan abiertos acá
+_wrappers = ExitStack()
+_conexiones = set()
+LARGO_SQL_LOG = 300
+
+
+class Medicion:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.mas_lenta = (0.0, "")
+        self.plantillas = 0.0
+        self.procesadores = 0.0
+        self.renders_abiertos = 0
+
+    def total(self):
+        return time.perf_counter() - self.inicio
+
+    def server_timing(self, total):
+        """Valor del header Server-Timing (duraciones en ms; el SQL no se expone)."""
+        metricas = [
+            f'db;dur={self.tiempo_db * 1000:.1f};desc="{self.consultas} consultas"',
+            f'sql-lenta;dur={self.mas_lenta[0] * 1000:.1f}',
+            # el render incluye a los context processors: se informan por separado
+            f'tpl;dur={(self.plantillas - self.procesadores) * 1000:.1f}',
+            f'ctx;dur={self.procesadores * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        return ", ".join(metricas)
+
+    def registrar(self, request, response, total):
+        datos = {
+            "metodo": request.method,
+            "ruta": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 1),
+            "consultas": self.consultas,
+            "db_ms": round(self.tiempo_db * 1000, 1),
+            "sql_lenta_ms": round(self.mas_lenta[0] * 1000, 1),
+            "tpl_ms": round((self.plantillas - self.procesadores) * 1000, 1),
+            "ctx_ms": round(self.procesadores * 1000, 1),
+        }
+        linea = " ".join(f"{clave}={valor}" for clave, valor in datos.items())
+        logger.info(linea, extra={"instrumentacion": {**datos, "sql_lenta": self.mas_lenta[1][:LARGO_SQL_LOG]}})
+
+
+@contextmanager
+def medir():
+    """Activa una Medicion nueva para el código dentro del bloque."""
+    medicion = Medicion()
+    token = _medicion.set(medicion)
+    try:
+        yield medicion
+    finally:
+        _medicion.reset(token)
+
+
+# region consultas
+def _medir_consulta(execute, sql, params, many, context):
+    medicion = _medicion.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracion = time.perf_counter() - inicio
+        medicion.consultas += 1
+        medicion.tiempo_db += duracion
+        if duracion > medicion.mas_lenta[0]:
+            medicion.mas_lenta = (duracion, sql)
+
+
+def _medir_conexiones(**kwargs):
+    """Receptor de request_started: agrega el wrapper a las conexiones de este hilo que no lo tienen."""
+    for conexion in connections.all():
+        if conexion not in _conexiones:
+            _conexiones.add(conexion)
+            _wrappers.enter_context(conexion.execute_wrapper(_medir_consulta))
+
+
+def instalar():
+    """Mide las consultas de todos los requests (idempotente). Lo llama el middleware solo si está habilitado."""
+    global _instalado
+    if _instalado:
+        return
+    _instalado = True
+    request_started.connect(_medir_conexiones, dispatch_uid="instrumentacion")
+#endregion
+
+
+# region plantillas
+def _medir_procesador(procesador):
+    def procesador_medido(request):
+        medicion = _medicion.get()
+        if medicion is None:
+            return procesador(request)
+        inicio = time.perf_counter()
+        try:
+            return procesador(request)
+        finally:
+            medicion.procesadores += time.perf_counter() - inicio
+    return procesador_medido
+
+
+class Plantilla(backend_django.Template):
+
+    def render(self, context=None, request=None):
+        medicion = _medicion.get()
+        if medicion is None or medicion.renders_abiertos:
+            return super().render(context, request)
+        medicion.renders_abiertos += 1
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicion.plantillas += time.perf_counter() - inicio
+            medicion.renders_abiertos -= 1
+
+
+class DjangoTemplates(backend_django.DjangoTemplates):
+    """DjangoTemplates que mide el render y los context processors del request en curso."""
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.engine.template_context_processors = tuple(
+            _medir_procesador(procesador) for procesador in self.engine.template_context_processors)
+
+    def from_string(self, template_code):
+        return Plantilla(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Plantilla(super().get_template(template_name).template, self)
+#endregion
@@ -0,0 +1,218 @@
+# mainApp/management/commands/bench.py
+import json
+import math
+import statistics
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Articulo
+from mainApp.datos_escala import muestra_publica
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) por rango más cercano."""
+    ordenados = sorted(valores)
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+
+def rutas(articulo, pagina, modelo):
+    """(nombre, url, requiere sesión) de las rutas medidas."""
+    return [
+        ("N_inicio", reverse("N_inicio"), False),
+        ("N_pagina", reverse("N_pagina", args=[pagina.slug]), False),
+        ("N_categoria", reverse("N_categoria", args=[pagina.slug, articulo.categoria_id]), False),
+        ("N_subcategoria", reverse("N_subcategoria", args=[pagina.slug, articulo.subcategoria.slug]), False),
+        ("N_articulo", reverse("N_articulo", args=[pagina.slug, articulo.pk]), False),
+        ("N_articulos", reverse("N_articulos"), False),
+        ("N_mantenimientoB", reverse("N_mantenimientoB", args=[modelo]), True),
+        ("N_mantenimientoC", reverse("N_mantenimientoC", args=[modelo, articulo.pk]), True),
+        ("N_crear", reverse("N_crear", args=[modelo]), True),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide las vistas públicas y las de mantenimiento (B, C y crear) contra la base actual "
+        "(cargada con seed --scale): latencia p50/p95, consultas y memoria por ruta, en JSON. "
+        "Con --baseline compara contra una corrida anterior guardada con --salida."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=30,
+            help='Requests medidos por ruta (por defecto: 30).'
+        )
+        parser.add_argument(
+            '--calentamiento',
+            type=int,
+            default=3,
+            help='Requests descartados por ruta antes de medir (por defecto: 3).'
+        )
+        parser.add_argument(
+            '--rutas',
+            nargs='*',
+            help='Medir solo estas rutas (por nombre, p. ej. N_inicio N_articulos).'
+        )
+        parser.add_argument(
+            '--usuario',
+            default='Dueño',
+            help='Usuario con acceso a mantenimiento (por defecto: Dueño, el que crea seed).'
+        )
+        parser.add_argument(
+            '--modelo',
+            default='Articulo',
+            help='Modelo para las vistas de mantenimiento (por defecto: Articulo).'
+        )
+        parser.add_argument(
+            '--con-cache',
+            action='store_true',
+            help='No desactivar la caché de páginas públicas (por defecto se mide el render).'
+        )
+        parser.add_argument(
+            '--salida',
+            help='Guardar el JSON en este archivo (si no, se escribe en la salida estándar).'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON de una corrida anterior para comparar.'
+        )
+        parser.add_argument(
+            '--tolerancia',
+            type=float,
+            default=20,
+            help='Porcentaje de aumento de p50/p95 que se considera empeoramiento (por defecto: 20).'
+        )
+        parser.add_argument(
+            '--estricto',
+            action='store_true',
+            help='Terminar con error si alguna ruta empeoró respecto del baseline.'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError("--repeticiones debe ser al menos 1.")
+        muestra = muestra_publica()
+        if not muestra or not muestra[1]:
+            raise CommandError("No hay datos públicos para medir: cargá la base con seed --scale.")
+        articulo, pagina = muestra
+        usuario = get_user_model().objects.filter(username=options['usuario']).first()
+
+        anonimo = Client(HTTP_HOST="localhost")
+        con_sesion = Client(HTTP_HOST="localhost")
+        if usuario:
+            con_sesion.force_login(usuario)
+
+        resultados = {}
+        cache = nullcontext() if options['con_cache'] else override_settings(CACHE_PUBLICO_TIMEOUT=0)
+        with cache:
+            for nombre, url, privada in rutas(articulo, pagina, options['modelo']):
+                if options['rutas'] and nombre not in options['rutas']:
+                    continue
+                if privada and not usuario:
+                    self.stderr.write(f"Se omite {nombre}: no existe el usuario {options['usuario']}.")
+                    continue
+                resultados[nombre] = self.medir(con_sesion if privada else anonimo, url, options)
+
+        informe = {
+            "fecha": timezone.now().isoformat(),
+            "base": connection.vendor,
+            "articulos": Articulo.objects.count(),
+            "repeticiones": options['repeticiones'],
+            "con_cache": options['con_cache'],
+            "rutas": resultados,
+        }
+        empeoradas = []
+        if options['baseline']:
+            with open(options['baseline'], encoding="utf-8") as archivo:
+                anterior = json.load(archivo)
+            informe["comparacion"] = comparar(anterior["rutas"], resultados, options['tolerancia'])
+            empeoradas = [nombre for nombre, datos in informe["comparacion"].items() if datos["empeoro"]]
+
+        texto = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], "w", encoding="utf-8") as archivo:
+                archivo.write(texto + "\n")
+            self.resumen(informe)
+        else:
+            self.stdout.write(texto)
+
+        if empeoradas and options['estricto']:
+            raise CommandError(f"Rutas que empeoraron respecto del baseline: {', '.join(empeoradas)}.")
+
+    def medir(self, client, url, options):
+        for _ in range(options['calentamiento']):
+            client.get(url)
+
+        tiempos = []
+        for _ in range(options['repeticiones']):
+            inicio = time.perf_counter()
+            response = client.get(url)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        # consultas y memoria en requests aparte: medirlas agrega trabajo que no es de la vista.
+        # Se cuentan con un execute_wrapper: connection.queries se vacía al empezar cada request.
+        consultas = []
+
+        def contar(execute, sql, params, many, context):
+            consultas.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(contar):
+            client.get(url)
+        tracemalloc.start()
+        try:
+            client.get(url)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "url": url,
+            "status": response.status_code,
+            "p50_ms": round(statistics.median(tiempos), 3),
+            "p95_ms": round(percentil(tiempos, 95), 3),
+            "consultas": len(consultas),
+            "memoria_pico_kb": round(pico / 1024, 1),
+        }
+
+    def resumen(self, informe):
+        self.stdout.write(f"{informe['articulos']} artículos, {informe['repeticiones']} repeticiones por ruta")
+        comparacion = informe.get("comparacion", {})
+        for nombre, datos in informe["rutas"].items():
+            linea = (f"{nombre:18} {datos['status']}  p50 {datos['p50_ms']:9.2f} ms  p95 {datos['p95_ms']:9.2f} ms"
+                     f"  {datos['consultas']:4} consultas  {datos['memoria_pico_kb']:9.1f} KiB")
+            if nombre in comparacion:
+                cambio = comparacion[nombre]
+                linea += f"  p50 {cambio['p50_pct']:+.1f}%  consultas {cambio['consultas']:+d}"
+                self.stdout.write(self.style.ERROR(linea) if cambio["empeoro"] else linea)
+            else:
+                self.stdout.write(linea)
+
+
+def comparar(anterior, actual, tolerancia):
+    """Cambio porcentual de p50/p95 y diferencia de consultas de las rutas presentes en ambas corridas."""
+    comparacion = {}
+    for nombre, datos in actual.items():
+        base = anterior.get(nombre)
+        if not base:
+            continue
+        p50 = (datos["p50_ms"] / base["p50_ms"] - 1) * 100 if base["p50_ms"] else 0
+        p95 = (datos["p95_ms"] / base["p95_ms"] - 1) * 100 if base["p95_ms"] else 0
+        consultas = datos["consultas"] - base["consultas"]
+        comparacion[nombre] = {
+            "p50_pct": round(p50, 1),
+            "p95_pct": round(p95, 1),
+            "consultas": consultas,
+            "empeoro": p50 > tolerancia or p95 > tolerancia or consultas > 0,
+        }
+    return comparacion
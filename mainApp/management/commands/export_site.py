@@ -0,0 +1,31 @@
+# mainApp/management/commands/export_site.py
+from django.core.management.base import BaseCommand, CommandError
+
+from mainApp.exportacion import CHUNK_SIZE, exportar
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta todo el contenido (tipos, páginas, categorías, subcategorías, artículos y layout) "
+        "a un directorio: contenido.ndjson, un objeto por línea, y los archivos en media/ por su "
+        "SHA-256. Se importa con import_site (ver mainApp/exportacion.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('destino', help='Directorio de la exportación (se crea si no existe).')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Filas por lectura de la base (por defecto: {CHUNK_SIZE}).'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size debe ser al menos 1.")
+        try:
+            exportar(options['destino'], options['chunk_size'],
+                     avisar=lambda modelo, cantidad: self.stdout.write(f"{modelo}: {cantidad}"))
+        except OSError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"Exportación en {options['destino']}."))
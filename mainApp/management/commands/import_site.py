@@ -0,0 +1,58 @@
+# mainApp/management/commands/import_site.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from mainApp.exportacion import LOTE, ErrorArchivo, SitioConContenido, importar
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa un directorio generado con export_site en un sitio sin contenido, conservando "
+        "las pk (como loaddata). Confirma de a un lote y anota el avance: si se corta, volver "
+        "a correrlo sigue desde el último lote confirmado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('origen', help='Directorio generado con export_site.')
+        parser.add_argument(
+            '--usuario',
+            default='Dueño',
+            help='Usuario para las filas cuyo usuario no existe en este sitio (por defecto: Dueño).'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=LOTE,
+            help=f'Filas por transacción (por defecto: {LOTE}).'
+        )
+        parser.add_argument(
+            '--progreso',
+            help='Archivo donde se anota el avance (por defecto: contenido.ndjson.progreso en el origen).'
+        )
+        parser.add_argument(
+            '--reiniciar',
+            action='store_true',
+            help='Empezar desde el principio aunque haya una importación anterior sin terminar.'
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser al menos 1.")
+        usuario = get_user_model().objects.filter(username=options['usuario']).first()
+        try:
+            cantidades = importar(
+                options['origen'], usuario, options['lote'], options['progreso'], options['reiniciar'],
+                avisar=lambda filas: self.stdout.write(f"{filas} filas importadas", ending="\r"),
+            )
+        except (ErrorArchivo, SitioConContenido, OSError) as exc:
+            raise CommandError(str(exc))
+        except IntegrityError as exc:
+            raise CommandError(
+                f"Conflicto con el contenido existente ({exc}). Lo confirmado hasta el último lote "
+                "queda importado; corregí el conflicto y volvé a correr el comando para seguir."
+            )
+        self.stdout.write("")
+        for modelo, cantidad in cantidades.items():
+            self.stdout.write(f"{modelo}: {cantidad}")
+        self.stdout.write(self.style.SUCCESS("Importación terminada."))
@@ -1,5 +1,6 @@
 # mainApp/management/commands/seed.py
 import os
+import time
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
 from django.contrib.auth import get_user_model
@@ -12,7 +13,8 @@ DEFAULT_PASSWORD = os.environ.get("DJANGO_SEED_DEFAULT_PASSWORD", "test1234")
 class Command(BaseCommand):
     help = (
         "Crea usuarios y perfiles de prueba: Dueño (superuser), colaborador1, colaborador2. "
-        "Opcionalmente carga fixtures de blog y AppPagina."
+        "Opcionalmente carga fixtures de blog y AppPagina, y con --scale genera datos "
+        "sintéticos en volumen (reproducibles con --semilla) para medir rendimiento."
     )
 
     def add_arguments(self, parser):
@@ -36,6 +38,27 @@ class Command(BaseCommand):
             action='store_true',
             help='Si se pasa, FORZAR la contraseña para usuarios ya existentes también (usar con cuidado).'
         )
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=0,
+            help='Cantidad de artículos sintéticos a generar (con páginas, tipos, categorías y subcategorías proporcionales).'
+        )
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            default=1,
+            help='Semilla del generador: la misma semilla y escala producen los mismos datos (por defecto: 1).'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=5000,
+            help='Filas por bulk_create (por defecto: 5000).'
+        )
+        parser.add_argument('--paginas', type=int, help='Cantidad de páginas (por defecto: según --scale).')
+        parser.add_argument('--categorias', type=int, help='Cantidad de categorías (por defecto: según --scale).')
+        parser.add_argument('--subcategorias', type=int, help='Cantidad de subcategorías (por defecto: 3 por categoría).')
 
     @transaction.atomic
     def handle(self, *args, **options):
@@ -145,4 +168,33 @@ class Command(BaseCommand):
                 except Exception as e:
                     self.stdout.write(self.style.ERROR(f"Error cargando fixture {fx}: {e}"))
 
+        # 5) Opcional: datos sintéticos a escala (mainApp/datos_escala.py)
+        if options.get("scale"):
+            self.generar_escala(owner_user, options)
+
         self.stdout.write(self.style.SUCCESS("Seed finalizado."))
+
+    def generar_escala(self, usuario, options):
+        from mainApp import datos_escala
+
+        semilla = options["semilla"]
+        if datos_escala.ya_generado(semilla):
+            self.stdout.write(self.style.WARNING(
+                f"Ya hay datos generados con la semilla {semilla} — no se generan de nuevo (usar otra --semilla)."
+            ))
+            return
+
+        inicio = time.perf_counter()
+
+        def progreso(modelo, cantidad):
+            self.stdout.write(f"{modelo}: {cantidad} ({time.perf_counter() - inicio:.1f}s)")
+
+        cantidades = datos_escala.generar(
+            options["scale"], semilla, usuario, lote=options["lote"], paginas=options.get("paginas"),
+            categorias=options.get("categorias"), subcategorias=options.get("subcategorias"),
+            progreso=progreso,
+        )
+        resumen = ", ".join(f"{modelo}: {cantidad}" for modelo, cantidad in cantidades.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Datos sintéticos generados (semilla {semilla}) en {time.perf_counter() - inicio:.1f}s — {resumen}."
+        ))
@@ -0,0 +1,236 @@
+# mainApp/media.py
+"""
+Vista para servir MEDIA_ROOT con soporte real de HTTP Range (RFC 9110).
+
+Reemplaza a django.views.static.serve en /media/ para que los videos subidos
+se puedan adelantar sin volver a descargar el archivo completo:
+  - un rango  -> 206 con Content-Range,
+  - varios    -> 206 multipart/byteranges,
+  - inválido  -> 416 con "Content-Range: bytes */<tamaño>",
+  - If-Range que no coincide -> el archivo completo (200),
+  - HEAD devuelve los mismos headers sin cuerpo.
+El archivo se lee en bloques de tamaño fijo, sin cargarlo entero en memoria.
+
+settings.MEDIA_DELIVERY decide quién mueve los bytes. La ruta y los middlewares
+(RedirectNoStaff, etc.) siempre pasan por Django:
+  - "python": todo lo resuelve esta vista.
+  - "sendfile": igual, pero el archivo completo va como FileResponse para que el
+    servidor WSGI use os.sendfile (los rangos se siguen leyendo en Python).
+  - "x-sendfile" / "x-accel-redirect": Django solo valida la ruta y responde con el
+    header; Apache/nginx entregan el archivo y resuelven Range y los condicionales.
+"""
+import mimetypes
+import os
+import posixpath
+import secrets
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+TAMANIO_BLOQUE = 64 * 1024
+# Más rangos que esto (después de unir los superpuestos) se responde el archivo completo
+MAX_RANGOS = 16
+MODOS_ENTREGA = ("python", "sendfile", "x-sendfile", "x-accel-redirect")
+
+
+def modo_entrega():
+    modo = getattr(settings, "MEDIA_DELIVERY", "python")
+    if modo not in MODOS_ENTREGA:
+        raise ImproperlyConfigured(
+            f"MEDIA_DELIVERY={modo!r} no es válido; opciones: {', '.join(MODOS_ENTREGA)}")
+    return modo
+
+
+def _ruta_archivo(path, document_root):
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        ruta = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404("Archivo no encontrado")
+    if not os.path.isfile(ruta):
+        raise Http404("Archivo no encontrado")
+    return ruta
+
+
+def _etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parsear_rangos(header, tamanio):
+    """
+    Interpreta un header Range de bytes.
+
+    Devuelve:
+      - None si el header no es de bytes o está mal formado (se ignora: 200),
+      - [] si ninguno de los rangos se puede satisfacer (416),
+      - la lista de (inicio, fin) inclusivos, ordenados y sin superposiciones.
+    """
+    unidad, _, especificacion = header.partition("=")
+    if unidad.strip().lower() != "bytes" or not especificacion.strip():
+        return None
+
+    rangos = []
+    for parte in especificacion.split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        inicio, guion, fin = parte.partition("-")
+        inicio, fin = inicio.strip(), fin.strip()
+        if not guion or not (inicio.isdigit() or inicio == "") or not (fin.isdigit() or fin == ""):
+            return None
+        if inicio == "":
+            # sufijo: los últimos N bytes
+            if fin == "":
+                return None
+            largo = int(fin)
+            if largo == 0:
+                continue
+            rangos.append((max(tamanio - largo, 0), tamanio - 1))
+            continue
+        inicio = int(inicio)
+        fin = int(fin) if fin else tamanio - 1
+        if fin < inicio:
+            return None
+        if inicio >= tamanio:
+            continue
+        rangos.append((inicio, min(fin, tamanio - 1)))
+
+    if tamanio == 0:
+        return []
+
+    # unir rangos superpuestos o contiguos
+    unidos = []
+    for inicio, fin in sorted(rangos):
+        if unidos and inicio <= unidos[-1][1] + 1:
+            unidos[-1] = (unidos[-1][0], max(unidos[-1][1], fin))
+        else:
+            unidos.append((inicio, fin))
+    return unidos
+
+
+def _if_range_coincide(request, etag, ultima_modificacion):
+    """If-Range: el rango solo se aplica si el validador corresponde a la versión actual."""
+    valor = request.META.get("HTTP_IF_RANGE")
+    if not valor:
+        return True
+    valor = valor.strip()
+    if valor.startswith(('"', 'W/')):
+        # solo ETags fuertes
+        return valor == etag
+    fecha = parse_http_date_safe(valor)
+    return fecha is not None and fecha == ultima_modificacion
+
+
+def _leer(ruta, rangos):
+    """Genera los bytes de los rangos indicados, en bloques de TAMANIO_BLOQUE."""
+    with open(ruta, "rb") as archivo:
+        for inicio, fin in rangos:
+            archivo.seek(inicio)
+            restante = fin - inicio + 1
+            while restante > 0:
+                bloque = archivo.read(min(TAMANIO_BLOQUE, restante))
+                if not bloque:
+                    return
+                restante -= len(bloque)
+                yield bloque
+
+
+def _multipart(ruta, rangos, tamanio, content_type, boundary):
+    """Partes de un multipart/byteranges y el largo total del cuerpo."""
+    cabeceras = [
+        (f"--{boundary}\r\nContent-Type: {content_type}\r\n"
+         f"Content-Range: bytes {inicio}-{fin}/{tamanio}\r\n\r\n").encode("ascii")
+        for inicio, fin in rangos
+    ]
+    cierre = f"\r\n--{boundary}--\r\n".encode("ascii")
+    largo = sum(len(c) for c in cabeceras) + sum(fin - inicio + 1 for inicio, fin in rangos)
+    largo += 2 * (len(rangos) - 1) + len(cierre)
+
+    def partes():
+        for i, (cabecera, rango) in enumerate(zip(cabeceras, rangos)):
+            if i:
+                yield b"\r\n"
+            yield cabecera
+            yield from _leer(ruta, [rango])
+        yield cierre
+
+    return partes(), largo
+
+
+def _delegar_al_proxy(modo, ruta, document_root, content_type):
+    """Respuesta vacía con el header que le indica al servidor web qué archivo enviar."""
+    response = HttpResponse(content_type=content_type)
+    if modo == "x-sendfile":
+        response["X-Sendfile"] = ruta
+    else:
+        relativa = os.path.relpath(ruta, document_root).replace(os.sep, "/")
+        prefijo = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "/media-interno/")
+        response["X-Accel-Redirect"] = prefijo.rstrip("/") + "/" + quote(relativa)
+    return response
+
+
+@require_safe
+def servir_media(request, path, document_root=None):
+    """Sirve un archivo de MEDIA_ROOT respetando Range, If-Range y los GET condicionales."""
+    document_root = document_root or settings.MEDIA_ROOT
+    ruta = _ruta_archivo(path, document_root)
+    content_type = mimetypes.guess_type(ruta)[0] or "application/octet-stream"
+    modo = modo_entrega()
+    if modo in ("x-sendfile", "x-accel-redirect"):
+        return _delegar_al_proxy(modo, ruta, document_root, content_type)
+
+    stat = os.stat(ruta)
+    tamanio = stat.st_size
+    etag = _etag(stat)
+    ultima_modificacion = int(stat.st_mtime)
+
+    no_modificado = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+    if no_modificado is not None:
+        no_modificado["Accept-Ranges"] = "bytes"
+        return no_modificado
+
+    rangos = None
+    header_range = request.META.get("HTTP_RANGE")
+    if header_range and _if_range_coincide(request, etag, ultima_modificacion):
+        rangos = parsear_rangos(header_range, tamanio)
+        if rangos is not None and len(rangos) > MAX_RANGOS:
+            rangos = None
+
+    es_head = request.method == "HEAD"
+    if rangos == []:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{tamanio}"
+    elif rangos is None:
+        if es_head:
+            response = HttpResponse(content_type=content_type)
+            response["Content-Length"] = str(tamanio)
+        elif modo == "sendfile":
+            response = FileResponse(open(ruta, "rb"), content_type=content_type)
+        else:
+            response = StreamingHttpResponse(_leer(ruta, [(0, tamanio - 1)]), content_type=content_type)
+            response["Content-Length"] = str(tamanio)
+    elif len(rangos) == 1:
+        inicio, fin = rangos[0]
+        cuerpo = () if es_head else _leer(ruta, rangos)
+        response = StreamingHttpResponse(cuerpo, status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {inicio}-{fin}/{tamanio}"
+        response["Content-Length"] = str(fin - inicio + 1)
+    else:
+        boundary = secrets.token_hex(16)
+        cuerpo, largo = _multipart(ruta, rangos, tamanio, content_type, boundary)
+        response = StreamingHttpResponse(
+            () if es_head else cuerpo, status=206,
+            content_type=f"multipart/byteranges; boundary={boundary}",
+        )
+        response["Content-Length"] = str(largo)
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    return response
@@ -1,6 +1,11 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.shortcuts import redirect
 from django.contrib import messages
 
+from . import instrumentacion
+
 class RedirectNoStaff:
 
     def __init__(self, get_response):
@@ -31,4 +36,43 @@ class RangeRequestMiddleware:
         # Agregar header para permitir Range Requests
         if request.path.startswith('/media/'):
             response['Accept-Ranges'] = 'bytes'
-        return response
\ No newline at end of file
+        return response
+
+
+class InstrumentacionMiddleware:
+    """
+    Consultas, tiempo de base de datos, consulta más lenta, render de plantillas y
+    context processors de cada request, en el header Server-Timing y en una línea de log
+    (logger mainApp.instrumentacion). Solo con settings.INSTRUMENTACION = True: si no,
+    Django lo saca de la cadena al arrancar (MiddlewareNotUsed) y no cuesta nada.
+    Conviene que sea el primero de MIDDLEWARE para que el total incluya a los demás.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTACION", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+        instrumentacion.instalar()
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        with instrumentacion.medir() as medicion:
+            response = self.get_response(request)
+        return self.informar(request, response, medicion)
+
+    async def __acall__(self, request):
+        with instrumentacion.medir() as medicion:
+            response = await self.get_response(request)
+        return self.informar(request, response, medicion)
+
+    def informar(self, request, response, medicion):
+        total = medicion.total()
+        response["Server-Timing"] = medicion.server_timing(total)
+        medicion.registrar(request, response, total)
+        return response
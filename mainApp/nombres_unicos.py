@@ -0,0 +1,184 @@
+# mainApp/nombres_unicos.py
+"""
+Nombres y slugs únicos con sufijo numérico: "Noticia", "Noticia (1)", "Noticia (2)"...
+y "noticia", "noticia-1", "noticia-2"...
+
+El primer valor libre se calcula con una sola consulta: se traen los valores que son
+la base o empiezan por "base + separador" y los sufijos ocupados se leen en Python.
+Antes se probaba un candidato por consulta, así que guardar el artículo número 500
+llamado "Noticia" hacía 500 consultas.
+
+Entre esa consulta y el INSERT otra transacción puede ocupar el mismo valor: las
+columnas tienen restricción de unicidad y `guardar_unico` vuelve a calcular y reintenta.
+
+`Asignador` hace lo mismo para muchas filas sin guardarlas (bulk_create): recuerda
+los valores que ya asignó y consulta cada base una sola vez.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+
+# (separador, cierre) del sufijo
+FORMATO_NOMBRE = (" (", ")")
+FORMATO_SLUG = ("-", "")
+INTENTOS = 5
+
+
+def sufijos_ocupados(valores, base, formato):
+    """(base ocupada, sufijos ocupados) entre `valores`."""
+    separador, cierre = formato
+    prefijo = base + separador
+    ocupada = False
+    sufijos = set()
+    for valor in valores:
+        if valor == base:
+            ocupada = True
+        elif valor.startswith(prefijo) and valor.endswith(cierre):
+            numero = valor[len(prefijo):len(valor) - len(cierre)]
+            if numero.isdigit():
+                sufijos.add(int(numero))
+    return ocupada, sufijos
+
+
+def valor_unico(modelo, campo, base, excluir_pk=None, formato=FORMATO_NOMBRE, recortada=False):
+    """Primer valor libre de `campo` partiendo de `base` (una consulta; dos si hay que recortar)."""
+    separador, cierre = formato
+    # con SQLite startswith no distingue mayúsculas: la comparación exacta se hace en sufijos_ocupados
+    valores = (
+        modelo._default_manager
+        .filter(Q(**{campo: base}) | Q(**{f"{campo}__startswith": base + separador}))
+        .exclude(pk=excluir_pk)
+        .values_list(campo, flat=True)
+    )
+    ocupada, sufijos = sufijos_ocupados(valores, base, formato)
+    if not ocupada and not recortada:
+        return base
+    numero = 1
+    while numero in sufijos:
+        numero += 1
+    sufijo = f"{separador}{numero}{cierre}"
+    largo = modelo._meta.get_field(campo).max_length
+    if largo and len(base) + len(sufijo) > largo:
+        # no entra: recortar la base (cambia el prefijo, hay que volver a consultar)
+        return valor_unico(modelo, campo, base[:largo - len(sufijo)], excluir_pk, formato, recortada=True)
+    return base + sufijo
+
+
+def partir(valor, formato):
+    """(base, número) si `valor` tiene sufijo numérico; si no, None."""
+    separador, cierre = formato
+    if not valor.endswith(cierre):
+        return None
+    base, encontrado, numero = valor[:len(valor) - len(cierre)].rpartition(separador)
+    return (base, int(numero)) if encontrado and numero.isdigit() else None
+
+
+class Asignador:
+    """
+    `valor_unico` en memoria para importar muchas filas de `modelo` en lotes.
+
+    `preparar(bases)` averigua con una consulta cuáles de las bases de un lote ya existen;
+    solo las repetidas (en la base o en lo ya asignado) necesitan la consulta por prefijo,
+    que se hace una vez por base. Si el lote choca con la restricción de unicidad porque
+    otra transacción guardó mientras tanto, `olvidar()` y volver a asignar.
+    """
+
+    def __init__(self, modelo, campo, formato=FORMATO_NOMBRE):
+        self.modelo = modelo
+        self.campo = campo
+        self.formato = formato
+        self.largo = modelo._meta.get_field(campo).max_length
+        self.olvidar()
+
+    def olvidar(self):
+        self._asignados = set()
+        self._existentes = set()
+        self._consultadas = set()
+        self._por_prefijo = set()
+        # base -> sufijos ocupados (completos solo para las bases de _por_prefijo)
+        self._sufijos = {}
+
+    def preparar(self, bases):
+        nuevas = set(bases) - self._consultadas
+        if not nuevas:
+            return
+        self._existentes.update(
+            self.modelo._default_manager.filter(**{f"{self.campo}__in": nuevas}).values_list(self.campo, flat=True)
+        )
+        self._consultadas.update(nuevas)
+
+    def _ocupados(self, base):
+        if base not in self._por_prefijo:
+            separador, _ = self.formato
+            valores = self.modelo._default_manager.filter(
+                Q(**{self.campo: base}) | Q(**{f"{self.campo}__startswith": base + separador})
+            ).values_list(self.campo, flat=True)
+            ocupada, sufijos = sufijos_ocupados(valores, base, self.formato)
+            if ocupada:
+                self._existentes.add(base)
+            self._consultadas.add(base)
+            self._por_prefijo.add(base)
+            self._sufijos.setdefault(base, set()).update(sufijos)
+        return self._sufijos[base]
+
+    def _registrar(self, valor):
+        self._asignados.add(valor)
+        partes = partir(valor, self.formato)
+        if partes:
+            base, numero = partes
+            # si la base todavía no se consultó por prefijo, esa consulta se suma a este conjunto
+            self._sufijos.setdefault(base, set()).add(numero)
+        return valor
+
+    def asignar(self, base, recortada=False):
+        """Primer valor libre partiendo de `base`, contando los ya asignados por este objeto."""
+        if base not in self._consultadas:
+            self._ocupados(base)
+        if not recortada and base not in self._existentes and base not in self._asignados:
+            return self._registrar(base)
+        sufijos = self._ocupados(base)
+        numero = 1
+        while numero in sufijos:
+            numero += 1
+        separador, cierre = self.formato
+        sufijo = f"{separador}{numero}{cierre}"
+        if self.largo and len(base) + len(sufijo) > self.largo:
+            return self.asignar(base[:self.largo - len(sufijo)], recortada=True)
+        return self._registrar(base + sufijo)
+
+
+def renombrar_repetidos(modelo, campo):
+    """Agrega sufijo a las filas con `campo` repetido (la de menor pk queda igual); para migraciones."""
+    filas = modelo._default_manager
+    repetidos = list(filas.values(campo).annotate(n=Count("pk")).filter(n__gt=1).values_list(campo, flat=True))
+    for valor in repetidos:
+        for pk in list(filas.filter(**{campo: valor}).order_by("pk").values_list("pk", flat=True))[1:]:
+            filas.filter(pk=pk).update(**{campo: valor_unico(modelo, campo, valor, pk)})
+
+
+def _alguno_ocupado(instancia, campos):
+    filtro = Q()
+    for campo in campos:
+        filtro |= Q(**{campo: getattr(instancia, campo)})
+    return type(instancia)._default_manager.filter(filtro).exclude(pk=instancia.pk).exists()
+
+
+def guardar_unico(instancia, guardar, campos, intentos=INTENTOS):
+    """
+    Asigna a `instancia` valores libres para `campos` y llama a `guardar()`.
+
+    `campos` es {campo: (base, formato)}; la base puede ser una función sin argumentos,
+    que se evalúa después de asignar los campos anteriores (p. ej. el slug del nombre).
+    Si el INSERT/UPDATE choca con la restricción de unicidad porque otra transacción
+    tomó el valor, se recalcula y se reintenta; cualquier otro IntegrityError se propaga.
+    """
+    for intento in range(intentos):
+        for campo, (base, formato) in campos.items():
+            base = base() if callable(base) else base
+            setattr(instancia, campo, valor_unico(type(instancia), campo, base, instancia.pk, formato))
+        try:
+            # savepoint: el error no debe romper la transacción que nos llama
+            with transaction.atomic():
+                return guardar()
+        except IntegrityError:
+            if intento == intentos - 1 or not _alguno_ocupado(instancia, campos):
+                raise
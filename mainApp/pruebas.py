@@ -0,0 +1,48 @@
+# mainApp/pruebas.py
+"""
+Ayudas para los tests: límites de consultas SQL por URL.
+
+Los N+1 no rompen ningún test de comportamiento; solo se notan con muchos datos.
+`LimiteConsultasMixin` los detecta de dos maneras:
+  - assertMaximoConsultas: la URL no hace más de N consultas (fija el número actual).
+  - assertConsultasNoCrecen: después de agregar filas la URL hace las mismas consultas.
+Si falla, el mensaje incluye el SQL capturado para ver qué consulta se repite.
+"""
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+def formatear_consultas(consultas):
+    return "\n".join(f"{i}. {consulta['sql']}" for i, consulta in enumerate(consultas, 1))
+
+
+class LimiteConsultasMixin:
+    """Para TestCase. Las páginas públicas se miden sin la caché de páginas completas."""
+
+    def consultas_de(self, url, client=None):
+        """(response, consultas) de un GET a `url`, después de un request previo que llena las cachés."""
+        client = client or self.client
+        with override_settings(CACHE_PUBLICO_TIMEOUT=0):
+            client.get(url)
+            with CaptureQueriesContext(connection) as capturadas:
+                response = client.get(url)
+        return response, capturadas.captured_queries
+
+    def assertMaximoConsultas(self, url, maximo, client=None):
+        response, consultas = self.consultas_de(url, client)
+        if len(consultas) > maximo:
+            self.fail(f"{url} hizo {len(consultas)} consultas (máximo {maximo}):\n{formatear_consultas(consultas)}")
+        return response
+
+    def assertConsultasNoCrecen(self, url, agregar_filas, client=None):
+        """Compara las consultas de `url` antes y después de llamar a `agregar_filas()`."""
+        _, antes = self.consultas_de(url, client)
+        agregar_filas()
+        response, despues = self.consultas_de(url, client)
+        if len(despues) > len(antes):
+            self.fail(
+                f"{url} pasó de {len(antes)} a {len(despues)} consultas al agregar filas.\n"
+                f"Antes:\n{formatear_consultas(antes)}\nDespués:\n{formatear_consultas(despues)}"
+            )
+        return response
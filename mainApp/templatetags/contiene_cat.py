@@ -3,6 +3,9 @@ from django import template
 register = template.Library()
 
 @register.filter
-def contiene_categoria(categorias, valor):
-    return any(cat[2] == valor for cat in categorias)
+def categorias_de(menu, pagina_id):
+    """Categorías de una página a partir del menú agrupado por id ({pagina_id: [(id, nombre), ...]})."""
+    if not menu:
+        return ()
+    return menu.get(pagina_id, ())
 
@@ -1,15 +1,40 @@
-from django.test import TestCase, RequestFactory
+from django.test import TestCase, RequestFactory, override_settings
 from django.test import Client
 from django.contrib.auth import get_user_model
-from django.db.models import ProtectedError
+from django.db.models import F, ProtectedError
 from .models import Rol, PerfilUsuario
 from django.urls import reverse
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sessions.middleware import SessionMiddleware
-from django.http import HttpResponse
-from .middleware import RedirectNoStaff, RangeRequestMiddleware
+from django.http import HttpResponse, Http404, FileResponse
+from .middleware import RedirectNoStaff, RangeRequestMiddleware, InstrumentacionMiddleware
+from .media import servir_media, parsear_rangos
+from .pruebas import LimiteConsultasMixin
 from importlib import import_module
 from django.db.models.signals import post_save
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, IntegrityError, models
+from django.test.utils import CaptureQueriesContext
+import mainApp.signals as signals_mod
+from AppPagina.models import Pagina
+from blog.models import Tipo, Categoria, Articulo, Layout, SubCategoria
+from mainApp import cache_publico, datos_escala, nombres_unicos, exportacion
+from mainApp.exportacion import exportar, importar, ruta_media, SitioConContenido
+from mainApp.management.commands.bench import rutas
+from mainApp.nombres_unicos import valor_unico, FORMATO_NOMBRE, guardar_unico, Asignador
+from mantenimiento.tareas import procesar_pendientes
 
 User = get_user_model()
 
@@ -142,8 +167,6 @@ class SignalsTest(TestCase):
         import_module('mainApp.signals')
 
     def test_create_profile_signal_is_connected(self):
-        import mainApp.signals as signals_mod
-
         
         
         self.assertTrue(post_save.has_listeners(User), "No hay listeners registrados para post_save(User).")
@@ -180,3 +203,653 @@ class SignalsTest(TestCase):
         self.assertEqual(perfil.rol.nombre, 'Staff')
         superuser.refresh_from_db()
         self.assertTrue(superuser.is_staff)
+
+
+class CachePublicoTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='autor', password='pwd12345')
+        tipo = Tipo.objects.create(nombre='Cache')
+        self.pagina = Pagina.objects.create(titulo='Pagina Cache', slug='pagina-cache', tipo=tipo,
+                                            usuario=self.user, publico=True, contenido='Hola')
+        categoria = Categoria.objects.create(nombre='Cat Cache')
+        categoria.paginas.add(self.pagina)
+        self.articulo = Articulo.objects.create(titulo='Articulo Cache', contenido='x', categoria=categoria,
+                                                tipo=tipo, publico=True, usuario=self.user)
+        Layout.get_solo()
+        self.url = reverse('N_articulo', args=[self.pagina.slug, self.articulo.id])
+
+    def test_segundo_request_anonimo_sale_de_cache_sin_consultas(self):
+        primera = self.client.get(self.url)
+        self.assertEqual(primera['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            segunda = self.client.get(self.url)
+        self.assertEqual(segunda['X-Cache'], 'HIT')
+        self.assertEqual(segunda.content, primera.content)
+
+    def test_sin_estadisticas_no_escribe_contadores(self):
+        claves = [f"{cache_publico.PREFIJO}:stats:{nombre}" for nombre in cache_publico.ESTADISTICAS]
+        cache_publico._cache().delete_many(claves)
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.articulo.save()
+        self.assertIsNone(cache_publico.estadisticas())
+        self.assertEqual(cache_publico._cache().get_many(claves), {})
+
+    @override_settings(CACHE_PUBLICO_ESTADISTICAS=True)
+    def test_guardar_articulo_purga_su_detalle(self):
+        self.client.get(self.url)
+        purgas = cache_publico.estadisticas()['purgas']
+
+        self.articulo.titulo = 'Articulo Editado'
+        self.articulo.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Articulo Editado')
+        self.assertGreater(cache_publico.estadisticas()['purgas'], purgas)
+
+    def test_usuario_con_sesion_no_usa_cache(self):
+        self.client.get(self.url)
+        self.client.login(username='autor', password='pwd12345')
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('X-Cache'))
+
+
+class GetCondicionalTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='autor', password='pwd12345')
+        tipo = Tipo.objects.create(nombre='Condicional')
+        self.pagina = Pagina.objects.create(titulo='Pagina Condicional', slug='pagina-condicional', tipo=tipo,
+                                            usuario=self.user, publico=True, contenido='Hola')
+        self.categoria = Categoria.objects.create(nombre='Cat Condicional')
+        self.categoria.paginas.add(self.pagina)
+        self.articulo = Articulo.objects.create(titulo='Articulo Condicional', contenido='x',
+                                                categoria=self.categoria, tipo=tipo, publico=True,
+                                                usuario=self.user)
+        Layout.get_solo()
+        self.url = reverse('N_articulo', args=[self.pagina.slug, self.articulo.id])
+
+    def test_respuesta_incluye_validadores(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    @override_settings(CACHE_PUBLICO_TIMEOUT=0)
+    def test_if_none_match_devuelve_304_sin_renderizar(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertTemplateNotUsed('articulo/articulo_detalle.html'):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    @override_settings(CACHE_PUBLICO_TIMEOUT=0)
+    def test_if_modified_since_devuelve_304(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_304_desde_la_cache(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_editar_articulo_cambia_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.articulo.titulo = 'Articulo Editado'
+        self.articulo.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CACHE_PUBLICO_TIMEOUT=0)
+    def test_borrar_articulo_cambia_etag_del_listado(self):
+        otro = Articulo.objects.create(titulo='Otro', contenido='x', categoria=self.categoria,
+                                       tipo=self.articulo.tipo, publico=True, usuario=self.user)
+        url = reverse('N_categoria', args=[self.pagina.slug, self.categoria.id])
+        etag = self.client.get(url)['ETag']
+        otro.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_usuario_con_sesion_sin_validadores(self):
+        self.client.login(username='autor', password='pwd12345')
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class MediaArchivoMixin:
+    """Archivo temporal en un MEDIA_ROOT propio y helpers para llamar a servir_media."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="test_media_range_")
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.datos = bytes(range(256)) * 40  # 10240 bytes
+        with open(os.path.join(self.root, 'video.mp4'), 'wb') as f:
+            f.write(self.datos)
+        self.factory = RequestFactory()
+
+    def servir(self, metodo='get', **headers):
+        request = getattr(self.factory, metodo)('/media/video.mp4', **headers)
+        return servir_media(request, 'video.mp4', document_root=self.root)
+
+    def cuerpo(self, response):
+        return b''.join(response.streaming_content)
+
+
+class MediaRangeTest(MediaArchivoMixin, TestCase):
+
+    def test_sin_range_devuelve_archivo_completo(self):
+        response = self.servir()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.cuerpo(response), self.datos)
+
+    def test_un_rango(self):
+        response = self.servir(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.datos)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(self.cuerpo(response), self.datos[100:200])
+
+    def test_rango_abierto_y_sufijo(self):
+        response = self.servir(HTTP_RANGE='bytes=10000-')
+        self.assertEqual(self.cuerpo(response), self.datos[10000:])
+        response = self.servir(HTTP_RANGE='bytes=-50')
+        self.assertEqual(self.cuerpo(response), self.datos[-50:])
+
+    def test_varios_rangos_multipart(self):
+        response = self.servir(HTTP_RANGE='bytes=0-9, 500-509')
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        cuerpo = self.cuerpo(response)
+        self.assertEqual(len(cuerpo), int(response['Content-Length']))
+        self.assertIn(b'Content-Range: bytes 0-9/10240\r\n\r\n' + self.datos[0:10], cuerpo)
+        self.assertIn(b'Content-Range: bytes 500-509/10240\r\n\r\n' + self.datos[500:510], cuerpo)
+
+    def test_rango_no_satisfacible(self):
+        response = self.servir(HTTP_RANGE='bytes=20000-30000')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.datos)}')
+
+    def test_if_range_distinto_devuelve_completo(self):
+        response = self.servir(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otro"')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.servir(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+    def test_head_sin_cuerpo(self):
+        response = self.servir('head', HTTP_RANGE='bytes=0-99')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(self.cuerpo(response), b'')
+
+    def test_parsear_rangos(self):
+        self.assertIsNone(parsear_rangos('items=0-1', 100))
+        self.assertIsNone(parsear_rangos('bytes=5-1', 100))
+        self.assertEqual(parsear_rangos('bytes=0-10,5-20,90-', 100), [(0, 20), (90, 99)])
+
+    def test_ruta_fuera_de_media_da_404(self):
+        request = self.factory.get('/media/../settings.py')
+        with self.assertRaises(Http404):
+            servir_media(request, '../settings.py', document_root=self.root)
+
+
+class MediaDeliveryTest(MediaArchivoMixin, TestCase):
+    """Modos de MEDIA_DELIVERY: sin nginx/Apache alcanza con revisar los headers."""
+
+    @override_settings(MEDIA_DELIVERY='x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX='/interno/')
+    def test_x_accel_redirect(self):
+        response = self.servir(HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/interno/video.mp4')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_DELIVERY='x-sendfile')
+    def test_x_sendfile(self):
+        response = self.servir()
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.root, 'video.mp4'))
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_DELIVERY='sendfile')
+    def test_sendfile_usa_file_response(self):
+        response = self.servir()
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(self.cuerpo(response), self.datos)
+        # los rangos se siguen resolviendo en la vista
+        self.assertEqual(self.servir(HTTP_RANGE='bytes=0-9').status_code, 206)
+
+    @override_settings(MEDIA_DELIVERY='x-accel-redirect')
+    def test_ruta_inexistente_no_se_delega(self):
+        request = self.factory.get('/media/no-existe.mp4')
+        with self.assertRaises(Http404):
+            servir_media(request, 'no-existe.mp4', document_root=self.root)
+
+    @override_settings(MEDIA_DELIVERY='ftp')
+    def test_modo_invalido(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.servir()
+
+
+class SeedEscalaTest(TestCase):
+
+    def seed(self, *args):
+        out = StringIO()
+        call_command("seed", "--scale", "60", "--lote", "25", *args, stdout=out)
+        return out.getvalue()
+
+    def datos(self):
+        return list(Articulo.objects.order_by("titulo").values_list(
+            "titulo", "contenido", "publico", "creacion", "categoria__nombre", "subcategoria__nombre",
+            "tipo__nombre"))
+
+    def test_genera_las_cantidades_pedidas(self):
+        self.seed("--categorias", "4")
+        self.assertEqual(Articulo.objects.count(), 60)
+        self.assertEqual(Pagina.objects.count(), 3)
+        self.assertEqual(Categoria.objects.count(), 4)
+        self.assertEqual(SubCategoria.objects.count(), 12)
+        self.assertEqual(Pagina.objects.filter(es_inicio=True, slug="").count(), 1)
+        self.assertTrue(all(c.paginas.exists() for c in Categoria.objects.all()))
+        # los artículos son visibles desde alguna página de su categoría
+        self.assertFalse(Articulo.objects.exclude(categoria__paginas__tipo=F("tipo")).exists())
+        self.assertGreater(Articulo.objects.dates("creacion", "year").count(), 1)
+
+    def test_misma_semilla_mismos_datos(self):
+        self.seed("--semilla", "7")
+        primera = self.datos()
+        for modelo in (Articulo, SubCategoria, Categoria, Pagina, Tipo):
+            modelo.objects.all().delete()
+        self.seed("--semilla", "7")
+        self.assertEqual(self.datos(), primera)
+
+    def test_no_repite_una_semilla_ya_generada(self):
+        self.seed()
+        salida = self.seed()
+        self.assertIn("Ya hay datos generados con la semilla 1", salida)
+        self.assertEqual(Articulo.objects.count(), 60)
+
+    def test_la_muestra_no_usa_la_pagina_de_inicio(self):
+        self.seed()
+        articulo, pagina = datos_escala.muestra_publica()
+        # la de inicio primero en el orden y asociada a la categoría de la muestra
+        inicio = Pagina.objects.get(es_inicio=True)
+        Pagina.objects.filter(pk=inicio.pk).update(tipo_id=articulo.tipo_id, tiene_contenido=True)
+        articulo.categoria.paginas.add(inicio)
+        self.assertEqual(datos_escala.muestra_publica()[1], pagina)
+
+        # si la de inicio es la única página de las categorías no hay muestra
+        for modelo in (Articulo, SubCategoria, Categoria, Pagina, Tipo):
+            modelo.objects.all().delete()
+        self.seed("--paginas", "1")
+        self.assertIsNone(datos_escala.muestra_publica())
+
+
+class BenchTest(TestCase):
+
+    def setUp(self):
+        call_command("seed", "--scale", "40", stdout=StringIO())
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def bench(self, *args):
+        out = StringIO()
+        call_command("bench", "--repeticiones", "2", "--calentamiento", "0", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_mide_todas_las_rutas(self):
+        informe = json.loads(self.bench())
+        self.assertEqual(set(informe["rutas"]), {
+            "N_inicio", "N_pagina", "N_categoria", "N_subcategoria", "N_articulo", "N_articulos",
+            "N_mantenimientoB", "N_mantenimientoC", "N_crear",
+        })
+        for nombre, datos in informe["rutas"].items():
+            self.assertEqual(datos["status"], 200, nombre)
+            self.assertGreater(datos["consultas"], 0, nombre)
+            self.assertLessEqual(datos["p50_ms"], datos["p95_ms"])
+            self.assertGreater(datos["memoria_pico_kb"], 0)
+
+    def test_compara_contra_baseline(self):
+        baseline = os.path.join(self.dir, "baseline.json")
+        self.bench("--rutas", "N_articulos", "--salida", baseline)
+        with open(baseline, encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+        # un baseline con una consulta menos: la corrida actual "empeoró"
+        datos["rutas"]["N_articulos"]["consultas"] -= 1
+        with open(baseline, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+
+        informe = json.loads(self.bench("--rutas", "N_articulos", "--baseline", baseline))
+        self.assertEqual(informe["comparacion"]["N_articulos"]["consultas"], 1)
+        self.assertTrue(informe["comparacion"]["N_articulos"]["empeoro"])
+        with self.assertRaises(CommandError):
+            self.bench("--rutas", "N_articulos", "--baseline", baseline, "--estricto")
+
+
+# página grande: con la paginación una consulta por fila queda acotada y no se notaría
+@override_settings(ARTICULOS_POR_PAGINA=100)
+class LimiteConsultasRutasTest(LimiteConsultasMixin, TestCase):
+    """
+    Máximo de consultas por ruta con los datos de seed a escala chica, y que no crezcan
+    al agregar artículos y subcategorías a las mismas categorías.
+    """
+    # consultas como anónimo (con la navegación ya cacheada), o con un usuario de rol
+    # "Usuario" en mantenimiento: sesión, usuario, perfil+rol y lo propio de la vista
+    LIMITES = {
+        "N_inicio": 1,
+        "N_pagina": 1,
+        "N_categoria": 4,
+        "N_subcategoria": 4,
+        "N_articulo": 2,
+        "N_articulos": 1,
+        "N_mantenimientoB": 4,
+        "N_mantenimientoC": 8,
+        "N_crear": 6,
+    }
+
+    def setUp(self):
+        Layout.get_solo()
+        self.duenio = User.objects.create_superuser(username="duenio_consultas", password="pwd")
+        datos_escala.generar(30, 5, self.duenio, paginas=3, categorias=3)
+        self.articulo, self.pagina = datos_escala.muestra_publica()
+        self.rutas = rutas(self.articulo, self.pagina, "Articulo")
+
+        self.usuario = User.objects.create_user(username="colaborador_consultas", password="pwd")
+        rol, _ = Rol.objects.get_or_create(nombre="Usuario")
+        PerfilUsuario.objects.update_or_create(user=self.usuario, defaults={"rol": rol})
+        self.con_sesion = Client()
+        self.con_sesion.force_login(self.usuario)
+
+    def agregar_filas(self):
+        inicio = Articulo.objects.filter(titulo__startswith="Extra").count()
+        for i in range(inicio, inicio + 3):
+            Articulo.objects.create(
+                titulo=f"Extra {i}", contenido="<p>x</p>", publico=True, usuario=self.duenio,
+                categoria=self.articulo.categoria, subcategoria=self.articulo.subcategoria,
+                tipo_id=self.articulo.tipo_id,
+            )
+            sub = SubCategoria.objects.create(nombre=f"Extra sub {i}", categoria=self.articulo.categoria,
+                                              desc="con contenido", publico=True)
+            Articulo.objects.create(titulo=f"Extra sub art {i}", publico=True, usuario=self.duenio,
+                                    categoria=self.articulo.categoria, subcategoria=sub,
+                                    tipo_id=self.articulo.tipo_id)
+
+    def client_de(self, privada):
+        return self.con_sesion if privada else self.client
+
+    def test_maximo_de_consultas_por_ruta(self):
+        for nombre, url, privada in self.rutas:
+            with self.subTest(ruta=nombre):
+                response = self.assertMaximoConsultas(url, self.LIMITES[nombre], self.client_de(privada))
+                self.assertEqual(response.status_code, 200)
+
+    def test_consultas_no_crecen_con_las_filas(self):
+        for nombre, url, privada in self.rutas:
+            with self.subTest(ruta=nombre):
+                self.assertConsultasNoCrecen(url, self.agregar_filas, self.client_de(privada))
+
+
+@override_settings(INSTRUMENTACION=True, CACHE_PUBLICO_TIMEOUT=0)
+class InstrumentacionMiddlewareTest(TestCase):
+
+    def setUp(self):
+        Layout.get_solo()
+        self.url = reverse("N_articulos")
+
+    def metricas(self, response):
+        return {nombre: float(valor) for nombre, valor in re.findall(r"([\w-]+);dur=([\d.]+)", response["Server-Timing"])}
+
+    def test_desactivado_sale_de_la_cadena(self):
+        with override_settings(INSTRUMENTACION=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                InstrumentacionMiddleware(lambda request: HttpResponse("OK"))
+
+    def test_server_timing_y_log(self):
+        self.client.get(self.url)
+        with self.assertLogs("mainApp.instrumentacion", "INFO") as logs, \
+                CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url)
+
+        metricas = self.metricas(response)
+        self.assertEqual(set(metricas), {"db", "sql-lenta", "tpl", "ctx", "total"})
+        self.assertGreater(metricas["tpl"] + metricas["ctx"], 0)
+        self.assertLessEqual(metricas["sql-lenta"], metricas["db"])
+        self.assertIn(f'desc="{len(consultas)} consultas"', response["Server-Timing"])
+
+        linea = logs.records[-1]
+        self.assertIn("ruta=/articulos/", linea.getMessage())
+        self.assertIn(f"consultas={len(consultas)}", linea.getMessage())
+        self.assertTrue(re.match(r"SELECT", linea.instrumentacion["sql_lenta"]))
+
+    async def test_funciona_con_asgi(self):
+        with self.assertLogs("mainApp.instrumentacion", "INFO") as logs:
+            response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("total", self.metricas(response))
+        self.assertIn("consultas=", logs.records[-1].getMessage())
+        self.assertNotIn("consultas=0 ", logs.records[-1].getMessage())
+
+
+class NombresUnicosTest(TestCase):
+    def _categorias(self, *nombres):
+        # bulk_create no pasa por save(): los nombres quedan tal cual
+        Categoria.objects.bulk_create([Categoria(nombre=nombre, desc="d") for nombre in nombres])
+
+    def _consultas_al_guardar(self, nombre):
+        categoria = Categoria(nombre=nombre, desc="d")
+        with CaptureQueriesContext(connection) as capturadas:
+            categoria.save()
+        return categoria, len(capturadas)
+
+    def test_consultas_no_dependen_de_las_colisiones(self):
+        self._categorias("Uno", "Noticia", *[f"Noticia ({i})" for i in range(1, 60)])
+        _, pocas = self._consultas_al_guardar("Uno")
+        categoria, muchas = self._consultas_al_guardar("Noticia")
+        self.assertEqual(categoria.nombre, "Noticia (60)")
+        self.assertEqual(muchas, pocas)
+
+    def test_usa_el_primer_sufijo_libre(self):
+        self._categorias("Noticia", "Noticia (2)", "Noticias", "Noticia (x)")
+        self.assertEqual(valor_unico(Categoria, "nombre", "Noticia"), "Noticia (1)")
+        self.assertEqual(valor_unico(Categoria, "nombre", "Libre"), "Libre")
+
+    def test_excluye_la_propia_fila(self):
+        categoria = Categoria.objects.create(nombre="Noticia", desc="d")
+        categoria.desc = "otra"
+        categoria.save()
+        categoria.refresh_from_db()
+        self.assertEqual(categoria.nombre, "Noticia")
+
+    def test_recorta_para_respetar_max_length(self):
+        nombre = "x" * 50
+        self._categorias(nombre)
+        categoria = Categoria.objects.create(nombre=nombre, desc="d")
+        self.assertEqual(categoria.nombre, "x" * 46 + " (1)")
+
+    def test_slug_con_guion(self):
+        Tipo.objects.bulk_create([Tipo(nombre="a", slug="texto"), Tipo(nombre="b", slug="texto-1")])
+        tipo = Tipo.objects.create(nombre="Texto")
+        self.assertEqual(tipo.slug, "texto-2")
+
+    def test_reintenta_si_otro_guardado_ocupa_el_nombre(self):
+        self._categorias("Noticia")
+        calculados = []
+
+        def valor_unico(*args, **kwargs):
+            # la primera vez "Noticia" estaba libre: otra transacción la ocupó antes del INSERT
+            valor = "Noticia" if not calculados else original(*args, **kwargs)
+            calculados.append(valor)
+            return valor
+
+        original = nombres_unicos.valor_unico
+        with mock.patch.object(nombres_unicos, "valor_unico", valor_unico):
+            categoria = Categoria.objects.create(nombre="Noticia", desc="d")
+        self.assertEqual(calculados, ["Noticia", "Noticia (1)"])
+        self.assertEqual(categoria.nombre, "Noticia (1)")
+
+    def test_otros_integrity_error_no_se_reintentan(self):
+        categoria = Categoria(nombre="Noticia", desc="d")
+        intentos = []
+
+        def guardar():
+            intentos.append(1)
+            raise IntegrityError("otra restricción")
+
+        with self.assertRaises(IntegrityError):
+            guardar_unico(categoria, guardar, {"nombre": ("Noticia", FORMATO_NOMBRE)})
+        self.assertEqual(len(intentos), 1)
+
+
+    def test_asignador_cuenta_lo_ya_asignado(self):
+        self._categorias("Noticia (2)")
+        asignador = Asignador(Categoria, "nombre")
+        asignador.preparar(["Noticia (1)", "Noticia", "Otra"])
+        asignados = [asignador.asignar(base) for base in ("Noticia (1)", "Noticia", "Noticia", "Noticia", "Otra")]
+        self.assertEqual(asignados, ["Noticia (1)", "Noticia", "Noticia (3)", "Noticia (4)", "Otra"])
+
+
+class ExportarSitioTest(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp(prefix="test_export_media_")
+        self.destino = tempfile.mkdtemp(prefix="test_export_")
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.destino, ignore_errors=True)
+        ajuste = override_settings(MEDIA_ROOT=self.media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+        self.user = User.objects.create(username="autora")
+        tipo = Tipo.objects.create(nombre="Notas", usuario=self.user)
+        pagina = Pagina.objects.create(titulo="Notas", tipo=tipo, publico=True, contenido="<p>x</p>",
+                                       usuario=self.user)
+        categoria = Categoria.objects.create(nombre="General", desc="d")
+        categoria.paginas.add(pagina)
+        for i in range(3):
+            articulo = Articulo(titulo=f"Nota {i}", contenido="c", publico=True, usuario=self.user,
+                                categoria=categoria, tipo=tipo)
+            # dos artículos con la misma imagen: en la exportación queda una sola vez
+            articulo.imagen.save(f"nota{i}.txt", ContentFile(b"mismo contenido" if i < 2 else b"otro"), save=False)
+            articulo.save()
+        Articulo.objects.filter(titulo="Nota 0").update(creacion="2020-01-02T03:04:05Z")
+
+    def vaciar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for modelo in (Articulo, Categoria, Pagina, Tipo):
+                modelo.objects.all().delete()
+        # los archivos los borra el worker (blog/limpieza.py)
+        procesar_pendientes()
+
+    def test_exporta_e_importa_con_archivos_por_hash(self):
+        exportar(self.destino, chunk_size=2)
+        digest = hashlib.sha256(b"mismo contenido").hexdigest()
+        self.assertTrue(os.path.exists(ruta_media(self.destino, digest)))
+        self.assertEqual(sum(len(archivos) for _, _, archivos in os.walk(os.path.join(self.destino, "media"))), 2)
+
+        self.vaciar()
+        self.assertFalse(os.listdir(os.path.join(self.media, "thumbnails")))
+        User.objects.filter(username="autora").delete()
+        nueva = User.objects.create(username="nueva")
+        cantidades = importar(self.destino, usuario=nueva, lote=2)
+
+        self.assertEqual(cantidades["blog.Articulo"], 3)
+        nota = Articulo.objects.get(titulo="Nota 0")
+        self.assertEqual(nota.creacion.year, 2020)
+        self.assertEqual(nota.usuario, nueva)
+        with nota.imagen.open("rb") as archivo:
+            self.assertEqual(archivo.read(), b"mismo contenido")
+        self.assertEqual(list(Categoria.objects.get().paginas.values_list("titulo", flat=True)), ["Notas"])
+
+    def test_reinicia_las_secuencias_de_las_pk(self):
+        exportar(self.destino)
+        self.vaciar()
+        with mock.patch.object(connection.ops, "sequence_reset_sql", return_value=[]) as reiniciar:
+            importar(self.destino)
+        modelos = {modelo for llamada in reiniciar.call_args_list for modelo in llamada.args[1]}
+        self.assertTrue({Tipo, Pagina, Categoria, Articulo} <= modelos)
+        # la próxima fila creada normalmente no choca con una importada
+        nueva = Tipo.objects.create(nombre="Nueva")
+        self.assertGreater(nueva.pk, Tipo.objects.exclude(pk=nueva.pk).order_by("-pk").values_list("pk", flat=True)[0])
+
+    def test_importacion_cortada_sigue_donde_quedo(self):
+        exportacion.exportar(self.destino)
+        self.vaciar()
+
+        guardar = exportacion.Importacion.guardar
+        lotes = []
+
+        def guardar_y_cortar(importacion, modelo, objetos):
+            if len(lotes) == 4:
+                raise RuntimeError("corte")
+            lotes.append(modelo)
+            guardar(importacion, modelo, objetos)
+
+        with mock.patch.object(exportacion.Importacion, "guardar", guardar_y_cortar):
+            with self.assertRaises(RuntimeError):
+                exportacion.importar(self.destino, lote=1)
+        self.assertTrue(os.path.exists(os.path.join(self.destino, "contenido.ndjson.progreso")))
+        self.assertEqual(Articulo.objects.count(), 1)
+
+        cantidades = exportacion.importar(self.destino, lote=1)
+        # no repite tipo, página, categoría ni el primer artículo
+        self.assertEqual(cantidades["blog.Articulo"], 2)
+        self.assertNotIn("blog.Tipo", cantidades)
+        self.assertEqual(Articulo.objects.count(), 3)
+        self.assertFalse(os.path.exists(os.path.join(self.destino, "contenido.ndjson.progreso")))
+
+    def test_no_pisa_los_archivos_del_storage(self):
+        exportar(self.destino)
+        self.vaciar()
+        # el nombre que traía la nota 2 lo ocupa otro archivo: se guarda con otro nombre
+        nombre = default_storage.save("thumbnails/nota2.txt", ContentFile(b"ajeno"))
+        importar(self.destino)
+
+        imagen = Articulo.objects.get(titulo="Nota 2").imagen
+        self.assertNotEqual(imagen.name, nombre)
+        with imagen.open("rb") as archivo:
+            self.assertEqual(archivo.read(), b"otro")
+        with default_storage.open(nombre, "rb") as archivo:
+            self.assertEqual(archivo.read(), b"ajeno")
+
+    def test_exporta_las_imagenes_del_contenido(self):
+        nombre = default_storage.save("uploads/foto.png", ContentFile(b"foto"))
+        Pagina.objects.update(contenido=f'<p><img src="/media/{nombre}"></p>')
+        exportar(self.destino)
+        self.vaciar()
+        default_storage.delete(nombre)
+        default_storage.save(nombre, ContentFile(b"otra foto"))
+        importar(self.destino)
+
+        contenido = Pagina.objects.get().contenido
+        restaurada = re.search(r'src="/media/([^"]+)"', contenido).group(1)
+        self.assertNotEqual(restaurada, nombre)
+        with default_storage.open(restaurada, "rb") as archivo:
+            self.assertEqual(archivo.read(), b"foto")
+        with default_storage.open(nombre, "rb") as archivo:
+            self.assertEqual(archivo.read(), b"otra foto")
+
+    def test_no_importa_en_un_sitio_con_contenido(self):
+        exportar(self.destino)
+        Articulo.objects.filter(titulo="Nota 0").update(titulo="Editada")
+        with self.assertRaises(SitioConContenido):
+            importar(self.destino)
+        self.assertTrue(Articulo.objects.filter(titulo="Editada").exists())
+
+    def test_comandos(self):
+        out = StringIO()
+        call_command("export_site", self.destino, stdout=out)
+        self.assertIn("blog.Articulo: 3", out.getvalue())
+        with self.assertRaisesMessage(CommandError, "ya tiene contenido"):
+            call_command("import_site", self.destino, stdout=out)
+        self.vaciar()
+        call_command("import_site", self.destino, stdout=out)
+        self.assertIn("Importación terminada", out.getvalue())
+        with open(os.path.join(self.destino, "contenido.ndjson"), "w") as archivo:
+            archivo.write("{}\n")
+        with self.assertRaises(CommandError):
+            call_command("import_site", self.destino, stdout=out)
@@ -1,4 +1,32 @@
 from django.contrib import admin
 from mainApp.admin_utils import DenyRedirectAdminMixin
+from .models import ArchivoPorBorrar, Tarea
 
 # Register your models here.
+
+
+@admin.register(Tarea)
+class TareaAdmin(DenyRedirectAdminMixin, admin.ModelAdmin):
+    list_display = ("nombre", "estado", "intentos", "disponible_desde", "actualizacion")
+    list_filter = ("estado", "nombre")
+    search_fields = ("clave",)
+    readonly_fields = [f.name for f in Tarea._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_module_permission(self, request):
+        return request.user.is_superuser
+
+
+@admin.register(ArchivoPorBorrar)
+class ArchivoPorBorrarAdmin(DenyRedirectAdminMixin, admin.ModelAdmin):
+    list_display = ("nombre", "creacion")
+    search_fields = ("nombre",)
+    readonly_fields = [f.name for f in ArchivoPorBorrar._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_module_permission(self, request):
+        return request.user.is_superuser
@@ -0,0 +1,50 @@
+# mantenimiento/management/commands/procesar_tareas.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from mantenimiento.tareas import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de la cola de tareas (miniaturas de video, etc.). "
+        "Por defecto queda corriendo y consulta la base cada --intervalo segundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesar las tareas disponibles y terminar (útil para cron).'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=5,
+            help='Segundos de espera cuando no hay tareas (por defecto: 5).'
+        )
+        parser.add_argument(
+            '--max-tareas',
+            type=int,
+            default=None,
+            help='Terminar después de ejecutar esta cantidad de tareas.'
+        )
+
+    def handle(self, *args, **options):
+        restantes = options['max_tareas']
+        total = 0
+        try:
+            while restantes is None or restantes > 0:
+                ejecutadas = procesar_pendientes(limite=restantes)
+                total += ejecutadas
+                if restantes is not None:
+                    restantes -= ejecutadas
+                if options['una_vez']:
+                    break
+                if not ejecutadas:
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Tareas ejecutadas: {total}."))
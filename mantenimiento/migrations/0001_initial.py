@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, verbose_name='Tarea')),
+                ('clave', models.CharField(max_length=255, unique=True)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=20)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('max_intentos', models.PositiveIntegerField(default=3)),
+                ('disponible_desde', models.DateTimeField(default=django.utils.timezone.now)),
+                ('error', models.TextField(blank=True)),
+                ('creacion', models.DateTimeField(auto_now_add=True)),
+                ('actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'tarea',
+                'verbose_name_plural': 'tareas',
+                'ordering': ['disponible_desde', 'id'],
+                'indexes': [models.Index(fields=['estado', 'disponible_desde'], name='tarea_estado_disponible_idx')],
+            },
+        ),
+    ]
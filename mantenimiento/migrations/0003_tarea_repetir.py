@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mantenimiento', '0002_archivos_por_borrar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='repetir',
+            field=models.BooleanField(default=False),
+        ),
+    ]
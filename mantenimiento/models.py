@@ -1,3 +1,64 @@
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
+
+
+class Tarea(models.Model):
+    """
+    Trabajo en segundo plano guardado en la base de datos (ver mantenimiento/tareas.py).
+    Lo procesa el comando `procesar_tareas`, sin broker externo.
+    """
+    PENDIENTE = "pendiente"
+    EN_PROCESO = "en_proceso"
+    COMPLETADA = "completada"
+    FALLIDA = "fallida"
+    ESTADOS = [
+        (PENDIENTE, "Pendiente"),
+        (EN_PROCESO, "En proceso"),
+        (COMPLETADA, "Completada"),
+        (FALLIDA, "Fallida"),
+    ]
+
+    nombre = models.CharField(max_length=100, verbose_name="Tarea")
+    # Idempotencia: encolar dos veces la misma clave no crea otra tarea
+    clave = models.CharField(max_length=255, unique=True)
+    payload = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    intentos = models.PositiveIntegerField(default=0)
+    max_intentos = models.PositiveIntegerField(default=3)
+    # Pendiente: cuándo se puede ejecutar (reintentos con espera).
+    # En proceso: hasta cuándo vale la reserva del worker (si se cae, otro la retoma).
+    disponible_desde = models.DateTimeField(default=timezone.now)
+    # Se volvió a encolar (repetir=True) mientras corría: al terminar queda pendiente otra vez
+    repetir = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    creacion = models.DateTimeField(auto_now_add=True)
+    actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "tarea"
+        verbose_name_plural = "tareas"
+        ordering = ['disponible_desde', 'id']
+        indexes = [models.Index(fields=['estado', 'disponible_desde'], name='tarea_estado_disponible_idx')]
+
+    def __str__(self):
+        return f"{self.nombre} [{self.estado}]"
+
+
+class ArchivoPorBorrar(models.Model):
+    """
+    Archivo del storage que dejó de usarse (ver blog/limpieza.py). Se anota en la misma
+    transacción que lo quitó, así que si se revierte el archivo no se borra; el worker
+    lo borra después del commit.
+    """
+    nombre = models.CharField(max_length=255, unique=True)
+    creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "archivo por borrar"
+        verbose_name_plural = "archivos por borrar"
+        ordering = ['id']
+
+    def __str__(self):
+        return self.nombre
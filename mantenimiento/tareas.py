@@ -0,0 +1,173 @@
+# mantenimiento/tareas.py
+"""
+Cola de tareas en la base de datos.
+
+Uso:
+    @registrar_tarea("blog.miniatura_video")
+    def generar(payload): ...
+
+    encolar("blog.miniatura_video", clave="miniatura:...", payload={...})
+
+El comando `python manage.py procesar_tareas` ejecuta las pendientes. Una tarea
+que lanza una excepción se reintenta con espera exponencial hasta `max_intentos`;
+después queda FALLIDA y se llama a su `al_fallar` (si tiene).
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Tarea
+
+logger = logging.getLogger(__name__)
+
+_REGISTRO = {}
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def registrar_tarea(nombre, al_fallar=None):
+    """Registra la función que ejecuta las tareas `nombre`. Recibe el payload (dict)."""
+    def decorator(func):
+        _REGISTRO[nombre] = (func, al_fallar)
+        return func
+    return decorator
+
+
+def encolar(nombre, clave, payload=None, max_intentos=None, repetir=False):
+    """
+    Crea la tarea si no existe otra con la misma clave. Devuelve (tarea, creada).
+    Con repetir=True, una tarea ya encolada con esa clave vuelve a correr: si está COMPLETADA
+    o FALLIDA queda pendiente con los intentos en cero, y si está EN_PROCESO queda pendiente
+    cuando termine (el worker pudo haber leído sus datos antes de este pedido).
+    Al estar en la base de datos, si la transacción actual se revierte la tarea tampoco queda.
+    """
+    if nombre not in _REGISTRO:
+        raise LookupError(f"Tarea '{nombre}' no registrada")
+    tarea, creada = Tarea.objects.get_or_create(clave=clave, defaults={
+        'nombre': nombre,
+        'payload': payload or {},
+        'max_intentos': max_intentos or _config("TAREAS_MAX_INTENTOS", 3),
+    })
+    if not creada and repetir and _rearmar(tarea):
+        tarea.refresh_from_db()
+        creada = True
+    return tarea, creada
+
+
+def _rearmar(tarea):
+    """Pide otra corrida de una tarea existente. True si se volvió a dejar pendiente o en espera."""
+    filas = Tarea.objects.filter(pk=tarea.pk)
+    # dos vueltas: entre una consulta y otra el worker puede terminarla
+    for _ in range(2):
+        ahora = timezone.now()
+        if filas.filter(estado__in=[Tarea.COMPLETADA, Tarea.FALLIDA]).update(
+                estado=Tarea.PENDIENTE, intentos=0, disponible_desde=ahora, actualizacion=ahora):
+            return True
+        if filas.filter(estado=Tarea.EN_PROCESO).update(repetir=True):
+            return True
+        if filas.filter(estado=Tarea.PENDIENTE).exists():
+            return False
+    return False
+
+
+def encolar_lote(nombre, tareas, max_intentos=None):
+    """
+    `encolar` para muchas tareas en un solo INSERT: `tareas` es un iterable de (clave, payload).
+    Las claves que ya existen se ignoran (sin `repetir`). Devuelve cuántas se pidieron.
+    """
+    if nombre not in _REGISTRO:
+        raise LookupError(f"Tarea '{nombre}' no registrada")
+    intentos = max_intentos or _config("TAREAS_MAX_INTENTOS", 3)
+    nuevas = [Tarea(nombre=nombre, clave=clave, payload=payload or {}, max_intentos=intentos)
+              for clave, payload in tareas]
+    Tarea.objects.bulk_create(nuevas, ignore_conflicts=True)
+    return len(nuevas)
+
+
+def disponibles(ahora=None):
+    """Pendientes cuya espera terminó, más las reservas vencidas de workers caídos."""
+    ahora = ahora or timezone.now()
+    return Tarea.objects.filter(
+        Q(estado=Tarea.PENDIENTE) | Q(estado=Tarea.EN_PROCESO),
+        disponible_desde__lte=ahora,
+    )
+
+
+def _reservar(tarea):
+    """Marca la tarea como tomada por este worker. False si otro la tomó antes."""
+    ahora = timezone.now()
+    reserva = ahora + timedelta(seconds=_config("TAREAS_TIMEOUT", 60 * 10))
+    tomadas = disponibles(ahora).filter(pk=tarea.pk, intentos=tarea.intentos).update(
+        estado=Tarea.EN_PROCESO,
+        intentos=tarea.intentos + 1,
+        disponible_desde=reserva,
+        actualizacion=ahora,
+    )
+    if tomadas:
+        tarea.estado = Tarea.EN_PROCESO
+        tarea.intentos += 1
+        tarea.disponible_desde = reserva
+    return bool(tomadas)
+
+
+def ejecutar(tarea):
+    """Ejecuta una tarea ya reservada y guarda el resultado."""
+    func, al_fallar = _REGISTRO.get(tarea.nombre, (None, None))
+    try:
+        if func is None:
+            raise LookupError(f"Tarea '{tarea.nombre}' no registrada")
+        func(tarea.payload)
+    except Exception as exc:
+        tarea.error = traceback.format_exc()[-4000:]
+        if tarea.intentos >= tarea.max_intentos:
+            tarea.estado = Tarea.FALLIDA
+            logger.error("Tarea %s (%s) falló definitivamente: %s", tarea.pk, tarea.nombre, exc)
+            if al_fallar:
+                try:
+                    al_fallar(tarea.payload, exc)
+                except Exception:
+                    logger.exception("Falló al_fallar de la tarea %s (%s)", tarea.pk, tarea.nombre)
+        else:
+            tarea.estado = Tarea.PENDIENTE
+            espera = _config("TAREAS_REINTENTO_SEGUNDOS", 30) * 2 ** (tarea.intentos - 1)
+            tarea.disponible_desde = timezone.now() + timedelta(seconds=espera)
+            logger.warning("Tarea %s (%s) falló, reintento en %ss: %s", tarea.pk, tarea.nombre, espera, exc)
+    else:
+        tarea.estado = Tarea.COMPLETADA
+        tarea.error = ""
+    # condicionado a `repetir`: un encolar(repetir=True) durante la corrida no se pierde
+    guardada = Tarea.objects.filter(pk=tarea.pk, repetir=False).update(
+        estado=tarea.estado, error=tarea.error, disponible_desde=tarea.disponible_desde,
+        actualizacion=timezone.now())
+    if not guardada:
+        tarea.estado = Tarea.PENDIENTE
+        tarea.intentos = 0
+        tarea.disponible_desde = timezone.now()
+        tarea.repetir = False
+        tarea.save(update_fields=['estado', 'error', 'intentos', 'disponible_desde', 'repetir', 'actualizacion'])
+    return tarea.estado
+
+
+def procesar_pendientes(limite=None):
+    """Ejecuta las tareas disponibles (hasta `limite`). Devuelve cuántas se ejecutaron."""
+    ejecutadas = 0
+    while limite is None or ejecutadas < limite:
+        tarea = disponibles().order_by('disponible_desde', 'id').first()
+        if tarea is None:
+            break
+        if tarea.estado == Tarea.EN_PROCESO and tarea.intentos >= tarea.max_intentos:
+            # el worker que la tenía se cayó en el último intento
+            disponibles().filter(pk=tarea.pk, intentos=tarea.intentos).update(
+                estado=Tarea.FALLIDA, error="La reserva venció sin terminar la tarea.")
+            continue
+        if not _reservar(tarea):
+            continue
+        ejecutar(tarea)
+        ejecutadas += 1
+    return ejecutadas
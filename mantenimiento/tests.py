@@ -1,3 +1,4 @@
+import os
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.messages import get_messages
@@ -208,3 +209,120 @@ class RolRequiredDecoratorTest(TestCase):
         self.assertTrue(resp.wsgi_request.user.is_superuser)
 
 
+# ==========================
+# TESTS PARA LA COLA DE TAREAS
+# ==========================
+from datetime import timedelta
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from mantenimiento import tareas
+from mantenimiento.models import Tarea
+
+
+@override_settings(TAREAS_MAX_INTENTOS=2, TAREAS_REINTENTO_SEGUNDOS=60)
+class TareasTest(TestCase):
+
+    def setUp(self):
+        self.llamadas = []
+        self.fallos = []
+        self.fallar = False
+
+        def ejecutar(payload):
+            self.llamadas.append(payload)
+            if self.fallar:
+                raise RuntimeError("falla de prueba")
+
+        tareas.registrar_tarea("test.tarea", al_fallar=lambda p, e: self.fallos.append(p))(ejecutar)
+        self.addCleanup(tareas._REGISTRO.pop, "test.tarea", None)
+
+    def test_encolar_es_idempotente_por_clave(self):
+        _, creada = tareas.encolar("test.tarea", "clave-1", {"n": 1})
+        _, repetida = tareas.encolar("test.tarea", "clave-1", {"n": 2})
+        self.assertTrue(creada)
+        self.assertFalse(repetida)
+        self.assertEqual(Tarea.objects.count(), 1)
+
+    def test_encolar_tarea_no_registrada(self):
+        with self.assertRaises(LookupError):
+            tareas.encolar("no.existe", "x")
+
+    def test_procesar_ejecuta_y_completa(self):
+        tareas.encolar("test.tarea", "clave-1", {"n": 1})
+        self.assertEqual(tareas.procesar_pendientes(), 1)
+        self.assertEqual(self.llamadas, [{"n": 1}])
+        self.assertEqual(Tarea.objects.get().estado, Tarea.COMPLETADA)
+        # ya completada: no se vuelve a ejecutar
+        self.assertEqual(tareas.procesar_pendientes(), 0)
+
+    def test_reintento_con_espera_y_fallo_definitivo(self):
+        self.fallar = True
+        tarea, _ = tareas.encolar("test.tarea", "clave-1")
+        tareas.procesar_pendientes()
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, Tarea.PENDIENTE)
+        self.assertEqual(tarea.intentos, 1)
+        self.assertIn("falla de prueba", tarea.error)
+        self.assertGreater(tarea.disponible_desde, timezone.now() + timedelta(seconds=50))
+
+        # todavía en espera
+        self.assertEqual(tareas.procesar_pendientes(), 0)
+        Tarea.objects.update(disponible_desde=timezone.now())
+        tareas.procesar_pendientes()
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, Tarea.FALLIDA)
+        self.assertEqual(self.fallos, [{}])
+
+    def test_repetir_rearma_una_tarea_fallida(self):
+        self.fallar = True
+        tareas.encolar("test.tarea", "clave-1", max_intentos=1)
+        tareas.procesar_pendientes()
+        self.assertEqual(Tarea.objects.get().estado, Tarea.FALLIDA)
+
+        self.fallar = False
+        _, rearmada = tareas.encolar("test.tarea", "clave-1", repetir=True)
+        self.assertTrue(rearmada)
+        self.assertEqual(tareas.procesar_pendientes(), 1)
+        self.assertEqual(Tarea.objects.get().estado, Tarea.COMPLETADA)
+
+    def test_repetir_mientras_corre_vuelve_a_correr(self):
+        def pedir_otra_vuelta(payload):
+            self.llamadas.append(payload)
+            if len(self.llamadas) == 1:
+                # otra transacción encola mientras el worker ya leyó sus datos
+                tareas.encolar("test.en_curso", "clave-1", repetir=True)
+
+        tareas.registrar_tarea("test.en_curso")(pedir_otra_vuelta)
+        self.addCleanup(tareas._REGISTRO.pop, "test.en_curso", None)
+        tareas.encolar("test.en_curso", "clave-1")
+        self.assertEqual(tareas.procesar_pendientes(), 2)
+        tarea = Tarea.objects.get()
+        self.assertEqual((tarea.estado, tarea.repetir), (Tarea.COMPLETADA, False))
+
+    def test_error_en_al_fallar_no_corta_el_worker(self):
+        def al_fallar(payload, exc):
+            raise ValueError("al_fallar roto")
+
+        tareas.registrar_tarea("test.rota", al_fallar=al_fallar)(lambda payload: 1 / 0)
+        self.addCleanup(tareas._REGISTRO.pop, "test.rota", None)
+        tareas.encolar("test.rota", "rota", max_intentos=1)
+        tareas.encolar("test.tarea", "despues")
+        with self.assertLogs("mantenimiento.tareas", "ERROR"):
+            self.assertEqual(tareas.procesar_pendientes(), 2)
+        self.assertEqual(Tarea.objects.get(clave="rota").estado, Tarea.FALLIDA)
+        self.assertEqual(Tarea.objects.get(clave="despues").estado, Tarea.COMPLETADA)
+
+    def test_reserva_vencida_se_retoma(self):
+        tarea, _ = tareas.encolar("test.tarea", "clave-1")
+        Tarea.objects.update(estado=Tarea.EN_PROCESO, intentos=1,
+                             disponible_desde=timezone.now() - timedelta(seconds=1))
+        tareas.procesar_pendientes()
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, Tarea.COMPLETADA)
+        self.assertEqual(tarea.intentos, 2)
+
+    def test_comando_procesar_tareas(self):
+        tareas.encolar("test.tarea", "clave-1")
+        tareas.encolar("test.tarea", "clave-2")
+        call_command("procesar_tareas", "--una-vez", stdout=open(os.devnull, "w"))
+        self.assertEqual(len(self.llamadas), 2)
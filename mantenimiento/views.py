@@ -66,9 +66,16 @@ def f_mantenimiento(request):
             if modelo._meta.model_name != "layout":
                 lista_modelos.append(modelo.__name__)
 
+        # Estadísticas de la caché pública: solo para staff
+        cache_stats = None
+        if request.user.is_superuser or request.user.is_staff:
+            from mainApp import cache_publico
+            cache_stats = cache_publico.estadisticas()
+
         response = render(request, "mantenimiento/mantenimiento.html", {
             "lista_modelos": lista_modelos,
-            "layo": lay
+            "layo": lay,
+            "cache_stats": cache_stats,
         })
 
         # Consumir mensajes (si querés)